@@ -0,0 +1,79 @@
+"""Requêtes conditionnelles (``ETag`` / ``Last-Modified``) pour les listes interrogées en boucle.
+
+L'empreinte de version d'une table tient en deux lectures ponctuelles : le plus
+récent ``updated_at`` (indexé) et le compteur de suppressions
+:class:`~dynamic_shop.core.models.TableVersion`. Toutes les écritures de stock
+tiennent ``updated_at`` à jour (y compris les ``UPDATE`` groupés), et les
+suppressions incrémentent le compteur ; aucun ``COUNT(*)`` n'est exécuté. Les tables dont la liste affiche des champs (marque d'un
+produit, entrepôt d'un lot…) entrent aussi dans l'empreinte. Un client qui
+renvoie l'``ETag`` reçu obtient ``304`` sans que la requête de liste ni la
+sérialisation ne soient exécutées.
+
+``Last-Modified`` est envoyé à titre indicatif mais ``If-Modified-Since`` n'est
+pas évalué : à la seconde près et aveugle aux suppressions, il pourrait valider
+une liste périmée. Seul l'``ETag``, construit sur l'empreinte complète, fait foi.
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple, Type
+
+from django.db.models import Max, Model
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from dynamic_shop.core.models import TableVersion
+
+
+class ConditionalGetMixin:
+    """Ajoute ``ETag`` et ``Last-Modified`` à ``list``/``retrieve`` et répond ``304`` si rien n'a changé.
+
+    L'``ETag`` combine l'empreinte de la table et des relations
+    ``version_related``, l'URL complète (filtres, curseur) et l'en-tête
+    ``Accept`` : chaque représentation a son propre validateur.
+    """
+
+    version_field = "updated_at"
+    # Relations dont le sérialiseur affiche des champs (``product.sku``, ``warehouse.name``…).
+    version_related: Tuple[str, ...] = ()
+
+    def version_models(self) -> List[Type[Model]]:
+        model = self.get_queryset().model
+        return [model] + [model._meta.get_field(name).related_model for name in self.version_related]
+
+    def version_stamp(self) -> List[Tuple[int, Optional[datetime]]]:
+        tracked = self.version_models()
+        versions = TableVersion.versions(tracked)
+        return [
+            (
+                versions.get(model._meta.label_lower, 0),
+                model._default_manager.aggregate(last=Max(self.version_field))["last"],
+            )
+            for model in tracked
+        ]
+
+    def _conditional(self, request, render: Callable):
+        stamps = self.version_stamp()
+        key = "|".join(
+            [f"{version}:{last.isoformat() if last else ''}" for version, last in stamps]
+            + [request.get_full_path(), request.META.get("HTTP_ACCEPT", "")]
+        )
+        etag = f'W/"{hashlib.md5(key.encode("utf-8"), usedforsecurity=False).hexdigest()}"'
+        last = max((last for _, last in stamps if last), default=None)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last is not None:
+                response["Last-Modified"] = http_date(int(last.timestamp()))
+            # Le client garde la réponse mais la revalide à chaque appel.
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(request, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
@@ -0,0 +1,239 @@
+"""Exports volumineux en flux (CSV ou NDJSON), compressés à la volée.
+
+Les lignes sont lues par ``values_list(...).iterator(chunk_size=...)`` et
+sérialisées au fil de l'eau vers une :class:`~django.http.StreamingHttpResponse` :
+ni jeu de données complet ni instances de modèle ne sont construits, si bien que
+la mémoire consommée ne dépend pas du nombre de lignes exportées. La réponse est
+compressée en ``br`` ou ``gzip`` selon l'en-tête ``Accept-Encoding``.
+
+Sous ASGI (daphne), Django matérialiserait un itérateur synchrone en entier
+avant d'envoyer le premier octet : le corps y est donc un générateur asynchrone
+qui tire les blocs un à un dans le thread synchrone de la requête.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Type
+
+import brotli
+import django_filters
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.exceptions import ValidationError
+
+from dynamic_shop.inventory.models import Batch, StockMovement
+from dynamic_shop.sales.models import Order
+
+from .filters import BatchFilter, MovementFilter, OrderFilter
+
+# Taille visée des blocs envoyés au client (et au compresseur).
+FLUSH_SIZE = 64 * 1024
+
+
+@dataclass(frozen=True)
+class ExportDataset:
+    """Colonnes exportées (``(en-tête, champ)``), filtres acceptés et requête de base."""
+
+    queryset: Callable[[], QuerySet]
+    columns: Tuple[Tuple[str, str], ...]
+    filterset_class: Optional[Type[django_filters.FilterSet]] = None
+
+    def filtered(self, params) -> QuerySet:
+        """Applique les filtres de l'export ; lève ``ValidationError`` si un paramètre est invalide."""
+
+        queryset = self.queryset()
+        if self.filterset_class is None:
+            return queryset
+        filterset = self.filterset_class(params, queryset=queryset)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        return filterset.qs
+
+    def rows(self, queryset: QuerySet, chunk_size: int = 2000) -> Iterator[tuple]:
+        fields = [field for _, field in self.columns]
+        return queryset.order_by("pk").values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+EXPORTS: Dict[str, ExportDataset] = {
+    "batches": ExportDataset(
+        queryset=Batch.objects.all,
+        filterset_class=BatchFilter,
+        columns=(
+            ("id", "id"),
+            ("sku", "product__sku"),
+            ("batch_code", "batch_code"),
+            ("warehouse", "warehouse__name"),
+            ("expiry_date", "expiry_date"),
+            ("received_at", "received_at"),
+            ("initial_qty", "initial_qty"),
+            ("remaining_qty", "remaining_qty"),
+            ("reserved_qty", "reserved_qty"),
+        ),
+    ),
+    "movements": ExportDataset(
+        queryset=StockMovement.objects.all,
+        filterset_class=MovementFilter,
+        columns=(
+            ("id", "id"),
+            ("created_at", "created_at"),
+            ("movement_type", "movement_type"),
+            ("sku", "product__sku"),
+            ("batch_code", "batch__batch_code"),
+            ("quantity", "quantity"),
+            ("from_warehouse", "from_warehouse__name"),
+            ("to_warehouse", "to_warehouse__name"),
+            ("reason", "reason"),
+            ("created_by", "created_by__username"),
+        ),
+    ),
+    "orders": ExportDataset(
+        queryset=Order.objects.all,
+        filterset_class=OrderFilter,
+        columns=(
+            ("id", "id"),
+            ("code", "code"),
+            ("created_at", "created_at"),
+            ("status", "status"),
+            ("customer", "customer__name"),
+            ("warehouse", "warehouse__name"),
+            ("total_amount", "total_amount"),
+            ("paid_amount", "paid_amount"),
+        ),
+    ),
+}
+
+
+class _Line:
+    """Tampon d'une ligne pour ``csv.writer`` (renvoie la ligne écrite)."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def csv_lines(headers: Sequence[str], rows: Iterable[tuple]) -> Iterator[str]:
+    writer = csv.writer(_Line())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(headers: Sequence[str], rows: Iterable[tuple]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(headers, map(_json_value, row))), ensure_ascii=False) + "\n"
+
+
+FORMATS = {
+    "csv": (csv_lines, "text/csv; charset=utf-8"),
+    "ndjson": (ndjson_lines, "application/x-ndjson"),
+}
+
+
+def _blocks(lines: Iterable[str]) -> Iterator[bytes]:
+    """Regroupe les lignes en blocs d'environ ``FLUSH_SIZE`` octets."""
+
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= FLUSH_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _compressed(blocks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=4)
+        compress, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        compress, finish = compressor.compress, compressor.flush
+    for block in blocks:
+        data = compress(block)
+        if data:
+            yield data
+    yield finish()
+
+
+async def _async_blocks(blocks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Sert les blocs sous ASGI sans les accumuler.
+
+    Chaque bloc est produit par ``sync_to_async`` dans le même thread que la
+    vue (``thread_sensitive``), où vit le curseur de ``iterator()``.
+    """
+
+    pull = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            block = await pull(blocks, None)
+            if block is None:
+                return
+            yield block
+    finally:
+        await sync_to_async(blocks.close, thread_sensitive=True)()
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Choisit ``br`` puis ``gzip`` parmi les encodages acceptés par le client."""
+
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ("br", "gzip"):
+        if accepted.get(encoding, 0) > 0:
+            return encoding
+    return None
+
+
+def stream_export(
+    dataset: ExportDataset,
+    fmt: str,
+    params,
+    filename: str,
+    accept_encoding: str = "",
+    asynchronous: bool = False,
+) -> StreamingHttpResponse:
+    """Construit la réponse en flux d'un export (``fmt`` : ``csv`` ou ``ndjson``).
+
+    Les filtres sont validés avant la réponse ; la lecture des lignes ne
+    démarre qu'au premier bloc envoyé. ``asynchronous`` doit refléter le
+    serveur (ASGI ou WSGI) : chacun matérialise un corps de l'autre type.
+    """
+
+    serialize, content_type = FORMATS[fmt]
+    queryset = dataset.filtered(params)
+    headers = [header for header, _ in dataset.columns]
+    body: Iterator[bytes] = _blocks(serialize(headers, dataset.rows(queryset)))
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding:
+        body = _compressed(body, encoding)
+    response = StreamingHttpResponse(_async_blocks(body) if asynchronous else body, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if encoding:
+        response["Content-Encoding"] = encoding
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
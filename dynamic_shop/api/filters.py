@@ -2,9 +2,10 @@
 from __future__ import annotations
 
 import django_filters
+from django.db.models import F, Q
 from django.utils import timezone
 
-from dynamic_shop.inventory.models import Batch, Product
+from dynamic_shop.inventory.models import Batch, Product, StockMovement
 from dynamic_shop.sales.models import Order
 
 
@@ -33,10 +34,36 @@ class BatchFilter(django_filters.FilterSet):
         return queryset
 
 
+class MovementFilter(django_filters.FilterSet):
+    start_date = django_filters.DateFilter(field_name="created_at", lookup_expr="gte")
+    end_date = django_filters.DateFilter(field_name="created_at", lookup_expr="lte")
+    sku = django_filters.CharFilter(field_name="product__sku")
+
+    class Meta:
+        model = StockMovement
+        fields = ["movement_type", "product", "batch"]
+
+
 class OrderFilter(django_filters.FilterSet):
+    PAYMENT_STATES = (("unpaid", "Non payée"), ("partial", "Partiellement payée"), ("paid", "Soldée"))
+
     start_date = django_filters.DateFilter(field_name="created_at", lookup_expr="gte")
     end_date = django_filters.DateFilter(field_name="created_at", lookup_expr="lte")
+    outstanding = django_filters.BooleanFilter(method="filter_outstanding")
+    payment_state = django_filters.ChoiceFilter(choices=PAYMENT_STATES, method="filter_payment_state")
 
     class Meta:
         model = Order
-        fields = ["status", "customer__name"]
+        fields = ["status", "customer__name", "customer"]
+
+    def filter_outstanding(self, queryset, name, value):
+        # Même condition que l'index partiel ``order_outstanding_idx``.
+        unpaid = Q(paid_amount__lt=F("total_amount"))
+        return queryset.filter(unpaid) if value else queryset.exclude(unpaid)
+
+    def filter_payment_state(self, queryset, name, value):
+        if value == "unpaid":
+            return queryset.filter(paid_amount__lt=F("total_amount"), paid_amount=0)
+        if value == "partial":
+            return queryset.filter(paid_amount__lt=F("total_amount"), paid_amount__gt=0)
+        return queryset.filter(paid_amount__gte=F("total_amount"))
@@ -0,0 +1,228 @@
+"""Pagination par clé (*keyset*) des listes de l'API.
+
+Chaque page est lue par ``WHERE (tri) > (dernière position) ORDER BY tri LIMIT n``
+sur des colonnes indexées : le coût d'une page ne dépend pas de sa profondeur
+et rien n'est chargé au-delà de la page. Le tri suit ``?ordering=`` lorsqu'il est
+autorisé par la vue, sinon ``keyset_ordering`` ou l'ordre par défaut du modèle ;
+la clé primaire est ajoutée pour départager les ex æquo. Seules les colonnes
+locales de la table servent de clé (``customer`` devient ``customer_id``) ; un
+chemin vers une autre table (``product__sku``) est écarté. Sur une colonne
+nullable, les ``NULL`` sont placés explicitement en fin de lecture, quel que
+soit le moteur, et le curseur sait se positionner sur eux.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Set, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value: Any) -> Any:
+    # ``isoformat`` complet : les microsecondes font partie de la position.
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class KeysetPagination(BasePagination):
+    """Pagination par curseur opaque sur un tri composite (``created_at, id``, ``name, id``…).
+
+    ``?page_size=`` (50 par défaut, 500 au plus) règle la taille de page. Le
+    total ``count`` est calculé par défaut ; ``?count=0`` évite ce ``COUNT(*)``
+    sur les tables volumineuses.
+    """
+
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Curseur invalide."
+
+    @staticmethod
+    def _column(model, term: str) -> Optional[str]:
+        """Colonne locale correspondant à un terme de tri, ou ``None`` si elle n'en est pas une."""
+
+        direction, name = ("-", term[1:]) if term.startswith("-") else ("", term)
+        if name == "pk":
+            return term
+        if "__" in name:
+            return None
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not getattr(field, "concrete", False) or field.many_to_many:
+            return None
+        return f"{direction}{field.attname}"
+
+    def get_ordering(self, request, queryset, view) -> Tuple[str, ...]:
+        ordering: Optional[Sequence[str]] = None
+        for backend in getattr(view, "filter_backends", ()):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+        ordering = ordering or getattr(view, "keyset_ordering", None) or queryset.model._meta.ordering or ("pk",)
+        columns = [self._column(queryset.model, term) for term in ordering if isinstance(term, str)]
+        ordering = tuple(column for column in columns if column) or ("pk",)
+        if not {"pk", "-pk", "id", "-id"} & set(ordering):
+            ordering += ("-pk" if ordering[-1].startswith("-") else "pk",)
+        return ordering
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request) -> Optional[Tuple[bool, List[Any]]]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            ordering, reverse, values = payload["o"], bool(payload["r"]), payload["v"]
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message) from None
+        if ordering != list(self.ordering) or not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, values
+
+    def encode_cursor(self, instance, reverse: bool) -> str:
+        values = [_encode_value(getattr(instance, field.lstrip("-"))) for field in self.ordering]
+        payload = json.dumps({"o": list(self.ordering), "r": reverse, "v": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _nullable_fields(model, ordering: Sequence[str]) -> Set[str]:
+        nullable = set()
+        for field in ordering:
+            name = field.lstrip("-")
+            try:
+                if name != "pk" and model._meta.get_field(name).null:
+                    nullable.add(name)
+            except FieldDoesNotExist:
+                continue
+        return nullable
+
+    def _order_by(self, reverse: bool) -> List[Any]:
+        """Expressions de tri ; les ``NULL`` suivent les valeurs dans le sens ``next``."""
+
+        expressions: List[Any] = []
+        nulls = {"nulls_first" if reverse else "nulls_last": True}
+        for field in self.ordering:
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            if name not in self.nullable:
+                expressions.append(f"-{name}" if descending else name)
+            else:
+                expressions.append(F(name).desc(**nulls) if descending else F(name).asc(**nulls))
+        return expressions
+
+    def _beyond(self, values: List[Any], reverse: bool) -> Q:
+        """Positions strictement après ``values`` dans le sens de lecture."""
+
+        condition, equal = Q(pk__in=[]), Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            if value is None:
+                # Les ``NULL`` viennent en dernier : rien après eux en avançant,
+                # toutes les valeurs renseignées en reculant.
+                if reverse:
+                    condition |= equal & Q(**{f"{name}__isnull": False})
+                equal &= Q(**{f"{name}__isnull": True})
+                continue
+            lookup = "lt" if field.startswith("-") != reverse else "gt"
+            after = Q(**{f"{name}__{lookup}": value})
+            if name in self.nullable and not reverse:
+                after |= Q(**{f"{name}__isnull": True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.nullable = self._nullable_fields(queryset.model, self.ordering)
+        self.page_size_value = self.get_page_size(request)
+        self.count = None
+        if request.query_params.get(self.count_query_param, "1").lower() not in ("0", "false", "no"):
+            self.count = queryset.order_by().count()
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor[0])
+        if cursor:
+            queryset = queryset.filter(self._beyond(cursor[1], reverse))
+        rows = list(queryset.order_by(*self._order_by(reverse))[: self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[: self.page_size_value]
+        if reverse:
+            rows.reverse()
+        self.has_next = has_more if not reverse else True
+        self.has_previous = cursor is not None if not reverse else has_more
+        self.page = rows
+        return rows
+
+    def _link(self, instance, reverse: bool) -> str:
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(instance, reverse))
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Page précédente vide : on repart du début.
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        payload = OrderedDict()
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["next"] = self.get_next_link()
+        payload["previous"] = self.get_previous_link()
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {"name": name, "required": False, "in": "query", "description": description, "schema": {"type": kind}}
+            for name, kind, description in (
+                (self.cursor_query_param, "string", "Curseur de page (lien next/previous)."),
+                (self.page_size_query_param, "integer", f"Taille de page (max {self.max_page_size})."),
+                (self.count_query_param, "boolean", "Calculer le total (désactiver sur les grandes tables)."),
+            )
+        ]
@@ -3,8 +3,10 @@ from __future__ import annotations
 
 from rest_framework import serializers
 
-from dynamic_shop.inventory.models import Batch, Product, Supplier, Warehouse
-from dynamic_shop.sales.models import Customer, Order, OrderItem, Payment
+from dynamic_shop.core.models import BackgroundJob
+from dynamic_shop.inventory.models import Batch, CycleCount, Product, Supplier, Warehouse
+from dynamic_shop.sales.models import Customer, Order, OrderItem, OrderItemAllocation, Payment
+from dynamic_shop.sales.services import OrderItemData, create_order
 
 
 class WarehouseSerializer(serializers.ModelSerializer):
@@ -37,6 +39,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "remaining_stock",
             "reorder_level",
             "reorder_qty",
+            "lead_time_days",
             "is_active",
         ]
 
@@ -44,10 +47,30 @@ class ProductSerializer(serializers.ModelSerializer):
 class BatchSerializer(serializers.ModelSerializer):
     product = serializers.CharField(source="product.sku", read_only=True)
     warehouse = serializers.CharField(source="warehouse.name", read_only=True)
+    available_qty = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Batch
-        fields = ["id", "product", "batch_code", "expiry_date", "initial_qty", "remaining_qty", "warehouse"]
+        fields = [
+            "id",
+            "product",
+            "batch_code",
+            "expiry_date",
+            "initial_qty",
+            "remaining_qty",
+            "reserved_qty",
+            "available_qty",
+            "warehouse",
+        ]
+
+
+class CycleCountSerializer(serializers.ModelSerializer):
+    line_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = CycleCount
+        fields = ["id", "reference", "status", "created_at", "applied_at", "line_count"]
+        read_only_fields = ["status", "created_at", "applied_at"]
 
 
 class CustomerSerializer(serializers.ModelSerializer):
@@ -56,17 +79,27 @@ class CustomerSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "email", "phone", "address"]
 
 
+class OrderItemAllocationSerializer(serializers.ModelSerializer):
+    batch_code = serializers.CharField(source="batch.batch_code", read_only=True)
+
+    class Meta:
+        model = OrderItemAllocation
+        fields = ["batch", "batch_code", "quantity"]
+
+
 class OrderItemSerializer(serializers.ModelSerializer):
     product = serializers.SlugRelatedField(slug_field="sku", queryset=Product.objects.all())
+    allocations = OrderItemAllocationSerializer(many=True, read_only=True)
 
     class Meta:
         model = OrderItem
-        fields = ["id", "product", "quantity", "unit_price", "line_total", "batch"]
+        fields = ["id", "product", "quantity", "unit_price", "line_total", "batch", "allocations"]
         read_only_fields = ["line_total", "batch"]
 
 
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True)
+    balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     customer = serializers.PrimaryKeyRelatedField(queryset=Customer.objects.all())
     warehouse = serializers.PrimaryKeyRelatedField(queryset=Warehouse.objects.all())
 
@@ -79,25 +112,23 @@ class OrderSerializer(serializers.ModelSerializer):
             "warehouse",
             "status",
             "total_amount",
+            "paid_amount",
+            "balance",
             "created_at",
             "updated_at",
             "notes",
             "items",
         ]
-        read_only_fields = ["code", "status", "total_amount", "created_at", "updated_at"]
+        read_only_fields = ["code", "status", "total_amount", "paid_amount", "created_at", "updated_at"]
 
     def create(self, validated_data):
         items_data = validated_data.pop("items", [])
-        order = Order.objects.create(**validated_data)
-        for item in items_data:
-            OrderItem.objects.create(
-                order=order,
-                product=item["product"],
-                quantity=item["quantity"],
-                unit_price=item["unit_price"],
-            )
-        order.refresh_total()
-        return order
+        return create_order(
+            customer=validated_data["customer"],
+            warehouse=validated_data["warehouse"],
+            notes=validated_data.get("notes", ""),
+            items=[OrderItemData(item["product"], item["quantity"], item["unit_price"]) for item in items_data],
+        )
 
 
 class PaymentSerializer(serializers.ModelSerializer):
@@ -105,3 +136,10 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = ["id", "order", "amount", "method", "paid_at"]
         read_only_fields = ["paid_at"]
+
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BackgroundJob
+        fields = ["id", "name", "status", "result", "error", "created_at", "started_at", "finished_at"]
+        read_only_fields = fields
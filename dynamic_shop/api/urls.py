@@ -6,8 +6,11 @@ from rest_framework.routers import DefaultRouter
 from rest_framework.authtoken.views import obtain_auth_token
 
 from .viewsets import (
+    BackgroundJobViewSet,
     BatchViewSet,
     CustomerViewSet,
+    CycleCountViewSet,
+    ExportView,
     InventoryOperationViewSet,
     OrderViewSet,
     PaymentViewSet,
@@ -25,8 +28,11 @@ router.register(r"customers", CustomerViewSet, basename="customer")
 router.register(r"orders", OrderViewSet, basename="order")
 router.register(r"payments", PaymentViewSet, basename="payment")
 router.register(r"inventory", InventoryOperationViewSet, basename="inventory-ops")
+router.register(r"cycle-counts", CycleCountViewSet, basename="cycle-count")
+router.register(r"jobs", BackgroundJobViewSet, basename="job")
 
 urlpatterns = [
     path("", include(router.urls)),
     path("auth/token/", obtain_auth_token, name="api-token"),
+    path("exports/<slug:dataset>.<slug:fmt>", ExportView.as_view(), name="export"),
 ]
@@ -1,28 +1,57 @@
 """ViewSets REST pour DYNAMIC."""
 from __future__ import annotations
 
+import json
 from datetime import datetime
 
-from rest_framework import status, viewsets
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
+from rest_framework.views import APIView
 
-from dynamic_shop.inventory.models import Batch, Product, Supplier, Warehouse
+from dynamic_shop.core.jobs import enqueue
+from dynamic_shop.core.models import BackgroundJob
+from dynamic_shop.inventory.cycle_counts import apply_cycle_count, import_cycle_count, read_count_csv
+from dynamic_shop.inventory.history import stock_levels_at
+from dynamic_shop.inventory.models import Batch, CycleCount, Product, Supplier, Warehouse
 from dynamic_shop.inventory.services import (
-    PurchaseItem,
     adjust_stock,
+    purchase_items_from_payload,
     receive_purchase,
+    resolve_products,
     transfer_stock,
+    transfer_stock_bulk,
 )
+from dynamic_shop.inventory.tasks import apply_cycle_count_task, receive_purchase_task
+from dynamic_shop.sales.forecasting import compute_reorder_points
+from dynamic_shop.sales.imports import import_orders, read_csv, read_ndjson
 from dynamic_shop.sales.models import Customer, Order, Payment
-from dynamic_shop.sales.services import cancel_order, confirm_order, ship_order
+from dynamic_shop.sales.services import (
+    ORDER_TRANSITIONS,
+    cancel_order,
+    confirm_order,
+    ship_order,
+    ship_orders,
+    transition_orders,
+)
+from dynamic_shop.sales.tasks import compute_reorder_points_task, ship_orders_task, transition_orders_task
 
+from .conditional import ConditionalGetMixin
+from .exports import EXPORTS, FORMATS, stream_export
 from .filters import BatchFilter, OrderFilter, ProductFilter
 from .permissions import IsStaffOrReadOnly
 from .serializers import (
+    BackgroundJobSerializer,
     BatchSerializer,
     CustomerSerializer,
+    CycleCountSerializer,
     OrderSerializer,
     PaymentSerializer,
     ProductSerializer,
@@ -31,23 +60,80 @@ from .serializers import (
 )
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+# Nombre maximal de commandes par appel à ``orders/bulk-transition/``.
+BULK_TRANSITION_MAX = 1000
+
+
+def _wants_background(request) -> bool:
+    """``?async=1`` : l'opération est confiée à une tâche de fond."""
+
+    return request.query_params.get("async") in ("1", "true")
+
+
+def _accepted(request, job: BackgroundJob) -> Response:
+    """Réponse 202 indiquant où suivre l'avancement du job."""
+
+    url = reverse("job-detail", args=[job.pk], request=request)
+    return Response({"job": str(job.pk), "status": job.status, "url": url}, status=status.HTTP_202_ACCEPTED)
+
+
+class ProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Product.objects.select_related("brand", "category")
     serializer_class = ProductSerializer
+    version_related = ("brand", "category")
     permission_classes = [IsStaffOrReadOnly]
     filterset_class = ProductFilter
     search_fields = ["name", "sku", "flavor"]
     ordering_fields = ["name", "remaining_stock"]
 
+    @action(
+        detail=False,
+        methods=["get", "post"],
+        url_path="reorder-points",
+        permission_classes=[IsAuthenticated, IsStaffOrReadOnly],
+    )
+    def reorder_points(self, request):
+        """Seuils calculés depuis la demande : ``GET`` les propose, ``POST`` les enregistre."""
 
-class BatchViewSet(viewsets.ReadOnlyModelViewSet):
+        params = request.query_params if request.method == "GET" else request.data
+        try:
+            options = {
+                "history_days": int(params.get("history_days", 365)),
+                "window_days": int(params.get("window_days", 90)),
+                "service_level_z": float(params.get("service_level_z", 1.65)),
+                "cover_days": int(params.get("cover_days", 30)),
+            }
+            if request.method == "POST" and _wants_background(request):
+                return _accepted(request, enqueue(compute_reorder_points_task, user=request.user, **options))
+            suggestions = compute_reorder_points(**options, apply=request.method == "POST")
+        except (TypeError, ValueError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        rows = [
+            {
+                "sku": suggestion.sku,
+                "daily_demand": round(suggestion.daily_demand, 3),
+                "demand_std": round(suggestion.demand_std, 3),
+                "reorder_level": suggestion.reorder_level,
+                "reorder_qty": suggestion.reorder_qty,
+                "previous_level": suggestion.previous_level,
+                "previous_qty": suggestion.previous_qty,
+            }
+            for suggestion in suggestions
+            if suggestion.changed
+        ]
+        return Response({"applied": request.method == "POST", "results": rows})
+
+
+class BatchViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Batch.objects.select_related("product", "warehouse")
     serializer_class = BatchSerializer
+    version_related = ("product", "warehouse")
     filterset_class = BatchFilter
     permission_classes = [IsAuthenticated]
+    ordering_fields = ["received_at", "expiry_date", "batch_code", "remaining_qty", "reserved_qty"]
 
 
-class WarehouseViewSet(viewsets.ReadOnlyModelViewSet):
+class WarehouseViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Warehouse.objects.all()
     serializer_class = WarehouseSerializer
     permission_classes = [IsAuthenticated]
@@ -59,6 +145,55 @@ class SupplierViewSet(viewsets.ModelViewSet):
     permission_classes = [IsStaffOrReadOnly]
 
 
+class CycleCountViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """Inventaires tournants : création, import des comptages puis application."""
+
+    queryset = CycleCount.objects.annotate(line_count=Count("lines"))
+    serializer_class = CycleCountSerializer
+    permission_classes = [IsAuthenticated]
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=True, methods=["post"])
+    def upload(self, request, pk=None):  # type: ignore[override]
+        """Importe un fichier CSV (champ ``file``) ou une liste JSON ``lines``."""
+
+        session = self.get_object()
+        upload = request.FILES.get("file")
+        rows = read_count_csv(upload) if upload else request.data.get("lines", [])
+        try:
+            imported = import_cycle_count(session, rows)
+        except (KeyError, ValueError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"status": "imported", "lines": imported})
+
+    @action(detail=True, methods=["post"])
+    def apply(self, request, pk=None):  # type: ignore[override]
+        session = self.get_object()
+        if _wants_background(request):
+            job = enqueue(apply_cycle_count_task, session.pk, user_id=request.user.pk, user=request.user)
+            return _accepted(request, job)
+        try:
+            movements = apply_cycle_count(session, created_by=request.user)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as exc:
+            return Response({"detail": " ".join(exc.messages)}, status=status.HTTP_409_CONFLICT)
+        return Response({"status": "applied", "adjustments": len(movements)})
+
+
+class BackgroundJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Suivi des opérations longues lancées par l'utilisateur (tout le monde pour le staff)."""
+
+    serializer_class = BackgroundJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):  # type: ignore[override]
+        jobs = BackgroundJob.objects.all()
+        return jobs if self.request.user.is_staff else jobs.filter(created_by=self.request.user)
+
+
 class CustomerViewSet(viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
@@ -67,10 +202,11 @@ class CustomerViewSet(viewsets.ModelViewSet):
 
 
 class OrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.select_related("customer", "warehouse").prefetch_related("items")
+    queryset = Order.objects.select_related("customer", "warehouse").prefetch_related("items__allocations__batch")
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
     filterset_class = OrderFilter
+    ordering_fields = ["created_at", "code", "status", "customer", "total_amount"]
 
     @action(detail=True, methods=["post"], url_path="confirm")
     def confirm(self, request, pk=None):  # type: ignore[override]
@@ -92,6 +228,81 @@ class OrderViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(order)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["post"], url_path="ship-wave")
+    def ship_wave(self, request):
+        """Expédie une vague de commandes : ``{"orders": [id, ...]}``."""
+
+        try:
+            order_ids = [int(pk) for pk in request.data.get("orders", [])]
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "Liste d'identifiants de commande invalide."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if not order_ids:
+            return Response({"detail": "Aucune commande à expédier."}, status=status.HTTP_400_BAD_REQUEST)
+        if _wants_background(request):
+            job = enqueue(ship_orders_task, order_ids, user_id=request.user.pk, user=request.user)
+            return _accepted(request, job)
+        try:
+            shipped = ship_orders(order_ids, created_by=request.user)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as exc:
+            return Response({"detail": " ".join(exc.messages)}, status=status.HTTP_409_CONFLICT)
+        return Response({"status": "shipped", "orders": [order.code for order in shipped]})
+
+    @action(detail=False, methods=["post"], url_path="bulk-transition")
+    def bulk_transition(self, request):
+        """Change le statut d'un lot de commandes : ``{"orders": [id, ...], "status": "CONFIRMED"}``.
+
+        ``status`` vaut ``CONFIRMED``, ``SHIPPED`` ou ``CANCELLED`` ; la réponse
+        détaille le résultat de chaque commande.
+        """
+
+        target = request.data.get("status")
+        if target not in ORDER_TRANSITIONS:
+            detail = f"Statut cible invalide (attendu : {', '.join(ORDER_TRANSITIONS)})."
+            return Response({"detail": detail}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            order_ids = [int(pk) for pk in request.data.get("orders", [])]
+        except (TypeError, ValueError):
+            return Response(
+                {"detail": "Liste d'identifiants de commande invalide."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if not order_ids or len(order_ids) > BULK_TRANSITION_MAX:
+            return Response(
+                {"detail": f"Indiquez entre 1 et {BULK_TRANSITION_MAX} commandes."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if _wants_background(request):
+            job = enqueue(transition_orders_task, order_ids, target, user_id=request.user.pk, user=request.user)
+            return _accepted(request, job)
+        # Une seule tranche : le nombre de requêtes ne dépend pas du nombre de commandes.
+        result = transition_orders(order_ids, target, created_by=request.user, chunk_size=BULK_TRANSITION_MAX)
+        results = [{"order": order.code, "ok": True, "status": order.status} for order in result.done]
+        results += [{"order": code, "ok": False, "detail": reason} for code, reason in result.failures.items()]
+        return Response(
+            {"status": target, "done": len(result.done), "failed": len(result.failures), "results": results}
+        )
+
+    @action(detail=False, methods=["post"], url_path="import", url_name="import")
+    def bulk_import(self, request):
+        """Importe un fichier de commandes (champ ``file``, NDJSON ou ``.csv``) ; un résultat NDJSON par commande."""
+
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "Fichier de commandes manquant."}, status=status.HTTP_400_BAD_REQUEST)
+        is_csv = upload.name.lower().endswith(".csv") or upload.content_type in ("text/csv", "application/csv")
+        records = (read_csv if is_csv else read_ndjson)(upload)
+
+        def stream():
+            counts = {"created": 0, "error": 0}
+            for result in import_orders(records):
+                counts[result["status"]] += 1
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+            yield json.dumps({"summary": counts}) + "\n"
+
+        return StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+
     @action(detail=True, methods=["post"], url_path="cancel")
     def cancel(self, request, pk=None):  # type: ignore[override]
         order = self.get_object()
@@ -119,27 +330,19 @@ class InventoryOperationViewSet(viewsets.ViewSet):
         warehouse_id = data.get("warehouse")
         items = data.get("items", [])
         warehouse = Warehouse.objects.get(pk=warehouse_id)
-        purchase_items = []
-        for item in items:
-            expiry = item.get("expiry_date")
-            if expiry:
-                try:
-                    expiry = datetime.fromisoformat(expiry).date()  # type: ignore[assignment]
-                except ValueError:
-                    return Response(
-                        {"detail": "Format de date invalide (attendu YYYY-MM-DD)."},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-            purchase_items.append(
-                PurchaseItem(
-                    product=Product.objects.get(sku=item["sku"]),
-                    quantity=item["quantity"],
-                    batch_code=item.get("batch_code"),
-                    expiry_date=expiry,
-                )
+        try:
+            purchase_items = purchase_items_from_payload(items)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        if _wants_background(request):
+            job = enqueue(
+                receive_purchase_task, supplier, warehouse.pk, items, user_id=request.user.pk, user=request.user
             )
-        receive_purchase(supplier, purchase_items, warehouse, created_by=request.user)
-        return Response({"status": "ok"}, status=status.HTTP_201_CREATED)
+            return _accepted(request, job)
+        batches = receive_purchase(supplier, purchase_items, warehouse, created_by=request.user)
+        return Response(
+            {"status": "ok", "batches": len({batch.pk for batch in batches})}, status=status.HTTP_201_CREATED
+        )
 
     @action(detail=False, methods=["post"], url_path="transfer")
     def transfer(self, request):
@@ -159,6 +362,32 @@ class InventoryOperationViewSet(viewsets.ViewSet):
             return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         return Response({"status": "transferred"})
 
+    @action(detail=False, methods=["post"], url_path="transfer-order")
+    def transfer_order(self, request):
+        """Ordre de transfert multi-produits : ``lines`` = ``[{"sku", "quantity"}, ...]``."""
+
+        data = request.data
+        lines = data.get("lines", [])
+        from_wh = Warehouse.objects.get(pk=data["from_warehouse"])
+        to_wh = Warehouse.objects.get(pk=data["to_warehouse"])
+        try:
+            products = resolve_products(line["sku"] for line in lines)
+            quantities = [int(line["quantity"]) for line in lines]
+            if not lines or min(quantities) <= 0:
+                raise ValueError("Chaque ligne doit porter une quantité positive.")
+            movements = transfer_stock_bulk(
+                [(products[line["sku"]], quantity) for line, quantity in zip(lines, quantities)],
+                from_warehouse=from_wh,
+                to_warehouse=to_wh,
+                created_by=request.user,
+                reason=data.get("reason") or "Transfert entre entrepôts",
+            )
+        except (KeyError, ValueError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValidationError as exc:
+            return Response({"detail": " ".join(exc.messages)}, status=status.HTTP_409_CONFLICT)
+        return Response({"status": "transferred", "movements": len(movements)}, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=["post"], url_path="adjust")
     def adjust(self, request):
         data = request.data
@@ -175,3 +404,52 @@ class InventoryOperationViewSet(viewsets.ViewSet):
         except ValueError as exc:
             return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         return Response({"status": "adjusted"})
+
+    @action(detail=False, methods=["get"], url_path="stock-at")
+    def stock_at(self, request):
+        """Stock en fin de journée (``?date=YYYY-MM-DD``, filtres ``sku`` et ``warehouse``)."""
+
+        params = request.query_params
+        try:
+            day = datetime.fromisoformat(params["date"]).date()
+        except (KeyError, ValueError):
+            return Response(
+                {"detail": "Paramètre date requis (format YYYY-MM-DD)."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        product_ids = None
+        if params.get("sku"):
+            product_ids = list(Product.objects.filter(sku=params["sku"]).values_list("pk", flat=True))
+        warehouse = Warehouse.objects.get(pk=params["warehouse"]) if params.get("warehouse") else None
+        levels = stock_levels_at(day, product_ids=product_ids, warehouse=warehouse)
+        skus = dict(Product.objects.filter(pk__in={key[0] for key in levels}).values_list("pk", "sku"))
+        names = dict(Warehouse.objects.filter(pk__in={key[1] for key in levels}).values_list("pk", "name"))
+        rows = [
+            {"sku": skus[product_id], "warehouse": names[warehouse_id], "quantity": quantity}
+            for (product_id, warehouse_id), quantity in sorted(levels.items())
+            if quantity
+        ]
+        return Response({"date": day.isoformat(), "results": rows})
+
+
+class ExportView(APIView):
+    """Export en flux : ``GET /api/exports/<batches|movements|orders>.<csv|ndjson>``.
+
+    Les filtres des listes correspondantes s'appliquent (``?start_date=``…) ;
+    la réponse est compressée si le client accepte ``br`` ou ``gzip``.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, dataset: str, fmt: str):
+        if dataset not in EXPORTS or fmt not in FORMATS:
+            raise Http404("Export inconnu.")
+        filename = f"{dataset}-{timezone.localdate():%Y%m%d}.{fmt}"
+        return stream_export(
+            EXPORTS[dataset],
+            fmt,
+            request.query_params,
+            filename,
+            request.META.get("HTTP_ACCEPT_ENCODING", ""),
+            asynchronous=isinstance(request._request, ASGIRequest),
+        )
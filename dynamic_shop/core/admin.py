@@ -0,0 +1,27 @@
+"""Administration des modèles transverses."""
+from __future__ import annotations
+
+from django.contrib import admin
+
+from .models import BackgroundJob
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "created_by", "created_at", "finished_at")
+    list_filter = ("status", "name")
+    search_fields = ("=id", "name", "error")
+    readonly_fields = (
+        "id",
+        "name",
+        "status",
+        "result",
+        "error",
+        "created_by",
+        "created_at",
+        "started_at",
+        "finished_at",
+    )
+
+    def has_add_permission(self, request):  # type: ignore[override]
+        return False
@@ -0,0 +1,58 @@
+"""Exécution des opérations longues en tâche de fond avec suivi d'état.
+
+Une tâche déclarée avec :func:`job_task` reçoit en premier argument
+l'identifiant d'un :class:`~dynamic_shop.core.models.BackgroundJob` ; son statut,
+son résultat (sérialisable en JSON) ou son erreur y sont enregistrés. Les
+clients lancent l'opération via :func:`enqueue` puis interrogent ``/api/jobs/<id>/``.
+"""
+from __future__ import annotations
+
+import functools
+import logging
+from typing import Any, Callable, Optional
+
+from celery import shared_task
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+LOGGER = logging.getLogger(__name__)
+
+
+def job_task(func: Callable[..., Any]):
+    """Déclare une tâche Celery dont l'exécution est tracée dans ``BackgroundJob``.
+
+    ``job_id`` peut être ``None`` (tâche planifiée sans suivi). Les erreurs
+    métier (``ValueError``, ``ValidationError``) marquent le job en échec sans
+    relancer la tâche ; les autres exceptions sont en plus propagées à Celery.
+    """
+
+    @shared_task(name=f"{func.__module__}.{func.__name__}")
+    @functools.wraps(func)
+    def run(job_id: Optional[str], *args: Any, **kwargs: Any) -> Any:
+        jobs = BackgroundJob.objects.filter(pk=job_id) if job_id else BackgroundJob.objects.none()
+        jobs.update(status=BackgroundJob.Status.RUNNING, started_at=timezone.now())
+        try:
+            result = func(*args, **kwargs)
+        except (ValueError, ValidationError) as exc:
+            message = " ".join(exc.messages) if isinstance(exc, ValidationError) else str(exc)
+            jobs.update(status=BackgroundJob.Status.FAILED, error=message, finished_at=timezone.now())
+            return None
+        except Exception as exc:
+            LOGGER.exception("Échec de la tâche %s", func.__name__)
+            jobs.update(status=BackgroundJob.Status.FAILED, error=str(exc), finished_at=timezone.now())
+            raise
+        jobs.update(status=BackgroundJob.Status.SUCCEEDED, result=result, finished_at=timezone.now())
+        return result
+
+    return run
+
+
+def enqueue(task, *args: Any, user=None, **kwargs: Any) -> BackgroundJob:
+    """Crée un job et publie la tâche au commit de la transaction courante."""
+
+    job = BackgroundJob.objects.create(name=task.name.rsplit(".", 1)[-1], created_by=user)
+    transaction.on_commit(lambda: task.apply_async(args=(str(job.pk), *args), kwargs=kwargs), robust=True)
+    return job
@@ -0,0 +1,81 @@
+"""Modèles transverses du projet DYNAMIC."""
+from __future__ import annotations
+
+import uuid
+from typing import Dict, Iterable, Type
+
+from django.db import models
+
+
+class BackgroundJob(models.Model):
+    """Suivi d'une opération longue exécutée par une tâche Celery."""
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "En attente"
+        RUNNING = "RUNNING", "En cours"
+        SUCCEEDED = "SUCCEEDED", "Terminée"
+        FAILED = "FAILED", "En échec"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField("Tâche", max_length=120)
+    status = models.CharField("Statut", max_length=10, choices=Status.choices, default=Status.PENDING)
+    result = models.JSONField("Résultat", blank=True, null=True)
+    error = models.TextField("Erreur", blank=True)
+    created_by = models.ForeignKey(
+        "auth.User",
+        on_delete=models.SET_NULL,
+        related_name="background_jobs",
+        null=True,
+        blank=True,
+    )
+    created_at = models.DateTimeField("Créée le", auto_now_add=True)
+    started_at = models.DateTimeField("Démarrée le", blank=True, null=True)
+    finished_at = models.DateTimeField("Terminée le", blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Tâche de fond"
+        verbose_name_plural = "Tâches de fond"
+        ordering = ("-created_at",)
+        indexes = [models.Index(fields=["created_by", "created_at"], name="job_owner_created_idx")]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.name} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+
+class TableVersion(models.Model):
+    """Compteur de suppressions d'une table, pour l'empreinte des requêtes conditionnelles.
+
+    Insertions et modifications avancent déjà ``MAX(updated_at)`` ; seule une
+    suppression peut passer inaperçue, d'où ce compteur incrémenté par les
+    signaux ``post_delete``.
+    """
+
+    table = models.CharField("Table", max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField("Version", default=0)
+
+    class Meta:
+        verbose_name = "Version de table"
+        verbose_name_plural = "Versions de table"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.table} v{self.version}"
+
+    @classmethod
+    def bump(cls, model: Type[models.Model]) -> None:
+        """Incrémente le compteur de ``model`` dans la transaction en cours."""
+
+        label = model._meta.label_lower
+        if cls.objects.filter(table=label).update(version=models.F("version") + 1):
+            return
+        _, created = cls.objects.get_or_create(table=label, defaults={"version": 1})
+        if not created:
+            cls.objects.filter(table=label).update(version=models.F("version") + 1)
+
+    @classmethod
+    def versions(cls, tracked: Iterable[Type[models.Model]]) -> Dict[str, int]:
+        labels = [model._meta.label_lower for model in tracked]
+        return dict(cls.objects.filter(table__in=labels).values_list("table", "version"))
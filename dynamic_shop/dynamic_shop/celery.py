@@ -0,0 +1,18 @@
+"""Application Celery du projet DYNAMIC.
+
+Le broker est ``CELERY_BROKER_URL`` (Redis en production, worker lancé par
+``celery -A dynamic_shop.dynamic_shop worker``). Sans broker configuré, les tâches
+s'exécutent en mode *eager* dans le processus appelant, ce qui suffit
+pour les tests et le développement local.
+"""
+from __future__ import annotations
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "dynamic_shop.dynamic_shop.settings")
+
+app = Celery("dynamic_shop")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
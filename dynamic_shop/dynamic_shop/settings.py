@@ -131,6 +131,16 @@ else:
         }
     }
 
+# Celery : sans CELERY_BROKER_URL explicite, les tâches s'exécutent immédiatement (eager)
+# dans le processus appelant ; aucun worker n'est alors nécessaire.
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL or "memory://")
+CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "0" if os.getenv("CELERY_BROKER_URL") else "1") == "1"
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_SERIALIZER = "json"
+CELERY_ACCEPT_CONTENT = ["json"]
+CELERY_TASK_IGNORE_RESULT = True
+CELERY_TIMEZONE = os.getenv("TIME_ZONE", "Africa/Nairobi")
+
 # Base de données avec fallback SQLite.
 DATABASES: Dict[str, Any] = {
     "default": dj_database_url.config(
@@ -162,6 +172,13 @@ LOGOUT_REDIRECT_URL = "/admin/login/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Durée de vie des réservations de stock posées à la confirmation d'une commande.
+STOCK_RESERVATION_TTL_HOURS = int(os.getenv("STOCK_RESERVATION_TTL_HOURS", "72"))
+# Au-delà de ce nombre de commandes sélectionnées, les actions d'administration passent en tâche de fond.
+ORDER_ACTIONS_SYNC_LIMIT = int(os.getenv("ORDER_ACTIONS_SYNC_LIMIT", "200"))
+# Horizon au-delà duquel ``archive_stock_movements`` archive le journal des mouvements.
+STOCK_MOVEMENT_RETENTION_DAYS = int(os.getenv("STOCK_MOVEMENT_RETENTION_DAYS", "365"))
+
 # Configuration DRF générale.
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
@@ -176,6 +193,9 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ],
+    # Pagination par clé (curseur) sur des colonnes indexées : voir ``dynamic_shop.api.pagination``.
+    "DEFAULT_PAGINATION_CLASS": "dynamic_shop.api.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.openapi.AutoSchema",
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.UserRateThrottle",
@@ -6,7 +6,21 @@ from django.db.models import F
 from import_export import resources
 from import_export.admin import ImportExportModelAdmin
 
-from .models import Batch, Brand, Category, Product, StockMovement, Supplier, Warehouse
+from .models import (
+    Batch,
+    Brand,
+    Category,
+    CycleCount,
+    CycleCountLine,
+    Product,
+    ReorderAlert,
+    StockMovement,
+    StockMovementArchive,
+    StockReservation,
+    StockSnapshot,
+    Supplier,
+    Warehouse,
+)
 
 
 class ProductResource(resources.ModelResource):
@@ -24,6 +38,7 @@ class ProductResource(resources.ModelResource):
             "flavor",
             "reorder_level",
             "reorder_qty",
+            "lead_time_days",
             "remaining_stock",
             "is_active",
         )
@@ -85,6 +100,7 @@ class ProductAdmin(ImportExportModelAdmin):
                 "fields": (
                     "reorder_level",
                     "reorder_qty",
+                    "lead_time_days",
                     "remaining_stock",
                     "created_at",
                     "updated_at",
@@ -117,7 +133,7 @@ class BatchResource(resources.ModelResource):
 @admin.register(Batch)
 class BatchAdmin(ImportExportModelAdmin):
     resource_class = BatchResource
-    list_display = ("batch_code", "product", "warehouse", "remaining_qty", "expiry_date")
+    list_display = ("batch_code", "product", "warehouse", "remaining_qty", "reserved_qty", "expiry_date")
     list_filter = ("warehouse", "product__brand", "product__category")
     search_fields = ("batch_code", "product__name", "product__sku")
     date_hierarchy = "expiry_date"
@@ -137,6 +153,72 @@ class StockMovementAdmin(admin.ModelAdmin):
         return False
 
 
+@admin.register(StockMovementArchive)
+class StockMovementArchiveAdmin(admin.ModelAdmin):
+    list_display = ("movement_id", "movement_type", "product_id", "batch_id", "quantity", "created_at", "archived_at")
+    list_filter = ("movement_type",)
+    search_fields = ("=movement_id", "=product_id", "reason")
+    show_full_result_count = False
+
+    def has_add_permission(self, request):  # type: ignore[override]
+        return False
+
+    def has_change_permission(self, request, obj=None):  # type: ignore[override]
+        return False
+
+
+@admin.register(ReorderAlert)
+class ReorderAlertAdmin(admin.ModelAdmin):
+    list_display = ("product", "stock_level", "reorder_level", "triggered_at", "resolved_at")
+    list_filter = (("resolved_at", admin.EmptyFieldListFilter), "triggered_at")
+    search_fields = ("product__name", "product__sku")
+    readonly_fields = ("product", "stock_level", "reorder_level", "triggered_at", "resolved_at")
+
+    def has_add_permission(self, request):  # type: ignore[override]
+        return False
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ("reference", "batch", "quantity", "status", "expires_at", "created_at")
+    list_filter = ("status", "expires_at")
+    search_fields = ("reference", "batch__batch_code", "batch__product__sku")
+    readonly_fields = ("batch", "quantity", "reference", "status", "expires_at", "created_at", "closed_at")
+
+    def has_add_permission(self, request):  # type: ignore[override]
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("day", "product", "warehouse", "quantity")
+    list_filter = ("warehouse", "day")
+    search_fields = ("product__name", "product__sku")
+    date_hierarchy = "day"
+    readonly_fields = ("product", "warehouse", "day", "quantity")
+
+    def has_add_permission(self, request):  # type: ignore[override]
+        return False
+
+
+class CycleCountLineInline(admin.TabularInline):
+    model = CycleCountLine
+    extra = 0
+    fields = ("product", "warehouse", "batch_code", "counted_qty", "expected_qty")
+    readonly_fields = fields
+    can_delete = False
+    show_change_link = False
+
+
+@admin.register(CycleCount)
+class CycleCountAdmin(admin.ModelAdmin):
+    list_display = ("__str__", "status", "created_by", "created_at", "applied_at")
+    list_filter = ("status",)
+    search_fields = ("reference",)
+    readonly_fields = ("status", "created_by", "created_at", "applied_at")
+    inlines = [CycleCountLineInline]
+
+
 admin.site.site_header = "DYNAMIC Backoffice"
 admin.site.site_title = "DYNAMIC Admin"
 admin.site.index_title = "Tableau de bord"
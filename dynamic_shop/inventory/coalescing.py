@@ -0,0 +1,62 @@
+"""Regroupement, par transaction, des recalculs de stock et des alertes de seuil.
+
+Les deltas connus sont appliqués immédiatement par les services et signaux ; seuls
+les recalculs complets (delta inconnu) et l'évaluation des alertes sont différés
+et exécutés une seule fois par produit lors du ``transaction.on_commit`` du bloc
+atomique englobant.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional, Set
+
+from django.db import transaction
+
+
+class _PendingStockSync:
+    """Callback ``on_commit`` accumulant les produits à resynchroniser."""
+
+    def __init__(self) -> None:
+        self.stock_ids: Set[int] = set()
+        self.alert_ids: Set[int] = set()
+        self.flushed = False
+
+    def flush(self) -> None:
+        from .models import evaluate_reorder_alerts, update_products_stock
+
+        self.flushed = True
+        update_products_stock(self.stock_ids)
+        evaluate_reorder_alerts(self.stock_ids | self.alert_ids)
+
+
+def _schedule(stock_ids: Iterable[int], alert_ids: Iterable[int], using: Optional[str]) -> None:
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        pending = _PendingStockSync()
+        pending.stock_ids.update(stock_ids)
+        pending.alert_ids.update(alert_ids)
+        pending.flush()
+        return
+    # Un rollback (même partiel) retire le callback de la file : on ne réutilise
+    # donc que celui qui y figure encore.
+    for entry in connection.run_on_commit:
+        owner = getattr(entry[1], "__self__", None)
+        if isinstance(owner, _PendingStockSync) and not owner.flushed:
+            pending = owner
+            break
+    else:
+        pending = _PendingStockSync()
+        transaction.on_commit(pending.flush, using=using, robust=True)
+    pending.stock_ids.update(stock_ids)
+    pending.alert_ids.update(alert_ids)
+
+
+def mark_stock_dirty(product_ids: Iterable[int], using: Optional[str] = None) -> None:
+    """Demande un recalcul du stock agrégé (et des alertes) au commit."""
+
+    _schedule(product_ids, (), using)
+
+
+def mark_reorder_check(product_ids: Iterable[int], using: Optional[str] = None) -> None:
+    """Demande uniquement l'évaluation des alertes de seuil au commit."""
+
+    _schedule((), product_ids, using)
@@ -0,0 +1,177 @@
+"""Inventaires tournants : import des comptages et application des écarts en masse.
+
+Les comptages sont importés dans une :class:`CycleCount` (CSV ou JSON), puis
+appliqués en une transaction : les quantités des lots concernés sont lues en une
+requête, les écarts calculés en une passe et les ajustements enregistrés via
+:func:`~dynamic_shop.inventory.services.apply_movements_bulk`.
+"""
+from __future__ import annotations
+
+import csv
+import io
+from collections import defaultdict
+from typing import IO, Dict, Iterable, List, Mapping, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    FEFO_ORDERING,
+    Batch,
+    CycleCount,
+    CycleCountLine,
+    StockMovement,
+    Warehouse,
+    allocate_fefo,
+    case_by_pk,
+)
+from .services import apply_movements_bulk, generate_batch_code, resolve_products
+
+CountKey = Tuple[int, int, str]
+
+
+def read_count_csv(stream: IO[bytes]) -> List[Dict[str, str]]:
+    """Lit un fichier de comptage (colonnes ``sku``, ``warehouse``, ``batch_code``, ``counted_qty``)."""
+
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    return list(csv.DictReader(text))
+
+
+def _resolve_warehouses(references: Set[str]) -> Dict[str, Warehouse]:
+    """Associe les entrepôts désignés par identifiant ou par nom (une requête)."""
+
+    ids = {reference for reference in references if reference.isdigit()}
+    resolved: Dict[str, Warehouse] = {}
+    for warehouse in Warehouse.objects.filter(Q(pk__in=ids) | Q(name__in=references - ids)):
+        resolved[str(warehouse.pk)] = warehouse
+        resolved[warehouse.name] = warehouse
+    unknown = sorted(references - resolved.keys())
+    if unknown:
+        raise ValueError(f"Entrepôt(s) inconnu(s) : {', '.join(unknown)}.")
+    return resolved
+
+
+@transaction.atomic
+def import_cycle_count(session: CycleCount, rows: Iterable[Mapping[str, object]], batch_size: int = 2000) -> int:
+    """Enregistre des lignes de comptage ; un nouvel import d'une même ligne la remplace."""
+
+    if session.status != CycleCount.Status.OPEN:
+        raise ValueError("Cet inventaire a déjà été appliqué.")
+    rows = [{key: str(value if value is not None else "").strip() for key, value in row.items()} for row in rows]
+    products = resolve_products(row.get("sku", "") for row in rows)
+    warehouses = _resolve_warehouses({row.get("warehouse", "") for row in rows})
+
+    lines: Dict[CountKey, CycleCountLine] = {}
+    for number, row in enumerate(rows, start=1):
+        try:
+            counted = int(row.get("counted_qty") or row.get("quantity") or "")
+        except ValueError:
+            raise ValueError(f"Ligne {number} : quantité comptée invalide.") from None
+        if counted < 0:
+            raise ValueError(f"Ligne {number} : la quantité comptée doit être positive.")
+        product = products[row["sku"]]
+        warehouse = warehouses[row["warehouse"]]
+        code = row.get("batch_code", "")
+        lines[(product.pk, warehouse.pk, code)] = CycleCountLine(
+            session=session, product=product, warehouse=warehouse, batch_code=code, counted_qty=counted
+        )
+    CycleCountLine.objects.bulk_create(
+        lines.values(),
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["session", "product", "warehouse", "batch_code"],
+        update_fields=["counted_qty"],
+    )
+    return len(lines)
+
+
+@transaction.atomic
+def apply_cycle_count(session: CycleCount, created_by=None) -> List[StockMovement]:
+    """Calcule les écarts de comptage et les enregistre en ajustements groupés.
+
+    Une ligne avec code lot fixe la quantité de ce lot (créé s'il est absent). Une
+    ligne sans code lot fixe le stock du produit dans l'entrepôt : un manque est
+    prélevé en FEFO, un surplus rejoint le lot à la péremption la plus lointaine.
+    Les lots non comptés ne sont pas modifiés.
+    """
+
+    if session.status != CycleCount.Status.OPEN:
+        raise ValueError("Cet inventaire a déjà été appliqué.")
+    lines = list(session.lines.select_related("product"))
+    if not lines:
+        raise ValueError("Aucun comptage à appliquer.")
+    counted_products = {(line.product_id, line.warehouse_id) for line in lines if not line.batch_code}
+    if any(line.batch_code and (line.product_id, line.warehouse_id) in counted_products for line in lines):
+        raise ValueError("Un produit ne peut être compté à la fois par lot et globalement dans un même entrepôt.")
+
+    by_code: Dict[CountKey, Batch] = {}
+    by_product: Dict[Tuple[int, int], List[Batch]] = defaultdict(list)
+    for batch in Batch.objects.filter(
+        product_id__in={line.product_id for line in lines}, warehouse_id__in={line.warehouse_id for line in lines}
+    ).order_by(*FEFO_ORDERING):
+        by_code[(batch.product_id, batch.warehouse_id, batch.batch_code)] = batch
+        by_product[(batch.product_id, batch.warehouse_id)].append(batch)
+
+    adjustments: List[Tuple[Batch, int]] = []
+    missing: Dict[CountKey, Tuple[Batch, int]] = {}
+    for line in lines:
+        if line.batch_code:
+            key = (line.product_id, line.warehouse_id, line.batch_code)
+            batch = by_code.get(key)
+            line.expected_qty = batch.remaining_qty if batch else 0
+            if batch is not None:
+                adjustments.append((batch, line.counted_qty - line.expected_qty))
+            elif line.counted_qty:
+                missing[key] = (Batch(**_new_batch_fields(line, line.batch_code)), line.counted_qty)
+            continue
+        batches = by_product[(line.product_id, line.warehouse_id)]
+        line.expected_qty = sum(batch.remaining_qty for batch in batches)
+        delta = line.counted_qty - line.expected_qty
+        if delta < 0:
+            available = {batch.pk: batch.remaining_qty for batch in batches}
+            adjustments.extend((batch, -taken) for batch, taken in allocate_fefo(batches, -delta, available))
+        elif delta and batches:
+            adjustments.append((batches[-1], delta))
+        elif delta:
+            code = generate_batch_code(line.product)
+            missing[(line.product_id, line.warehouse_id, code)] = (Batch(**_new_batch_fields(line, code)), delta)
+
+    Batch.objects.bulk_create([batch for batch, _ in missing.values()])
+    adjustments.extend(missing.values())
+    reason = f"Inventaire tournant {session.reference or session.pk}"
+    movements = apply_movements_bulk(
+        [
+            StockMovement(
+                product_id=batch.product_id,
+                batch=batch,
+                movement_type=StockMovement.MovementType.ADJUSTMENT,
+                quantity=abs(delta),
+                to_warehouse_id=batch.warehouse_id if delta > 0 else None,
+                from_warehouse_id=None if delta > 0 else batch.warehouse_id,
+                reason=reason,
+                created_by=created_by,
+            )
+            for batch, delta in adjustments
+            if delta
+        ]
+    )
+    # ``bulk_update`` émettrait un ``WHEN`` par ligne : on regroupe par quantité théorique.
+    expected = {line.pk: line.expected_qty for line in lines}
+    for start in range(0, len(lines), 2000):
+        chunk = [line.pk for line in lines[start : start + 2000]]
+        CycleCountLine.objects.filter(pk__in=chunk).update(expected_qty=case_by_pk(expected, chunk))
+    session.status = CycleCount.Status.APPLIED
+    session.applied_at = timezone.now()
+    session.save(update_fields=["status", "applied_at"])
+    return movements
+
+
+def _new_batch_fields(line: CycleCountLine, code: str) -> Dict[str, object]:
+    return {
+        "product_id": line.product_id,
+        "warehouse_id": line.warehouse_id,
+        "batch_code": code,
+        "initial_qty": 0,
+        "remaining_qty": 0,
+    }
@@ -0,0 +1,278 @@
+"""Stock historique : instantanés journaliers et rejeu du journal des mouvements.
+
+Un mouvement entre dans l'entrepôt ``to_warehouse`` (à défaut celui du lot pour
+une entrée) et sort de ``from_warehouse`` ; un ajustement ne compte que dans le
+sens indiqué par l'entrepôt renseigné. Les instantanés sont construits de façon
+incrémentale par ``build_stock_snapshots`` : le stock à une date se lit alors sur
+le dernier instantané, complété par les seuls mouvements postérieurs.
+
+``archive_movements`` déplace les mouvements anciens vers
+:class:`StockMovementArchive` et les remplace par un solde d'ouverture par lot.
+Les instantanés couvrant déjà la période archivée, ces soldes sont ignorés par
+le rejeu.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Q, QuerySet, Subquery, Sum, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Batch, StockMovement, StockMovementArchive, StockSnapshot, Warehouse
+
+StockKey = Tuple[int, int]
+
+_INFLOW = (Q(to_warehouse__isnull=False) | Q(movement_type=StockMovement.MovementType.IN)) & ~Q(
+    movement_type=StockMovement.MovementType.OPENING
+)
+_OUTFLOW = (
+    Q(from_warehouse__isnull=False)
+    & ~Q(movement_type__in=[StockMovement.MovementType.IN, StockMovement.MovementType.OPENING])
+    & ~Q(movement_type=StockMovement.MovementType.ADJUSTMENT, to_warehouse__isnull=False)
+)
+# Sens d'un mouvement pour le lot qu'il référence (les transferts créditent en plus le lot de destination).
+_BATCH_DEBIT = Q(movement_type__in=[StockMovement.MovementType.OUT, StockMovement.MovementType.TRANSFER]) | Q(
+    movement_type__in=[StockMovement.MovementType.ADJUSTMENT, StockMovement.MovementType.OPENING],
+    to_warehouse__isnull=True,
+)
+_ARCHIVED_FIELDS = (
+    "pk",
+    "product_id",
+    "batch_id",
+    "movement_type",
+    "quantity",
+    "from_warehouse_id",
+    "to_warehouse_id",
+    "reason",
+    "created_at",
+    "created_by_id",
+)
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def daily_flows(movements: QuerySet) -> Dict[Tuple[int, int, date], int]:
+    """Agrège des mouvements en variations nettes par produit, entrepôt et jour (deux requêtes)."""
+
+    day = TruncDate("created_at", tzinfo=timezone.get_current_timezone())
+    flows: Dict[Tuple[int, int, date], int] = defaultdict(int)
+    for condition, warehouse, sign in (
+        (_INFLOW, Coalesce("to_warehouse_id", "batch__warehouse_id"), 1),
+        (_OUTFLOW, F("from_warehouse_id"), -1),
+    ):
+        rows = (
+            movements.filter(condition)
+            .annotate(wh=warehouse, day=day)
+            .values("product_id", "wh", "day")
+            .annotate(total=Sum("quantity"))
+            .values_list("product_id", "wh", "day", "total")
+            .order_by()
+        )
+        for product_id, warehouse_id, moved_on, total in rows:
+            flows[(product_id, warehouse_id, moved_on)] += sign * total
+    return flows
+
+
+def latest_snapshots(
+    day: date, product_ids: Optional[Iterable[int]] = None, warehouse: Optional[Warehouse] = None
+) -> Dict[StockKey, int]:
+    """Quantité du dernier instantané au plus tard à ``day`` pour chaque couple produit/entrepôt."""
+
+    latest = StockSnapshot.objects.filter(
+        product=OuterRef("product"), warehouse=OuterRef("warehouse"), day__lte=day
+    ).order_by("-day")
+    qs = StockSnapshot.objects.filter(day__lte=day, pk=Subquery(latest.values("pk")[:1]))
+    if product_ids is not None:
+        qs = qs.filter(product_id__in=list(product_ids))
+    if warehouse is not None:
+        qs = qs.filter(warehouse=warehouse)
+    rows = qs.values_list("product_id", "warehouse_id", "quantity")
+    return {(product_id, warehouse_id): quantity for product_id, warehouse_id, quantity in rows}
+
+
+@transaction.atomic
+def build_stock_snapshots(until: Optional[date] = None, batch_size: int = 1000) -> int:
+    """Complète les instantanés jusqu'à ``until`` (la veille par défaut).
+
+    Seuls les mouvements postérieurs au dernier jour déjà instantané sont lus ;
+    la commande peut donc être relancée chaque nuit à coût constant.
+    """
+
+    until = until or timezone.localdate() - timedelta(days=1)
+    last_day = StockSnapshot.objects.aggregate(last=Max("day"))["last"]
+    if last_day is not None and last_day >= until:
+        return 0
+    movements = StockMovement.objects.filter(created_at__lt=_day_start(until + timedelta(days=1)))
+    if last_day is not None:
+        movements = movements.filter(created_at__gte=_day_start(last_day + timedelta(days=1)))
+    flows = daily_flows(movements)
+    if not flows:
+        return 0
+
+    balances: Dict[StockKey, int] = defaultdict(int)
+    if last_day is not None:
+        balances.update(latest_snapshots(last_day, product_ids={key[0] for key in flows}))
+    snapshots = []
+    for (product_id, warehouse_id, day), delta in sorted(flows.items(), key=lambda item: item[0][2]):
+        balances[(product_id, warehouse_id)] += delta
+        snapshots.append(
+            StockSnapshot(
+                product_id=product_id, warehouse_id=warehouse_id, day=day, quantity=balances[(product_id, warehouse_id)]
+            )
+        )
+    StockSnapshot.objects.bulk_create(snapshots, batch_size=batch_size)
+    return len(snapshots)
+
+
+def stock_levels_at(
+    day: date, product_ids: Optional[Iterable[int]] = None, warehouse: Optional[Warehouse] = None
+) -> Dict[StockKey, int]:
+    """Stock en fin de journée ``day`` par couple ``(produit, entrepôt)``.
+
+    Le point de départ est le dernier instantané ; seuls les mouvements compris
+    entre le dernier jour instantané et ``day`` sont rejoués.
+    """
+
+    if product_ids is not None:
+        product_ids = list(product_ids)
+    last_day = StockSnapshot.objects.filter(day__lte=day).aggregate(last=Max("day"))["last"]
+    levels: Dict[StockKey, int] = defaultdict(int)
+    movements = StockMovement.objects.filter(created_at__lt=_day_start(day + timedelta(days=1)))
+    if last_day is not None:
+        levels.update(latest_snapshots(last_day, product_ids, warehouse))
+        movements = movements.filter(created_at__gte=_day_start(last_day + timedelta(days=1)))
+    if product_ids is not None:
+        movements = movements.filter(product_id__in=product_ids)
+    if warehouse is not None:
+        movements = movements.filter(
+            Q(to_warehouse=warehouse)
+            | Q(from_warehouse=warehouse)
+            | Q(to_warehouse__isnull=True, batch__warehouse=warehouse)
+        )
+    for (product_id, warehouse_id, _), delta in daily_flows(movements).items():
+        if warehouse is None or warehouse_id == warehouse.pk:
+            levels[(product_id, warehouse_id)] += delta
+    return dict(levels)
+
+
+def stock_at(product_id: int, warehouse: Warehouse, day: date) -> int:
+    """Stock d'un produit dans un entrepôt en fin de journée ``day``."""
+
+    return stock_levels_at(day, product_ids=[product_id], warehouse=warehouse).get((product_id, warehouse.pk), 0)
+
+
+@dataclass
+class ArchiveReport:
+    """Bilan d'un passage d'archivage."""
+
+    archived: int = 0
+    openings: int = 0
+    products: int = 0
+
+
+def archive_movements(before: date, products_per_chunk: int = 200, batch_size: int = 2000) -> ArchiveReport:
+    """Archive les mouvements antérieurs au jour ``before`` par tranches de produits.
+
+    Les instantanés sont d'abord complétés jusqu'à la veille de ``before``. Chaque
+    tranche est traitée dans sa propre transaction : ses mouvements sont copiés
+    en flux vers :class:`StockMovementArchive`, remplacés par un solde
+    d'ouverture par lot (daté du début de ``before``) puis supprimés. Une
+    tranche terminée n'a plus de mouvement antérieur à la date butoir : une
+    exécution interrompue reprend donc là où elle s'est arrêtée.
+    """
+
+    cutoff = _day_start(before)
+    build_stock_snapshots(until=before - timedelta(days=1))
+    report = ArchiveReport()
+    while True:
+        product_ids = list(
+            StockMovement.objects.filter(created_at__lt=cutoff)
+            .order_by("product_id")
+            .values_list("product_id", flat=True)
+            .distinct()[:products_per_chunk]
+        )
+        if not product_ids:
+            return report
+        archived, openings = _archive_products(product_ids, cutoff, batch_size)
+        report.archived += archived
+        report.openings += openings
+        report.products += len(product_ids)
+
+
+@transaction.atomic
+def _archive_products(product_ids: List[int], cutoff: datetime, batch_size: int) -> Tuple[int, int]:
+    movements = StockMovement.objects.filter(product_id__in=product_ids, created_at__lt=cutoff)
+    balances = _batch_balances(movements)
+
+    archived = 0
+    chunk: List[StockMovementArchive] = []
+    for row in movements.order_by("pk").values_list(*_ARCHIVED_FIELDS).iterator(chunk_size=batch_size):
+        chunk.append(StockMovementArchive(movement_id=row[0], **dict(zip(_ARCHIVED_FIELDS[1:], row[1:]))))
+        if len(chunk) == batch_size:
+            archived += len(StockMovementArchive.objects.bulk_create(chunk, ignore_conflicts=True))
+            chunk = []
+    archived += len(StockMovementArchive.objects.bulk_create(chunk, ignore_conflicts=True))
+    movements.delete()
+
+    openings = []
+    for batch in Batch.objects.filter(pk__in=[pk for pk, balance in balances.items() if balance]).only(
+        "pk", "product_id", "warehouse_id"
+    ):
+        balance = balances[batch.pk]
+        openings.append(
+            StockMovement(
+                product_id=batch.product_id,
+                batch=batch,
+                movement_type=StockMovement.MovementType.OPENING,
+                quantity=abs(balance),
+                to_warehouse_id=batch.warehouse_id if balance > 0 else None,
+                from_warehouse_id=None if balance > 0 else batch.warehouse_id,
+                reason="Solde d'ouverture (archivage)",
+            )
+        )
+    created = StockMovement.objects.bulk_create(openings, batch_size=batch_size)
+    # ``auto_now_add`` impose la date courante : le solde est recalé sur la date butoir.
+    StockMovement.objects.filter(pk__in=[movement.pk for movement in created]).update(created_at=cutoff)
+    return archived, len(created)
+
+
+def _batch_balances(movements: QuerySet) -> Dict[int, int]:
+    """Effet net de mouvements sur chaque lot, lots de destination des transferts compris."""
+
+    signed = Case(When(_BATCH_DEBIT, then=-F("quantity")), default=F("quantity"), output_field=IntegerField())
+    balances: Dict[int, int] = defaultdict(int)
+    for batch_id, total in (
+        movements.filter(batch__isnull=False)
+        .values("batch_id")
+        .annotate(total=Sum(signed))
+        .values_list("batch_id", "total")
+        .order_by()
+    ):
+        balances[batch_id] += total
+
+    transfers = list(
+        movements.filter(movement_type=StockMovement.MovementType.TRANSFER, batch__isnull=False)
+        .values("product_id", "batch__batch_code", "to_warehouse_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "batch__batch_code", "to_warehouse_id", "total")
+        .order_by()
+    )
+    if transfers:
+        destinations = {
+            (product_id, code, warehouse_id): pk
+            for pk, product_id, code, warehouse_id in Batch.objects.filter(
+                product_id__in={row[0] for row in transfers}, batch_code__in={row[1] for row in transfers}
+            ).values_list("pk", "product_id", "batch_code", "warehouse_id")
+        }
+        for product_id, code, warehouse_id, total in transfers:
+            destination = destinations.get((product_id, code, warehouse_id))
+            if destination is not None:
+                balances[destination] += total
+    return balances
@@ -0,0 +1,38 @@
+"""Archive les mouvements de stock anciens et les remplace par des soldes d'ouverture."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from dynamic_shop.inventory.history import archive_movements
+
+
+class Command(BaseCommand):
+    help = (
+        "Déplace les mouvements plus anciens que l'horizon de rétention vers l'archive "
+        "(un solde d'ouverture par lot). Reprise possible après interruption."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.STOCK_MOVEMENT_RETENTION_DAYS,
+            help="Horizon de rétention en jours (défaut : STOCK_MOVEMENT_RETENTION_DAYS).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=200, help="Produits traités par transaction.")
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("L'horizon de rétention doit être d'au moins un jour.")
+        before = timezone.localdate() - timedelta(days=options["days"])
+        report = archive_movements(before, products_per_chunk=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report.archived} mouvement(s) archivé(s) avant le {before:%d/%m/%Y} "
+                f"sur {report.products} produit(s), {report.openings} solde(s) d'ouverture."
+            )
+        )
@@ -0,0 +1,147 @@
+"""Mesure les plans d'exécution des requêtes chaudes sur un jeu de lots massif.
+
+Les données sont générées dans une transaction annulée en fin de commande : la
+base n'est pas modifiée. Les requêtes sont d'abord mesurées avec les index de
+``0003_hot_path_indexes`` puis après leur suppression (dans la même transaction,
+donc annulée elle aussi) afin de comparer les plans. ``--keep`` conserve les
+données générées et ne mesure que la configuration indexée.
+"""
+from __future__ import annotations
+
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Callable, List, Tuple
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F, QuerySet
+from django.utils import timezone
+
+from dynamic_shop.inventory.models import FEFO_ORDERING, Batch, Brand, Category, Product, Warehouse
+
+HOT_PATH_INDEXES = ("batch_fefo_available_idx", "batch_expiry_idx", "product_barcode_idx")
+
+
+class _Rollback(Exception):
+    """Annule la transaction de benchmark."""
+
+
+class Command(BaseCommand):
+    help = "Compare les plans des requêtes de sélection de lots avec et sans les index dédiés."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batches", type=int, default=1_000_000, help="Nombre de lots générés.")
+        parser.add_argument("--products", type=int, default=2_000, help="Nombre de produits générés.")
+        parser.add_argument("--warehouses", type=int, default=5, help="Nombre d'entrepôts générés.")
+        parser.add_argument("--runs", type=int, default=20, help="Exécutions par requête pour la médiane.")
+        parser.add_argument("--keep", action="store_true", help="Conserve les données générées.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                products, warehouses = self._seed(options)
+                queries = self._queries(products, warehouses)
+                self._report("Avec index", queries, options["runs"])
+                if options["keep"]:
+                    self.stdout.write(self.style.SUCCESS("Données de benchmark conservées."))
+                    return
+                self._drop_indexes()
+                self._report("Sans index", queries, options["runs"])
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS("Données de benchmark annulées."))
+
+    def _seed(self, options) -> Tuple[List[Product], List[Warehouse]]:
+        brand, _ = Brand.objects.get_or_create(name="BENCH")
+        category, _ = Category.objects.get_or_create(name="Benchmark")
+        warehouses = Warehouse.objects.bulk_create(
+            [Warehouse(name=f"BENCH-WH-{i}") for i in range(options["warehouses"])]
+        )
+        products = Product.objects.bulk_create(
+            [
+                Product(
+                    sku=f"BENCH-{i:06d}",
+                    barcode=f"99{i:011d}",
+                    name=f"Bench {i}",
+                    brand=brand,
+                    category=category,
+                    unit="canette",
+                    size_ml=250,
+                    flavor="Bench",
+                )
+                for i in range(options["products"])
+            ],
+            batch_size=5_000,
+        )
+        rng = random.Random(42)
+        today = date.today()
+        chunk: List[Batch] = []
+        for i in range(options["batches"]):
+            initial = rng.randint(1, 500)
+            chunk.append(
+                Batch(
+                    product=products[i % len(products)],
+                    warehouse=warehouses[rng.randrange(len(warehouses))],
+                    batch_code=f"BENCH-{i}",
+                    expiry_date=None if rng.random() < 0.1 else today + timedelta(days=rng.randint(-60, 720)),
+                    initial_qty=initial,
+                    # Environ 80 % des lots historiques sont épuisés.
+                    remaining_qty=0 if rng.random() < 0.8 else rng.randint(1, initial),
+                    received_at=today - timedelta(days=rng.randint(0, 720)),
+                )
+            )
+            if len(chunk) == 10_000:
+                Batch.objects.bulk_create(chunk)
+                chunk = []
+        Batch.objects.bulk_create(chunk)
+        self._analyze()
+        self.stdout.write(f"{options['batches']} lots générés sur {len(products)} produits.")
+        return products, warehouses
+
+    def _queries(self, products: List[Product], warehouses: List[Warehouse]) -> List[Tuple[str, Callable[[], QuerySet]]]:
+        rng = random.Random(7)
+        limit = timezone.now().date() + timedelta(days=30)
+
+        def pick() -> QuerySet:
+            product = rng.choice(products)
+            return (
+                Batch.objects.filter(
+                    product=product,
+                    warehouse=rng.choice(warehouses),
+                    remaining_qty__gt=0,
+                    remaining_qty__gte=F("reserved_qty") + 5,
+                )
+                .order_by(*FEFO_ORDERING)[:1]
+            )
+
+        return [
+            ("pick_batch (FEFO)", pick),
+            ("rapport péremption", lambda: Batch.objects.filter(expiry_date__isnull=False, expiry_date__lte=limit)[:50]),
+            ("recherche code barre", lambda: Product.objects.filter(barcode=rng.choice(products).barcode)),
+        ]
+
+    def _report(self, title: str, queries, runs: int) -> None:
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for label, build in queries:
+            self.stdout.write(self.style.MIGRATE_LABEL(f"  {label}"))
+            for line in build().explain().splitlines():
+                self.stdout.write(f"    {line}")
+            timings = []
+            for _ in range(runs):
+                queryset = build()
+                start = time.perf_counter()
+                list(queryset)
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(f"    médiane : {statistics.median(timings):.2f} ms")
+
+    def _drop_indexes(self) -> None:
+        with connection.cursor() as cursor:
+            for name in HOT_PATH_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {connection.ops.quote_name(name)}")
+        self._analyze()
+
+    def _analyze(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
@@ -0,0 +1,25 @@
+"""Construit les instantanés journaliers de stock à partir du journal des mouvements."""
+from __future__ import annotations
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dynamic_shop.inventory.history import build_stock_snapshots
+
+
+class Command(BaseCommand):
+    help = "Complète StockSnapshot jusqu'à la veille (ou --until) en ne lisant que les nouveaux mouvements."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--until", help="Dernier jour à instantaner (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        until = None
+        if options["until"]:
+            try:
+                until = date.fromisoformat(options["until"])
+            except ValueError as exc:
+                raise CommandError("Format de date invalide (attendu YYYY-MM-DD).") from exc
+        created = build_stock_snapshots(until=until)
+        self.stdout.write(self.style.SUCCESS(f"{created} instantané(s) de stock créé(s)."))
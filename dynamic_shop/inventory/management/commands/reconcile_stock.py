@@ -0,0 +1,32 @@
+"""Recalcule le stock agrégé des produits et signale les écarts."""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from dynamic_shop.inventory.services import reconcile_product_stock
+
+
+class Command(BaseCommand):
+    help = "Recalcule Product.remaining_stock à partir des lots et signale les écarts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Affiche les écarts sans corriger les stocks.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        drifts = reconcile_product_stock(fix=not dry_run)
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS("Aucun écart de stock détecté."))
+            return
+        for drift in drifts:
+            self.stdout.write(
+                f"{drift.sku} : enregistré {drift.recorded}, lots {drift.actual} (écart {drift.delta:+d})"
+            )
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"{len(drifts)} produit(s) en écart (aucune correction)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(drifts)} produit(s) corrigé(s)."))
@@ -0,0 +1,17 @@
+"""Libère les réservations de stock arrivées à expiration."""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from dynamic_shop.inventory.services import sweep_expired_reservations
+
+
+class Command(BaseCommand):
+    help = "Libère en masse les réservations de stock expirées (à planifier régulièrement)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Réservations traitées par transaction.")
+
+    def handle(self, *args, **options):
+        expired = sweep_expired_reservations(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"{expired} réservation(s) expirée(s) libérée(s)."))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-16 20:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReorderAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock_level', models.PositiveIntegerField(verbose_name='Stock au déclenchement')),
+                ('reorder_level', models.PositiveIntegerField(verbose_name='Seuil au déclenchement')),
+                ('triggered_at', models.DateTimeField(auto_now_add=True, verbose_name='Déclenchée le')),
+                ('resolved_at', models.DateTimeField(blank=True, null=True, verbose_name='Résolue le')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reorder_alerts', to='inventory.product')),
+            ],
+            options={
+                'verbose_name': 'Alerte de réapprovisionnement',
+                'verbose_name_plural': 'Alertes de réapprovisionnement',
+                'ordering': ('-triggered_at',),
+                'constraints': [models.UniqueConstraint(condition=models.Q(('resolved_at__isnull', True)), fields=('product',), name='unique_open_reorder_alert')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-16 21:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='batch',
+            name='reserved_qty',
+            field=models.PositiveIntegerField(default=0, verbose_name='Quantité réservée'),
+        ),
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantité')),
+                ('reference', models.CharField(blank=True, max_length=64, verbose_name='Référence')),
+                ('status', models.CharField(choices=[('ACTIVE', 'Active'), ('CONSUMED', 'Consommée'), ('RELEASED', 'Libérée'), ('EXPIRED', 'Expirée')], default='ACTIVE', max_length=10, verbose_name='Statut')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Expire le')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créée le')),
+                ('closed_at', models.DateTimeField(blank=True, null=True, verbose_name='Clôturée le')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='inventory.batch')),
+            ],
+            options={
+                'verbose_name': 'Réservation de stock',
+                'verbose_name_plural': 'Réservations de stock',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['expires_at'], name='reservation_active_expiry_idx')],
+            },
+        ),
+    ]
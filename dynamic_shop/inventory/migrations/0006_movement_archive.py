@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-16 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_stock_snapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stockmovement',
+            name='movement_type',
+            field=models.CharField(choices=[('IN', 'Entrée'), ('OUT', 'Sortie'), ('TRANSFER', 'Transfert'), ('ADJUSTMENT', 'Ajustement'), ('OPENING', "Solde d'ouverture")], max_length=20, verbose_name='Type'),
+        ),
+        migrations.CreateModel(
+            name='StockMovementArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_id', models.BigIntegerField(unique=True, verbose_name="Mouvement d'origine")),
+                ('product_id', models.BigIntegerField(verbose_name='Produit')),
+                ('batch_id', models.BigIntegerField(blank=True, null=True, verbose_name='Lot')),
+                ('movement_type', models.CharField(choices=[('IN', 'Entrée'), ('OUT', 'Sortie'), ('TRANSFER', 'Transfert'), ('ADJUSTMENT', 'Ajustement'), ('OPENING', "Solde d'ouverture")], max_length=20, verbose_name='Type')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantité')),
+                ('from_warehouse_id', models.BigIntegerField(blank=True, null=True, verbose_name="Entrepôt d'origine")),
+                ('to_warehouse_id', models.BigIntegerField(blank=True, null=True, verbose_name='Entrepôt de destination')),
+                ('reason', models.CharField(blank=True, max_length=255, verbose_name='Motif')),
+                ('created_at', models.DateTimeField(verbose_name='Créé le')),
+                ('created_by_id', models.BigIntegerField(blank=True, null=True, verbose_name='Auteur')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archivé le')),
+            ],
+            options={
+                'verbose_name': 'Mouvement archivé',
+                'verbose_name_plural': 'Mouvements archivés',
+                'ordering': ('-created_at',),
+                'indexes': [models.Index(fields=['product_id', 'created_at'], name='archive_product_created_idx')],
+            },
+        ),
+    ]
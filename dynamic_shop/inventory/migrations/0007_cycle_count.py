@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-16 21:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_movement_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CycleCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(blank=True, max_length=64, verbose_name='Référence')),
+                ('status', models.CharField(choices=[('OPEN', 'Ouverte'), ('APPLIED', 'Appliquée')], default='OPEN', max_length=10, verbose_name='Statut')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créée le')),
+                ('applied_at', models.DateTimeField(blank=True, null=True, verbose_name='Appliquée le')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cycle_counts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Inventaire tournant',
+                'verbose_name_plural': 'Inventaires tournants',
+                'ordering': ('-created_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='CycleCountLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('batch_code', models.CharField(blank=True, max_length=100, verbose_name='Code lot')),
+                ('counted_qty', models.PositiveIntegerField(verbose_name='Quantité comptée')),
+                ('expected_qty', models.PositiveIntegerField(blank=True, null=True, verbose_name='Quantité théorique')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cycle_count_lines', to='inventory.product')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='inventory.cyclecount')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='cycle_count_lines', to='inventory.warehouse')),
+            ],
+            options={
+                'verbose_name': "Ligne d'inventaire",
+                'verbose_name_plural': "Lignes d'inventaire",
+                'constraints': [models.UniqueConstraint(fields=('session', 'product', 'warehouse', 'batch_code'), name='unique_cycle_count_line')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_cycle_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='lead_time_days',
+            field=models.PositiveIntegerField(default=7, help_text="Utilisé pour le calcul automatique du seuil d'alerte.", verbose_name='Délai de réapprovisionnement (jours)'),
+        ),
+    ]
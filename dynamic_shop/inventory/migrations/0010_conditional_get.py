@@ -0,0 +1,32 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("inventory", "0009_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="batch",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name="Mis à jour le"),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="warehouse",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name="Mis à jour le"),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="batch",
+            index=models.Index(fields=["updated_at"], name="batch_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["updated_at"], name="product_updated_idx"),
+        ),
+    ]
@@ -1,19 +1,29 @@
 """Modèles liés à la gestion des stocks pour DYNAMIC."""
 from __future__ import annotations
 
+import logging
+from collections import defaultdict
 from datetime import date
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
+LOGGER = logging.getLogger(__name__)
+
+
+class InsufficientStockError(ValidationError):
+    """Décrément refusé : le lot ne dispose plus de la quantité demandée."""
+
 
 class Brand(models.Model):
     """Marque commerciale, par défaut DYNAMIC."""
 
     name = models.CharField("Nom", max_length=100, unique=True)
     description = models.TextField("Description", blank=True)
+    updated_at = models.DateTimeField("Mis à jour le", auto_now=True)
 
     class Meta:
         verbose_name = "Marque"
@@ -28,6 +38,7 @@ class Category(models.Model):
 
     name = models.CharField("Nom", max_length=120)
     description = models.TextField("Description", blank=True)
+    updated_at = models.DateTimeField("Mis à jour le", auto_now=True)
 
     class Meta:
         verbose_name = "Catégorie"
@@ -44,6 +55,7 @@ class Warehouse(models.Model):
     name = models.CharField("Nom", max_length=120, unique=True)
     address = models.CharField("Adresse", max_length=255, blank=True)
     description = models.TextField("Description", blank=True)
+    updated_at = models.DateTimeField("Mis à jour le", auto_now=True)
 
     class Meta:
         verbose_name = "Entrepôt"
@@ -86,6 +98,11 @@ class Product(models.Model):
     is_active = models.BooleanField("Actif", default=True)
     reorder_level = models.PositiveIntegerField("Seuil d'alerte", default=0)
     reorder_qty = models.PositiveIntegerField("Quantité de réapprovisionnement", default=0)
+    lead_time_days = models.PositiveIntegerField(
+        "Délai de réapprovisionnement (jours)",
+        default=7,
+        help_text="Utilisé pour le calcul automatique du seuil d'alerte.",
+    )
     remaining_stock = models.PositiveIntegerField("Stock disponible", default=0)
     created_at = models.DateTimeField("Créé le", auto_now_add=True)
     updated_at = models.DateTimeField("Mis à jour le", auto_now=True)
@@ -94,6 +111,13 @@ class Product(models.Model):
         verbose_name = "Produit"
         verbose_name_plural = "Produits"
         ordering = ("name",)
+        indexes = [
+            models.Index(fields=["barcode"], name="product_barcode_idx"),
+            # Pagination par clé de l'API (``name, id``).
+            models.Index(fields=["name", "id"], name="product_name_idx"),
+            # Empreinte de version des requêtes conditionnelles (``MAX(updated_at)``).
+            models.Index(fields=["updated_at"], name="product_updated_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.name} ({self.sku})"
@@ -113,8 +137,11 @@ class Batch(models.Model):
     expiry_date = models.DateField("Date de péremption", blank=True, null=True)
     initial_qty = models.PositiveIntegerField("Quantité initiale")
     remaining_qty = models.PositiveIntegerField("Quantité restante")
+    reserved_qty = models.PositiveIntegerField("Quantité réservée", default=0)
     warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name="batches")
     received_at = models.DateField("Date de réception", default=date.today)
+    # Tenu à jour par toutes les écritures de quantités (y compris les ``UPDATE`` groupés).
+    updated_at = models.DateTimeField("Mis à jour le", auto_now=True)
 
     class Meta:
         verbose_name = "Lot"
@@ -125,11 +152,65 @@ class Batch(models.Model):
                 name="unique_batch_per_product_warehouse",
             )
         ]
+        indexes = [
+            # Sélection FEFO : partiel sur les lots non vides lorsque le moteur le permet.
+            models.Index(
+                fields=["product", "warehouse", "expiry_date", "received_at"],
+                condition=models.Q(remaining_qty__gt=0),
+                name="batch_fefo_available_idx",
+            ),
+            models.Index(
+                fields=["expiry_date"],
+                condition=models.Q(expiry_date__isnull=False),
+                name="batch_expiry_idx",
+            ),
+            # Pagination par clé de l'API (``-received_at, -id``).
+            models.Index(fields=["received_at", "id"], name="batch_received_idx"),
+            # Empreinte de version des requêtes conditionnelles (``MAX(updated_at)``).
+            models.Index(fields=["updated_at"], name="batch_updated_idx"),
+        ]
         ordering = ("-received_at",)
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.product.name} - {self.batch_code}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):  # type: ignore[override]
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_remaining_qty = instance.__dict__.get("remaining_qty")
+        instance._loaded_product_id = instance.__dict__.get("product_id")
+        return instance
+
+    def shift_quantities(self, remaining: int, initial: int = 0, **fields: object) -> None:
+        """Applique un delta atomique (``F()``) sur les quantités du lot.
+
+        Un delta négatif est appliqué par un ``UPDATE`` conditionnel
+        (``WHERE remaining_qty - reserved_qty >= n``) : deux décréments concurrents
+        ne peuvent pas rendre le lot négatif ni entamer le stock promis aux
+        réservations actives, sans recourir à ``select_for_update``. La mise à
+        jour passe par le queryset : les signaux du lot ne sont pas déclenchés et
+        l'instance en mémoire est synchronisée pour qu'une sauvegarde ultérieure
+        ne compte pas deux fois le même delta.
+        """
+
+        updates: dict[str, object] = {
+            "remaining_qty": models.F("remaining_qty") + remaining,
+            "updated_at": timezone.now(),
+            **fields,
+        }
+        if initial:
+            updates["initial_qty"] = models.F("initial_qty") + initial
+        queryset = Batch.objects.filter(pk=self.pk)
+        if remaining < 0:
+            queryset = queryset.filter(remaining_qty__gte=models.F("reserved_qty") - remaining)
+        if not queryset.update(**updates):
+            raise InsufficientStockError(f"Stock insuffisant sur le lot {self.batch_code}.")
+        self.remaining_qty += remaining
+        self.initial_qty += initial
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self._loaded_remaining_qty = self.remaining_qty
+
     def clean(self) -> None:
         """Empêche des quantités incohérentes."""
 
@@ -138,6 +219,12 @@ class Batch(models.Model):
         if self.remaining_qty < 0:
             raise ValidationError("La quantité restante doit être positive.")
 
+    @property
+    def available_qty(self) -> int:
+        """Quantité vendable : le restant diminué des réservations actives."""
+
+        return max(self.remaining_qty - self.reserved_qty, 0)
+
     @property
     def is_near_expiry(self) -> bool:
         """Retourne vrai si la péremption est inférieure à 30 jours."""
@@ -147,6 +234,69 @@ class Batch(models.Model):
         return self.expiry_date <= timezone.now().date() + timezone.timedelta(days=30)
 
 
+class ReorderAlert(models.Model):
+    """Alerte de réapprovisionnement ouverte au franchissement du seuil."""
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="reorder_alerts")
+    stock_level = models.PositiveIntegerField("Stock au déclenchement")
+    reorder_level = models.PositiveIntegerField("Seuil au déclenchement")
+    triggered_at = models.DateTimeField("Déclenchée le", auto_now_add=True)
+    resolved_at = models.DateTimeField("Résolue le", blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Alerte de réapprovisionnement"
+        verbose_name_plural = "Alertes de réapprovisionnement"
+        ordering = ("-triggered_at",)
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product"],
+                condition=models.Q(resolved_at__isnull=True),
+                name="unique_open_reorder_alert",
+            )
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.product.sku} ({self.stock_level}/{self.reorder_level})"
+
+    @property
+    def is_open(self) -> bool:
+        return self.resolved_at is None
+
+
+class StockReservation(models.Model):
+    """Réservation d'une quantité sur un lot, reflétée dans ``Batch.reserved_qty``."""
+
+    class Status(models.TextChoices):
+        ACTIVE = "ACTIVE", "Active"
+        CONSUMED = "CONSUMED", "Consommée"
+        RELEASED = "RELEASED", "Libérée"
+        EXPIRED = "EXPIRED", "Expirée"
+
+    batch = models.ForeignKey(Batch, on_delete=models.CASCADE, related_name="reservations")
+    quantity = models.PositiveIntegerField("Quantité")
+    reference = models.CharField("Référence", max_length=64, blank=True)
+    status = models.CharField("Statut", max_length=10, choices=Status.choices, default=Status.ACTIVE)
+    expires_at = models.DateTimeField("Expire le", blank=True, null=True)
+    created_at = models.DateTimeField("Créée le", auto_now_add=True)
+    closed_at = models.DateTimeField("Clôturée le", blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Réservation de stock"
+        verbose_name_plural = "Réservations de stock"
+        ordering = ("-created_at",)
+        indexes = [
+            # Balayage des réservations expirées : seules les actives sont indexées.
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(status="ACTIVE"),
+                name="reservation_active_expiry_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.reference or self.pk} - {self.batch.batch_code} ({self.quantity})"
+
+
 class StockMovement(models.Model):
     """Historique des mouvements de stock."""
 
@@ -155,6 +305,7 @@ class StockMovement(models.Model):
         OUT = "OUT", "Sortie"
         TRANSFER = "TRANSFER", "Transfert"
         ADJUSTMENT = "ADJUSTMENT", "Ajustement"
+        OPENING = "OPENING", "Solde d'ouverture"
 
     product = models.ForeignKey(Product, on_delete=models.PROTECT, related_name="movements")
     batch = models.ForeignKey(Batch, on_delete=models.PROTECT, related_name="movements", blank=True, null=True)
@@ -188,6 +339,11 @@ class StockMovement(models.Model):
         verbose_name = "Mouvement de stock"
         verbose_name_plural = "Mouvements de stock"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["created_at"], name="movement_created_idx"),
+            # Rejeu de l'historique d'un produit depuis le dernier instantané.
+            models.Index(fields=["product", "created_at"], name="movement_product_created_idx"),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.movement_type} - {self.product.name} ({self.quantity})"
@@ -197,11 +353,11 @@ class StockMovement(models.Model):
 
         if self.quantity <= 0:
             raise ValidationError("La quantité doit être strictement positive.")
-        if self.movement_type in {self.MovementType.OUT, self.MovementType.TRANSFER} and not self.from_warehouse:
+        if self.movement_type in {self.MovementType.OUT, self.MovementType.TRANSFER} and not self.from_warehouse_id:
             raise ValidationError("Un mouvement sortant doit préciser l'entrepôt d'origine.")
-        if self.movement_type in {self.MovementType.IN, self.MovementType.TRANSFER} and not self.to_warehouse:
+        if self.movement_type in {self.MovementType.IN, self.MovementType.TRANSFER} and not self.to_warehouse_id:
             raise ValidationError("Un mouvement entrant doit préciser l'entrepôt de destination.")
-        if self.movement_type == self.MovementType.OUT and self.batch and self.quantity > self.batch.remaining_qty:
+        if self.movement_type == self.MovementType.OUT and self.batch_id and self.quantity > self.batch.remaining_qty:
             raise ValidationError("Stock insuffisant sur le lot sélectionné.")
 
     def apply(self) -> None:
@@ -216,9 +372,120 @@ class StockMovement(models.Model):
 
         self.clean()
         is_new = self._state.adding
-        super().save(*args, **kwargs)
-        if is_new:
-            self.apply()
+        # Le mouvement et son effet sur le stock sont indissociables.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            if is_new:
+                self.apply()
+
+
+class StockSnapshot(models.Model):
+    """Stock d'un produit dans un entrepôt en fin de journée.
+
+    Les instantanés sont creux : une ligne n'existe que pour les journées où le
+    couple produit/entrepôt a connu au moins un mouvement. Le stock à une date
+    donnée est celui du dernier instantané antérieur.
+    """
+
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="snapshots")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name="snapshots")
+    day = models.DateField("Jour")
+    quantity = models.IntegerField("Quantité en fin de journée")
+
+    class Meta:
+        verbose_name = "Instantané de stock"
+        verbose_name_plural = "Instantanés de stock"
+        ordering = ("-day",)
+        constraints = [
+            models.UniqueConstraint(fields=["product", "warehouse", "day"], name="unique_stock_snapshot_day"),
+        ]
+        indexes = [models.Index(fields=["day"], name="snapshot_day_idx")]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.product.sku} @ {self.warehouse.name} {self.day:%Y-%m-%d} : {self.quantity}"
+
+
+class StockMovementArchive(models.Model):
+    """Mouvement de stock archivé : copie à plat, sans clé étrangère vers le référentiel."""
+
+    movement_id = models.BigIntegerField("Mouvement d'origine", unique=True)
+    product_id = models.BigIntegerField("Produit")
+    batch_id = models.BigIntegerField("Lot", blank=True, null=True)
+    movement_type = models.CharField("Type", max_length=20, choices=StockMovement.MovementType.choices)
+    quantity = models.PositiveIntegerField("Quantité")
+    from_warehouse_id = models.BigIntegerField("Entrepôt d'origine", blank=True, null=True)
+    to_warehouse_id = models.BigIntegerField("Entrepôt de destination", blank=True, null=True)
+    reason = models.CharField("Motif", max_length=255, blank=True)
+    created_at = models.DateTimeField("Créé le")
+    created_by_id = models.BigIntegerField("Auteur", blank=True, null=True)
+    archived_at = models.DateTimeField("Archivé le", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Mouvement archivé"
+        verbose_name_plural = "Mouvements archivés"
+        ordering = ("-created_at",)
+        indexes = [models.Index(fields=["product_id", "created_at"], name="archive_product_created_idx")]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.movement_type} #{self.movement_id} ({self.quantity})"
+
+
+class CycleCount(models.Model):
+    """Session d'inventaire tournant : comptages importés puis appliqués en une fois."""
+
+    class Status(models.TextChoices):
+        OPEN = "OPEN", "Ouverte"
+        APPLIED = "APPLIED", "Appliquée"
+
+    reference = models.CharField("Référence", max_length=64, blank=True)
+    status = models.CharField("Statut", max_length=10, choices=Status.choices, default=Status.OPEN)
+    created_at = models.DateTimeField("Créée le", auto_now_add=True)
+    applied_at = models.DateTimeField("Appliquée le", blank=True, null=True)
+    created_by = models.ForeignKey(
+        "auth.User",
+        on_delete=models.SET_NULL,
+        related_name="cycle_counts",
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = "Inventaire tournant"
+        verbose_name_plural = "Inventaires tournants"
+        ordering = ("-created_at",)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return self.reference or f"Inventaire #{self.pk}"
+
+
+class CycleCountLine(models.Model):
+    """Quantité comptée pour un lot (ou un produit si ``batch_code`` est vide) dans un entrepôt."""
+
+    session = models.ForeignKey(CycleCount, on_delete=models.CASCADE, related_name="lines")
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="cycle_count_lines")
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name="cycle_count_lines")
+    batch_code = models.CharField("Code lot", max_length=100, blank=True)
+    counted_qty = models.PositiveIntegerField("Quantité comptée")
+    expected_qty = models.PositiveIntegerField("Quantité théorique", blank=True, null=True)
+
+    class Meta:
+        verbose_name = "Ligne d'inventaire"
+        verbose_name_plural = "Lignes d'inventaire"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["session", "product", "warehouse", "batch_code"],
+                name="unique_cycle_count_line",
+            )
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.product.sku} {self.batch_code or '*'} : {self.counted_qty}"
+
+    @property
+    def delta(self) -> Optional[int]:
+        if self.expected_qty is None:
+            return None
+        return self.counted_qty - self.expected_qty
 
 
 def ensure_non_negative(value: int, message: str = "La quantité restante ne peut être négative.") -> None:
@@ -228,37 +495,210 @@ def ensure_non_negative(value: int, message: str = "La quantité restante ne peu
         raise ValidationError(message)
 
 
-def update_product_stock(product: Product) -> None:
-    """Recalcule le stock total agrégé pour un produit donné."""
+def adjust_product_stock(product: Product, delta: int) -> None:
+    """Répercute un delta de stock sur le produit via une mise à jour atomique."""
 
-    aggregate = product.batches.aggregate(total=models.Sum("remaining_qty"))
-    product.remaining_stock = aggregate.get("total") or 0
-    product.save(update_fields=["remaining_stock", "updated_at"])
+    if not delta:
+        return
+    Product.objects.filter(pk=product.pk).update(
+        remaining_stock=models.F("remaining_stock") + delta,
+        updated_at=timezone.now(),
+    )
+    product.remaining_stock += delta
+
+
+def case_by_pk(values: Dict[int, int], pks: Iterable[int]) -> models.Case:
+    """Construit un ``CASE WHEN pk IN (…) THEN valeur`` pour une mise à jour groupée.
+
+    Les clés partageant la même valeur sont regroupées dans une seule branche :
+    les écarts d'inventaire ou les quantités reçues prennent peu de valeurs
+    distinctes, ce qui garde l'expression courte à construire et à compiler.
+    """
+
+    groups: Dict[int, List[int]] = defaultdict(list)
+    for pk in pks:
+        if values.get(pk):
+            groups[values[pk]].append(pk)
+    return models.Case(
+        *(models.When(pk__in=group, then=models.Value(value)) for value, group in groups.items()),
+        default=models.Value(0),
+        output_field=models.IntegerField(),
+    )
 
 
-def reserve_stock(batch: Batch, quantity: int) -> None:
-    """Réserve une quantité sur un lot sans dépasser le disponible."""
+def adjust_products_stock(deltas: Dict[int, int], chunk_size: int = 500) -> None:
+    """Répercute les deltas de stock de plusieurs produits (une requête par tranche)."""
+
+    items = [(product_id, delta) for product_id, delta in deltas.items() if delta]
+    now = timezone.now()
+    for start in range(0, len(items), chunk_size):
+        chunk = [product_id for product_id, _ in items[start : start + chunk_size]]
+        Product.objects.filter(pk__in=chunk).update(
+            remaining_stock=models.F("remaining_stock") + case_by_pk(deltas, chunk),
+            updated_at=now,
+        )
+
+
+def shift_batches_quantities(
+    remaining: Dict[int, int], initial: Optional[Dict[int, int]] = None, chunk_size: int = 500
+) -> None:
+    """Applique des deltas nets à plusieurs lots par ``UPDATE`` conditionnels groupés.
+
+    Chaque tranche est mise à jour en une requête ``CASE`` dont la clause
+    ``WHERE`` exige un disponible suffisant (``remaining_qty - reserved_qty``)
+    pour chaque lot décrémenté ; si une ligne manque à l'appel,
+    :class:`InsufficientStockError` est levée (la transaction appelante doit
+    alors être annulée). Une expédition solde ses réservations avant de sortir
+    le stock : elle dispose ainsi de la quantité qui lui était promise.
+    """
+
+    initial = initial or {}
+    batch_ids = [pk for pk in remaining.keys() | initial.keys() if remaining.get(pk) or initial.get(pk)]
+    now = timezone.now()
+    for start in range(0, len(batch_ids), chunk_size):
+        chunk = batch_ids[start : start + chunk_size]
+        required = {pk: -remaining[pk] for pk in chunk if remaining.get(pk, 0) < 0}
+        queryset = Batch.objects.filter(pk__in=chunk)
+        if required:
+            queryset = queryset.filter(remaining_qty__gte=models.F("reserved_qty") + case_by_pk(required, chunk))
+        updates: dict[str, object] = {
+            "remaining_qty": models.F("remaining_qty") + case_by_pk(remaining, chunk),
+            "updated_at": now,
+        }
+        if any(initial.get(pk) for pk in chunk):
+            updates["initial_qty"] = models.F("initial_qty") + case_by_pk(initial, chunk)
+        if queryset.update(**updates) != len(chunk):
+            short = Batch.objects.filter(
+                pk__in=required, remaining_qty__lt=models.F("reserved_qty") + case_by_pk(required, chunk)
+            ).values_list("batch_code", flat=True)
+            raise InsufficientStockError(f"Stock insuffisant sur le(s) lot(s) {', '.join(short)}.")
+
+
+def hold_batches(quantities: Dict[int, int], chunk_size: int = 500) -> None:
+    """Augmente ``reserved_qty`` de plusieurs lots sans dépasser leur restant.
+
+    Même principe que :func:`shift_batches_quantities` : une requête ``CASE`` par
+    tranche dont la clause ``WHERE`` exige ``remaining_qty >= reserved_qty + n``.
+    Deux réservations concurrentes ne peuvent donc pas promettre le même stock ;
+    la perdante reçoit :class:`InsufficientStockError`.
+    """
+
+    batch_ids = [pk for pk, quantity in quantities.items() if quantity > 0]
+    now = timezone.now()
+    for start in range(0, len(batch_ids), chunk_size):
+        chunk = batch_ids[start : start + chunk_size]
+        case = case_by_pk(quantities, chunk)
+        updated = Batch.objects.filter(pk__in=chunk, remaining_qty__gte=models.F("reserved_qty") + case).update(
+            reserved_qty=models.F("reserved_qty") + case, updated_at=now
+        )
+        if updated != len(chunk):
+            short = Batch.objects.filter(pk__in=chunk, remaining_qty__lt=models.F("reserved_qty") + case).values_list(
+                "batch_code", flat=True
+            )
+            raise InsufficientStockError(f"Stock disponible insuffisant sur le(s) lot(s) {', '.join(short)}.")
+
+
+def unhold_batches(quantities: Dict[int, int], chunk_size: int = 500) -> None:
+    """Diminue ``reserved_qty`` de plusieurs lots (borné à zéro)."""
 
-    ensure_non_negative(batch.remaining_qty - quantity)
-    batch.remaining_qty -= quantity
-    batch.save(update_fields=["remaining_qty"])
-    update_product_stock(batch.product)
+    batch_ids = [pk for pk, quantity in quantities.items() if quantity > 0]
+    now = timezone.now()
+    for start in range(0, len(batch_ids), chunk_size):
+        chunk = batch_ids[start : start + chunk_size]
+        Batch.objects.filter(pk__in=chunk).update(
+            reserved_qty=Greatest(models.F("reserved_qty") - case_by_pk(quantities, chunk), models.Value(0)),
+            updated_at=now,
+        )
 
 
-def release_stock(batch: Batch, quantity: int) -> None:
-    """Libère une réservation sur un lot."""
+def update_products_stock(product_ids: Iterable[int]) -> None:
+    """Recalcule en une requête agrégée le stock de plusieurs produits."""
 
-    batch.remaining_qty += quantity
-    if batch.remaining_qty > batch.initial_qty:
-        batch.remaining_qty = batch.initial_qty
-    batch.save(update_fields=["remaining_qty"])
-    update_product_stock(batch.product)
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+    totals = dict(
+        Batch.objects.filter(product_id__in=product_ids)
+        .values_list("product_id")
+        .annotate(total=models.Sum("remaining_qty"))
+    )
+    now = timezone.now()
+    products = list(Product.objects.filter(pk__in=product_ids).only("id", "remaining_stock", "updated_at"))
+    for product in products:
+        product.remaining_stock = totals.get(product.pk) or 0
+        product.updated_at = now
+    Product.objects.bulk_update(products, ["remaining_stock", "updated_at"])
+
+
+def evaluate_reorder_alerts(product_ids: Iterable[int]) -> None:
+    """Ouvre ou résout les alertes de seuil (déclenchement sur front uniquement)."""
+
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+    open_alerts = set(
+        ReorderAlert.objects.filter(product_id__in=product_ids, resolved_at__isnull=True).values_list(
+            "product_id", flat=True
+        )
+    )
+    to_open = []
+    to_resolve = []
+    for pk, sku, stock, level in Product.objects.filter(pk__in=product_ids).values_list(
+        "pk", "sku", "remaining_stock", "reorder_level"
+    ):
+        if stock <= level and pk not in open_alerts:
+            LOGGER.warning("Alerte réapprovisionnement pour %s", sku)
+            to_open.append(ReorderAlert(product_id=pk, stock_level=stock, reorder_level=level))
+        elif stock > level and pk in open_alerts:
+            to_resolve.append(pk)
+    if to_open:
+        ReorderAlert.objects.bulk_create(to_open)
+    if to_resolve:
+        ReorderAlert.objects.filter(product_id__in=to_resolve, resolved_at__isnull=True).update(
+            resolved_at=timezone.now()
+        )
+
+
+FEFO_ORDERING = (models.F("expiry_date").asc(nulls_last=True), "received_at", "pk")
+
+
+def allocate_fefo(
+    batches: Iterable[Batch], quantity: int, available: Optional[Dict[int, int]] = None
+) -> List[Tuple[Batch, int]]:
+    """Répartit une quantité sur des lots déjà triés FEFO.
+
+    Retourne la liste des couples ``(lot, quantité)`` couvrant la demande, ou une
+    liste vide si le stock cumulé est insuffisant. ``available`` permet de
+    partager un disponible (par identifiant de lot) entre plusieurs demandes : il
+    n'est décrémenté que si l'allocation aboutit.
+    """
+
+    splits: List[Tuple[Batch, int]] = []
+    missing = quantity
+    for batch in batches:
+        if missing <= 0:
+            break
+        stock = batch.available_qty if available is None else available.get(batch.pk, 0)
+        taken = min(stock, missing)
+        if taken > 0:
+            splits.append((batch, taken))
+            missing -= taken
+    if missing > 0:
+        return []
+    if available is not None:
+        for batch, taken in splits:
+            available[batch.pk] -= taken
+    return splits
 
 
 def pick_batch(product: Product, quantity: int, warehouse: Optional[Warehouse] = None) -> Optional[Batch]:
-    """Sélectionne le lot FIFO (plus proche de péremption) pour une quantité donnée."""
+    """Sélectionne le lot FIFO (plus proche de péremption) pour une quantité donnée.
+
+    Seule la part non réservée du lot est prise en compte.
+    """
 
-    qs = product.batches.filter(remaining_qty__gte=quantity)
+    # ``remaining_qty > 0`` reprend la condition de l'index partiel FEFO.
+    qs = product.batches.filter(remaining_qty__gt=0, remaining_qty__gte=models.F("reserved_qty") + quantity)
     if warehouse is not None:
         qs = qs.filter(warehouse=warehouse)
-    return qs.order_by(models.F("expiry_date").asc(nulls_last=True), "received_at").first()
+    return qs.order_by(*FEFO_ORDERING).first()
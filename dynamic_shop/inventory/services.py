@@ -1,22 +1,34 @@
 """Services métier pour la gestion des stocks DYNAMIC."""
 from __future__ import annotations
 
+import secrets
+from collections import defaultdict
 from dataclasses import dataclass
-from datetime import date
-from typing import List, Optional
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
+from .coalescing import mark_reorder_check
 from .models import (
+    FEFO_ORDERING,
     Batch,
+    InsufficientStockError,
     Product,
     StockMovement,
+    StockReservation,
     Warehouse,
+    adjust_product_stock,
+    adjust_products_stock,
+    allocate_fefo,
     ensure_non_negative,
+    hold_batches,
     pick_batch,
-    update_product_stock,
+    shift_batches_quantities,
+    unhold_batches,
 )
 
 
@@ -30,11 +42,51 @@ class PurchaseItem:
     expiry_date: Optional[date] = None
 
 
-def generate_batch_code(product: Product) -> str:
-    """Génère un code lot simple basé sur la date et le SKU."""
+def generate_batch_code(product: Product, token: Optional[str] = None) -> str:
+    """Génère un code lot basé sur la date, le SKU et un jeton aléatoire.
+
+    Le jeton évite les collisions entre codes générés dans la même seconde ;
+    ``receive_purchase`` y intègre le rang de la ligne pour garantir l'unicité au
+    sein d'une même réception.
+    """
 
     suffix = timezone.now().strftime("%Y%m%d%H%M%S")
-    return f"{product.sku}-{suffix}"
+    return f"{product.sku}-{suffix}-{token or secrets.token_hex(4).upper()}"
+
+
+def resolve_products(skus: Iterable[str]) -> Dict[str, Product]:
+    """Charge en une requête les produits correspondant à des SKU."""
+
+    skus = set(skus)
+    products = Product.objects.in_bulk(skus, field_name="sku")
+    unknown = sorted(skus - products.keys())
+    if unknown:
+        raise ValueError(f"SKU inconnu(s) : {', '.join(unknown)}.")
+    return products
+
+
+def purchase_items_from_payload(items: Iterable[Mapping[str, Any]]) -> List[PurchaseItem]:
+    """Construit les lignes de réception d'une requête (``sku``, ``quantity``, ``batch_code``, ``expiry_date``)."""
+
+    items = list(items)
+    products = resolve_products(item["sku"] for item in items)
+    purchase_items = []
+    for item in items:
+        expiry = item.get("expiry_date")
+        if expiry:
+            try:
+                expiry = datetime.fromisoformat(expiry).date()  # type: ignore[assignment]
+            except ValueError:
+                raise ValueError("Format de date invalide (attendu YYYY-MM-DD).") from None
+        purchase_items.append(
+            PurchaseItem(
+                product=products[item["sku"]],
+                quantity=item["quantity"],
+                batch_code=item.get("batch_code"),
+                expiry_date=expiry,
+            )
+        )
+    return purchase_items
 
 
 @transaction.atomic
@@ -43,30 +95,62 @@ def receive_purchase(
     items: Iterable[PurchaseItem],
     warehouse: Warehouse,
     created_by=None,
+    batch_size: int = 1000,
 ) -> List[Batch]:
-    """Enregistre une réception fournisseur et crée les lots associés."""
-
-    created_batches: List[Batch] = []
-    for item in items:
-        batch = Batch.objects.create(
-            product=item.product,
-            batch_code=item.batch_code or generate_batch_code(item.product),
-            expiry_date=item.expiry_date,
-            initial_qty=0,
-            remaining_qty=0,
+    """Enregistre une réception fournisseur et crée les lots associés.
+
+    Les lots absents de l'entrepôt sont créés par ``bulk_create`` puis les entrées
+    sont appliquées via :func:`apply_movements_bulk` : le nombre de requêtes ne
+    dépend pas du nombre de lignes. Une ligne dont le code lot existe déjà dans
+    l'entrepôt complète ce lot. Retourne un lot par ligne, dans l'ordre.
+    """
+
+    items = list(items)
+    if not items:
+        return []
+    receipt = secrets.token_hex(3).upper()
+    keys = [
+        (item.product.pk, item.batch_code or generate_batch_code(item.product, f"{receipt}{index:05d}"))
+        for index, item in enumerate(items)
+    ]
+    batches: Dict[Tuple[int, str], Batch] = {
+        (batch.product_id, batch.batch_code): batch
+        for batch in Batch.objects.filter(
             warehouse=warehouse,
+            product_id__in={product_id for product_id, _ in keys},
+            batch_code__in={item.batch_code for item in items if item.batch_code},
         )
-        StockMovement.objects.create(
-            product=item.product,
-            batch=batch,
-            movement_type=StockMovement.MovementType.IN,
-            quantity=item.quantity,
-            to_warehouse=warehouse,
-            reason=f"Réception {supplier_name}",
-            created_by=created_by,
-        )
-        created_batches.append(batch)
-    return created_batches
+    }
+    missing: Dict[Tuple[int, str], Batch] = {}
+    for item, key in zip(items, keys):
+        if key not in batches and key not in missing:
+            missing[key] = Batch(
+                product=item.product,
+                batch_code=key[1],
+                expiry_date=item.expiry_date,
+                initial_qty=0,
+                remaining_qty=0,
+                warehouse=warehouse,
+            )
+    Batch.objects.bulk_create(missing.values(), batch_size=batch_size)
+    batches.update(missing)
+
+    movements = apply_movements_bulk(
+        [
+            StockMovement(
+                product=item.product,
+                batch=batches[key],
+                movement_type=StockMovement.MovementType.IN,
+                quantity=item.quantity,
+                to_warehouse=warehouse,
+                reason=f"Réception {supplier_name}",
+                created_by=created_by,
+            )
+            for item, key in zip(items, keys)
+        ],
+        batch_size=batch_size,
+    )
+    return [movement.batch for movement in movements]
 
 
 @transaction.atomic
@@ -78,12 +162,15 @@ def transfer_stock(
     batch: Optional[Batch] = None,
     created_by=None,
 ) -> None:
-    """Transfère une quantité d'un entrepôt à un autre."""
+    """Transfère une quantité d'un entrepôt à un autre.
+
+    Sans lot imposé, la quantité est répartie en FEFO sur les lots disponibles
+    (voir :func:`transfer_stock_bulk`).
+    """
 
     if batch is None:
-        batch = pick_batch(product, quantity, warehouse=from_warehouse)
-        if batch is None:
-            raise ValueError("Aucun lot disponible pour ce transfert.")
+        transfer_stock_bulk([(product, quantity)], from_warehouse, to_warehouse, created_by=created_by)
+        return
     ensure_non_negative(batch.remaining_qty - quantity)
 
     StockMovement.objects.create(
@@ -98,6 +185,43 @@ def transfer_stock(
     )
 
 
+@transaction.atomic
+def transfer_stock_bulk(
+    lines: Sequence[Tuple[Product, int]],
+    from_warehouse: Warehouse,
+    to_warehouse: Warehouse,
+    created_by=None,
+    reason: str = "Transfert entre entrepôts",
+) -> List[StockMovement]:
+    """Transfère plusieurs produits d'un entrepôt à un autre en une transaction.
+
+    Chaque ligne est répartie en FEFO sur les lots disponibles de l'entrepôt
+    d'origine (une seule lecture des lots), les lots de destination manquants
+    sont créés en masse et l'ensemble des mouvements passe par
+    :func:`apply_movements_bulk`.
+    """
+
+    if from_warehouse.pk == to_warehouse.pk:
+        raise ValueError("Les entrepôts d'origine et de destination doivent différer.")
+    splits = allocate_order_lines(lines, from_warehouse)
+    return apply_movements_bulk(
+        [
+            StockMovement(
+                product=product,
+                batch=batch,
+                movement_type=StockMovement.MovementType.TRANSFER,
+                quantity=quantity,
+                from_warehouse=from_warehouse,
+                to_warehouse=to_warehouse,
+                reason=reason,
+                created_by=created_by,
+            )
+            for (product, _), lots in zip(lines, splits)
+            for batch, quantity in lots
+        ]
+    )
+
+
 @transaction.atomic
 def adjust_stock(
     product: Product,
@@ -137,13 +261,169 @@ def adjust_stock(
 
 
 @transaction.atomic
-def reserve_for_order(product: Product, quantity: int, warehouse: Warehouse) -> Batch:
-    """Réserve un lot complet pour une commande (FIFO)."""
+def reserve_for_order(
+    product: Product, quantity: int, warehouse: Warehouse, reference: str = "", ttl: Optional[timedelta] = None
+) -> Batch:
+    """Réserve une quantité pour une commande, répartie sur plusieurs lots en FEFO si besoin.
 
-    batch = pick_batch(product, quantity, warehouse=warehouse)
-    if batch is None or batch.remaining_qty < quantity:
-        raise ValueError("Stock insuffisant pour cette commande.")
-    return batch
+    Retourne le lot principal (le premier entamé), comme ``OrderItem.batch``.
+    """
+
+    try:
+        (splits,) = allocate_order_lines([(product, quantity)], warehouse)
+        reserve_batches(splits, reference=reference, ttl=ttl)
+    except (ValueError, InsufficientStockError) as exc:
+        raise ValueError("Stock insuffisant pour cette commande.") from exc
+    return splits[0][0]
+
+
+def reserve_batches(
+    splits: Iterable[Tuple[Batch, int]], reference: str = "", ttl: Optional[timedelta] = None
+) -> List[StockReservation]:
+    """Pose une réservation par couple ``(lot, quantité)``.
+
+    ``Batch.reserved_qty`` est incrémenté par ``UPDATE`` conditionnel
+    (:func:`~dynamic_shop.inventory.models.hold_batches`) : si un lot ne dispose
+    plus de la quantité, :class:`InsufficientStockError` est levée et rien n'est
+    réservé.
+    """
+
+    (reservations,) = reserve_batches_bulk([(reference, splits)], ttl=ttl)
+    return reservations
+
+
+@transaction.atomic
+def reserve_batches_bulk(
+    requests: Iterable[Tuple[str, Iterable[Tuple[Batch, int]]]], ttl: Optional[timedelta] = None
+) -> List[List[StockReservation]]:
+    """Réserve en une passe les lots de plusieurs demandes ``(référence, [(lot, quantité), ...])``.
+
+    Les quantités de toutes les demandes sont cumulées par lot pour un seul
+    :func:`~dynamic_shop.inventory.models.hold_batches` et les réservations
+    insérées ensemble ; le résultat est regroupé dans l'ordre des demandes.
+    """
+
+    requests = [(reference, [(batch, qty) for batch, qty in splits if qty > 0]) for reference, splits in requests]
+    quantities: Dict[int, int] = defaultdict(int)
+    for _, splits in requests:
+        for batch, quantity in splits:
+            quantities[batch.pk] += quantity
+    hold_batches(quantities)
+    expires_at = timezone.now() + ttl if ttl else None
+    reservations = iter(
+        StockReservation.objects.bulk_create(
+            [
+                StockReservation(batch=batch, quantity=quantity, reference=reference, expires_at=expires_at)
+                for reference, splits in requests
+                for batch, quantity in splits
+            ],
+            batch_size=1000,
+        )
+    )
+    grouped = []
+    for _, splits in requests:
+        for batch, quantity in splits:
+            batch.reserved_qty += quantity
+        grouped.append([next(reservations) for _ in splits])
+    return grouped
+
+
+def release_reservations(reservation_ids: Iterable[int]) -> int:
+    """Libère des réservations actives (annulation de commande)."""
+
+    return _close_reservations(reservation_ids, StockReservation.Status.RELEASED)
+
+
+def consume_reservations(reservation_ids: Iterable[int]) -> int:
+    """Solde des réservations actives au moment où le stock sort réellement."""
+
+    return _close_reservations(reservation_ids, StockReservation.Status.CONSUMED)
+
+
+def sweep_expired_reservations(now: Optional[datetime] = None, chunk_size: int = 1000) -> int:
+    """Libère en masse les réservations actives arrivées à expiration.
+
+    Chaque tranche est traitée dans sa propre transaction ; les réservations
+    verrouillées par une annulation ou une expédition concurrente sont ignorées
+    et reprises au passage suivant.
+    """
+
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        ids = list(
+            StockReservation.objects.filter(status=StockReservation.Status.ACTIVE, expires_at__lte=now)
+            .order_by("expires_at")
+            .values_list("pk", flat=True)[:chunk_size]
+        )
+        closed = _close_reservations(ids, StockReservation.Status.EXPIRED) if ids else 0
+        expired += closed
+        if closed < chunk_size:
+            return expired
+
+
+@transaction.atomic
+def _close_reservations(reservation_ids: Iterable[int], status: str) -> int:
+    """Clôt des réservations actives et restitue leurs quantités aux lots."""
+
+    rows = list(
+        StockReservation.objects.select_for_update(skip_locked=True)
+        .filter(pk__in=list(reservation_ids), status=StockReservation.Status.ACTIVE)
+        .values_list("pk", "batch_id", "quantity")
+    )
+    if not rows:
+        return 0
+    quantities: Dict[int, int] = defaultdict(int)
+    for _, batch_id, quantity in rows:
+        quantities[batch_id] += quantity
+    unhold_batches(quantities)
+    return StockReservation.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+        status=status, closed_at=timezone.now()
+    )
+
+
+def available_stock(product_ids: Iterable[int], warehouse: Optional[Warehouse] = None) -> Dict[int, int]:
+    """Stock vendable (restant moins réservé) par produit, en une requête agrégée.
+
+    Le filtre ``remaining_qty > 0`` permet l'usage de l'index partiel FEFO.
+    """
+
+    qs = Batch.objects.filter(product_id__in=list(product_ids), remaining_qty__gt=0)
+    if warehouse is not None:
+        qs = qs.filter(warehouse=warehouse)
+    return dict(
+        qs.values_list("product_id")
+        .annotate(available=Sum(Greatest(F("remaining_qty") - F("reserved_qty"), Value(0))))
+        .order_by()
+    )
+
+
+def allocate_order_lines(
+    lines: Sequence[Tuple[Product, int]], warehouse: Warehouse
+) -> List[List[Tuple[Batch, int]]]:
+    """Alloue toutes les lignes d'une commande en FEFO à partir d'une seule lecture des lots.
+
+    Chaque ligne peut être répartie sur plusieurs lots ; deux lignes d'un même
+    produit se partagent le disponible (hors quantités réservées) sans double
+    allocation.
+    """
+
+    candidates: Dict[int, List[Batch]] = defaultdict(list)
+    product_ids = {product.pk for product, _ in lines}
+    if product_ids:
+        for batch in Batch.objects.filter(
+            product_id__in=product_ids, warehouse=warehouse, remaining_qty__gt=0
+        ).order_by(*FEFO_ORDERING):
+            candidates[batch.product_id].append(batch)
+
+    available = {batch.pk: batch.available_qty for batches in candidates.values() for batch in batches}
+    allocations: List[List[Tuple[Batch, int]]] = []
+    for product, quantity in lines:
+        splits = allocate_fefo(candidates[product.pk], quantity, available)
+        if not splits:
+            raise ValueError(f"Stock insuffisant pour {product.sku} dans l'entrepôt {warehouse}.")
+        allocations.append(splits)
+    return allocations
 
 
 @transaction.atomic
@@ -160,6 +440,41 @@ def ship_order(product: Product, batch: Batch, quantity: int, warehouse: Warehou
     )
 
 
+@dataclass
+class StockDrift:
+    """Écart constaté entre le stock dénormalisé et la somme des lots."""
+
+    product_id: int
+    sku: str
+    recorded: int
+    actual: int
+
+    @property
+    def delta(self) -> int:
+        return self.actual - self.recorded
+
+
+def reconcile_product_stock(fix: bool = True, chunk_size: int = 2000) -> List[StockDrift]:
+    """Compare ``Product.remaining_stock`` aux lots et corrige les écarts en masse."""
+
+    totals = dict(Batch.objects.values_list("product_id").annotate(total=Sum("remaining_qty")).order_by())
+    drifts = [
+        StockDrift(product_id=pk, sku=sku, recorded=recorded, actual=totals.get(pk) or 0)
+        for pk, sku, recorded in Product.objects.order_by("pk")
+        .values_list("pk", "sku", "remaining_stock")
+        .iterator(chunk_size=chunk_size)
+        if recorded != (totals.get(pk) or 0)
+    ]
+    if fix and drifts:
+        now = timezone.now()
+        Product.objects.bulk_update(
+            [Product(pk=drift.product_id, remaining_stock=drift.actual, updated_at=now) for drift in drifts],
+            ["remaining_stock", "updated_at"],
+            batch_size=chunk_size,
+        )
+    return drifts
+
+
 def product_stock_by_warehouse(product: Product) -> List[dict[str, int]]:
     """Retourne la ventilation du stock par entrepôt."""
 
@@ -169,27 +484,31 @@ def product_stock_by_warehouse(product: Product) -> List[dict[str, int]]:
 
 
 def apply_movement(movement: StockMovement) -> None:
-    """Applique concrètement un mouvement de stock."""
+    """Applique concrètement un mouvement de stock.
+
+    Les quantités du lot et le stock agrégé du produit sont mis à jour par deltas
+    atomiques (``F()``), sans ré-agréger l'ensemble des lots du produit. Les
+    sorties passent par un ``UPDATE`` conditionnel qui lève
+    :class:`InsufficientStockError` si le lot ne couvre plus la quantité.
+    """
 
     batch = movement.batch
     product = movement.product
     if batch is None:
         raise ValueError("Les mouvements doivent référencer un lot.")
 
+    quantity = movement.quantity
     if movement.movement_type == StockMovement.MovementType.IN:
-        batch.initial_qty += movement.quantity
-        batch.remaining_qty += movement.quantity
         if movement.to_warehouse:
-            batch.warehouse = movement.to_warehouse
-        batch.save(update_fields=["initial_qty", "remaining_qty", "warehouse"])
+            batch.shift_quantities(quantity, initial=quantity, warehouse=movement.to_warehouse)
+        else:
+            batch.shift_quantities(quantity, initial=quantity)
+        adjust_product_stock(product, quantity)
     elif movement.movement_type == StockMovement.MovementType.OUT:
-        ensure_non_negative(batch.remaining_qty - movement.quantity)
-        batch.remaining_qty -= movement.quantity
-        batch.save(update_fields=["remaining_qty"])
+        batch.shift_quantities(-quantity)
+        adjust_product_stock(product, -quantity)
     elif movement.movement_type == StockMovement.MovementType.TRANSFER:
-        ensure_non_negative(batch.remaining_qty - movement.quantity)
-        batch.remaining_qty -= movement.quantity
-        batch.save(update_fields=["remaining_qty"])
+        batch.shift_quantities(-quantity)
         destination, _ = Batch.objects.get_or_create(
             product=product,
             batch_code=batch.batch_code,
@@ -201,18 +520,139 @@ def apply_movement(movement: StockMovement) -> None:
                 "received_at": batch.received_at,
             },
         )
-        destination.initial_qty += movement.quantity
-        destination.remaining_qty += movement.quantity
-        destination.save(update_fields=["initial_qty", "remaining_qty"])
+        destination.shift_quantities(quantity, initial=quantity)
     elif movement.movement_type == StockMovement.MovementType.ADJUSTMENT:
         if movement.to_warehouse:
-            batch.initial_qty += movement.quantity
-            batch.remaining_qty += movement.quantity
+            batch.shift_quantities(quantity, initial=quantity)
+            adjust_product_stock(product, quantity)
         elif movement.from_warehouse:
-            ensure_non_negative(batch.remaining_qty - movement.quantity)
-            batch.remaining_qty -= movement.quantity
-        batch.save(update_fields=["initial_qty", "remaining_qty"])
+            batch.shift_quantities(-quantity)
+            adjust_product_stock(product, -quantity)
+    elif movement.movement_type == StockMovement.MovementType.OPENING:
+        raise ValueError("Un solde d'ouverture résume un historique archivé et ne modifie pas le stock.")
     else:  # pragma: no cover - choix exhaustif
         raise ValueError("Type de mouvement inconnu")
+    mark_reorder_check([product.pk])
 
-    update_product_stock(product)
+
+@transaction.atomic
+def apply_movements_bulk(movements: Iterable[StockMovement], batch_size: int = 1000) -> List[StockMovement]:
+    """Enregistre et applique un ensemble de mouvements en une seule transaction.
+
+    Les mouvements (non sauvegardés) sont validés, regroupés par lot puis appliqués
+    sous forme de deltas nets (``UPDATE`` conditionnels groupés et
+    ``bulk_create`` des mouvements). Le stock agrégé
+    reçoit un seul delta par produit concerné et les alertes de seuil sont
+    évaluées une fois au commit.
+    """
+
+    movements = list(movements)
+    if not movements:
+        return []
+    batch_ids = {movement.batch_id for movement in movements}
+    if None in batch_ids:
+        raise ValueError("Les mouvements doivent référencer un lot.")
+
+    batches: Dict[int, Batch] = Batch.objects.in_bulk(batch_ids)
+    for movement in movements:
+        batch = batches.get(movement.batch_id)
+        if batch is None or batch.product_id != movement.product_id:
+            raise ValueError("Le lot référencé ne correspond pas au produit du mouvement.")
+        movement.batch = batch
+        movement.clean()
+
+    by_key: Dict[Tuple[int, str, int], Batch] = {
+        (batch.product_id, batch.batch_code, batch.warehouse_id): batch for batch in batches.values()
+    }
+    _resolve_transfer_destinations(movements, by_key)
+
+    remaining: Dict[int, int] = defaultdict(int)
+    initial: Dict[int, int] = defaultdict(int)
+    relocated: Dict[int, int] = {}
+    changed: Dict[int, Batch] = {}
+    for movement in movements:
+        batch = movement.batch
+        quantity = movement.quantity
+        if movement.movement_type == StockMovement.MovementType.IN:
+            initial[batch.pk] += quantity
+            remaining[batch.pk] += quantity
+            if movement.to_warehouse_id and movement.to_warehouse_id != batch.warehouse_id:
+                relocated[batch.pk] = movement.to_warehouse_id
+        elif movement.movement_type == StockMovement.MovementType.OUT:
+            remaining[batch.pk] -= quantity
+        elif movement.movement_type == StockMovement.MovementType.TRANSFER:
+            remaining[batch.pk] -= quantity
+            destination = by_key[(batch.product_id, batch.batch_code, movement.to_warehouse_id)]
+            initial[destination.pk] += quantity
+            remaining[destination.pk] += quantity
+            changed[destination.pk] = destination
+        elif movement.movement_type == StockMovement.MovementType.ADJUSTMENT:
+            if movement.to_warehouse_id:
+                initial[batch.pk] += quantity
+                remaining[batch.pk] += quantity
+            elif movement.from_warehouse_id:
+                remaining[batch.pk] -= quantity
+        elif movement.movement_type == StockMovement.MovementType.OPENING:
+            raise ValueError("Un solde d'ouverture résume un historique archivé et ne modifie pas le stock.")
+        else:  # pragma: no cover - choix exhaustif
+            raise ValueError("Type de mouvement inconnu")
+        changed[batch.pk] = batch
+
+    # UPDATE conditionnels : un décrément concurrent ne peut pas rendre un lot négatif.
+    shift_batches_quantities(remaining, initial)
+    for warehouse_id in set(relocated.values()):
+        Batch.objects.filter(
+            pk__in=[pk for pk, target in relocated.items() if target == warehouse_id]
+        ).update(warehouse_id=warehouse_id, updated_at=timezone.now())
+    StockMovement.objects.bulk_create(movements, batch_size=batch_size)
+
+    deltas: Dict[int, int] = defaultdict(int)
+    for batch in changed.values():
+        batch.initial_qty += initial[batch.pk]
+        batch.remaining_qty += remaining[batch.pk]
+        batch.warehouse_id = relocated.get(batch.pk, batch.warehouse_id)
+        batch._loaded_remaining_qty = batch.remaining_qty
+        deltas[batch.product_id] += remaining[batch.pk]
+    adjust_products_stock(deltas)
+    mark_reorder_check(deltas)
+    return movements
+
+
+def _resolve_transfer_destinations(
+    movements: List[StockMovement], by_key: Dict[Tuple[int, str, int], Batch]
+) -> None:
+    """Charge ou crée en masse les lots de destination des transferts."""
+
+    missing: Dict[Tuple[int, str, int], Batch] = {}
+    for movement in movements:
+        if movement.movement_type != StockMovement.MovementType.TRANSFER:
+            continue
+        source = movement.batch
+        key = (source.product_id, source.batch_code, movement.to_warehouse_id)
+        if key not in by_key and key not in missing:
+            missing[key] = Batch(
+                product_id=source.product_id,
+                batch_code=source.batch_code,
+                warehouse_id=movement.to_warehouse_id,
+                expiry_date=source.expiry_date,
+                initial_qty=0,
+                remaining_qty=0,
+                received_at=source.received_at,
+            )
+    if not missing:
+        return
+
+    existing = Batch.objects.filter(
+        product_id__in={key[0] for key in missing},
+        batch_code__in={key[1] for key in missing},
+        warehouse_id__in={key[2] for key in missing},
+    )
+    for batch in existing:
+        key = (batch.product_id, batch.batch_code, batch.warehouse_id)
+        if key in missing:
+            missing.pop(key)
+            by_key[key] = batch
+    if missing:
+        created = Batch.objects.bulk_create(list(missing.values()))
+        for batch in created:
+            by_key[(batch.product_id, batch.batch_code, batch.warehouse_id)] = batch
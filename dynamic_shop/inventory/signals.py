@@ -1,35 +1,58 @@
 """Signaux dédiés à la synchronisation des stocks."""
 from __future__ import annotations
 
-import logging
-
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import Batch, Product, update_product_stock
+from dynamic_shop.core.models import TableVersion
 
-LOGGER = logging.getLogger(__name__)
+from .coalescing import mark_reorder_check, mark_stock_dirty
+from .models import Batch, Brand, Category, Product, Warehouse, adjust_products_stock
 
 
 @receiver(post_save, sender=Batch)
-def update_stock_on_save(sender, instance: Batch, **_: object) -> None:
-    """Recalcule le stock agrégé à chaque sauvegarde de lot."""
-
-    update_product_stock(instance.product)
-    if instance.product.is_below_reorder:
-        LOGGER.warning("Produit %s sous le seuil de réapprovisionnement", instance.product.sku)
+def update_stock_on_save(sender, instance: Batch, created: bool, **_: object) -> None:
+    """Répercute le delta de quantité du lot ; les cas ambigus sont recalculés au commit."""
+
+    previous_qty = getattr(instance, "_loaded_remaining_qty", None)
+    previous_product_id = getattr(instance, "_loaded_product_id", None)
+    if created:
+        adjust_products_stock({instance.product_id: instance.remaining_qty})
+        mark_reorder_check([instance.product_id])
+    elif previous_qty is None or previous_product_id != instance.product_id:
+        mark_stock_dirty({previous_product_id, instance.product_id} - {None})
+    else:
+        adjust_products_stock({instance.product_id: instance.remaining_qty - previous_qty})
+        mark_reorder_check([instance.product_id])
+    instance._loaded_remaining_qty = instance.remaining_qty
+    instance._loaded_product_id = instance.product_id
 
 
 @receiver(post_delete, sender=Batch)
 def update_stock_on_delete(sender, instance: Batch, **_: object) -> None:
-    """Recalcule le stock à la suppression d'un lot."""
+    """Retire du stock produit la quantité du lot supprimé."""
 
-    update_product_stock(instance.product)
+    loaded_qty = getattr(instance, "_loaded_remaining_qty", None)
+    if loaded_qty is None:
+        mark_stock_dirty([instance.product_id])
+        return
+    adjust_products_stock({instance.product_id: -loaded_qty})
+    mark_reorder_check([instance.product_id])
 
 
 @receiver(post_save, sender=Product)
 def alert_on_reorder(sender, instance: Product, **_: object) -> None:
-    """Journalise un avertissement lorsque le seuil est dépassé."""
+    """Planifie l'évaluation de l'alerte de seuil au commit."""
+
+    mark_reorder_check([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Batch)
+@receiver(post_delete, sender=Warehouse)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Category)
+def bump_version_on_delete(sender, **_: object) -> None:
+    """Une suppression ne déplace pas ``MAX(updated_at)`` : le compteur de la table la signale."""
 
-    if instance.is_below_reorder:
-        LOGGER.warning("Alerte réapprovisionnement pour %s", instance.sku)
+    TableVersion.bump(sender)
@@ -0,0 +1,59 @@
+"""Tâches de fond de l'inventaire (réceptions, inventaires tournants, maintenance du journal)."""
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, List, Mapping, Optional
+
+from django.contrib.auth.models import User
+
+from dynamic_shop.core.jobs import job_task
+
+from .cycle_counts import apply_cycle_count
+from .history import archive_movements, build_stock_snapshots
+from .models import CycleCount, Warehouse
+from .services import (
+    purchase_items_from_payload,
+    receive_purchase,
+    reconcile_product_stock,
+    sweep_expired_reservations,
+)
+
+
+def _user(user_id: Optional[int]) -> Optional[User]:
+    return User.objects.filter(pk=user_id).first() if user_id else None
+
+
+@job_task
+def receive_purchase_task(
+    supplier: str, warehouse_id: int, items: List[Mapping[str, Any]], user_id: Optional[int] = None
+) -> Dict[str, int]:
+    warehouse = Warehouse.objects.get(pk=warehouse_id)
+    batches = receive_purchase(supplier, purchase_items_from_payload(items), warehouse, created_by=_user(user_id))
+    return {"batches": len({batch.pk for batch in batches})}
+
+
+@job_task
+def apply_cycle_count_task(session_id: int, user_id: Optional[int] = None) -> Dict[str, int]:
+    session = CycleCount.objects.get(pk=session_id)
+    return {"adjustments": len(apply_cycle_count(session, created_by=_user(user_id)))}
+
+
+@job_task
+def build_stock_snapshots_task(until: Optional[str] = None) -> Dict[str, int]:
+    return {"snapshots": build_stock_snapshots(until=date.fromisoformat(until) if until else None)}
+
+
+@job_task
+def archive_movements_task(before: str) -> Dict[str, int]:
+    report = archive_movements(date.fromisoformat(before))
+    return {"archived": report.archived, "openings": report.openings, "products": report.products}
+
+
+@job_task
+def release_expired_reservations_task() -> Dict[str, int]:
+    return {"released": sweep_expired_reservations()}
+
+
+@job_task
+def reconcile_stock_task(fix: bool = True) -> Dict[str, int]:
+    return {"drifts": len(reconcile_product_stock(fix=fix))}
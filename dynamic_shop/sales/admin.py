@@ -1,9 +1,17 @@
 """Administration des ventes."""
 from __future__ import annotations
 
+from django.conf import settings
 from django.contrib import admin, messages
+from django.urls import reverse
+from django.utils.html import format_html
+
+from dynamic_shop.core.jobs import enqueue
 
 from .models import Customer, Order, OrderItem, Payment
+from .services import transition_orders
+from .signals import order_totals_muted
+from .tasks import transition_orders_task
 
 
 class OrderItemInline(admin.TabularInline):
@@ -20,26 +28,52 @@ class CustomerAdmin(admin.ModelAdmin):
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ("code", "customer", "status", "total_amount", "created_at")
+    list_display = ("code", "customer", "status", "total_amount", "paid_amount", "created_at")
     list_filter = ("status", "created_at")
     search_fields = ("code", "customer__name")
     inlines = [OrderItemInline]
+    readonly_fields = ("paid_amount",)
     actions = ["mark_confirmed", "mark_shipped", "mark_cancelled"]
 
+    def save_formset(self, request, form, formset, change):  # type: ignore[override]
+        # Un seul recalcul du total pour toutes les lignes éditées.
+        with order_totals_muted():
+            super().save_formset(request, form, formset, change)
+
     @admin.action(description="Confirmer la commande")
     def mark_confirmed(self, request, queryset):
-        updated = queryset.update(status=Order.Status.CONFIRMED)
-        self.message_user(request, f"{updated} commande(s) confirmée(s)", level=messages.SUCCESS)
+        self._transition(request, queryset, Order.Status.CONFIRMED, "confirmée(s)")
 
     @admin.action(description="Marquer comme expédiée")
     def mark_shipped(self, request, queryset):
-        updated = queryset.update(status=Order.Status.SHIPPED)
-        self.message_user(request, f"{updated} commande(s) expédiée(s)", level=messages.SUCCESS)
+        self._transition(request, queryset, Order.Status.SHIPPED, "expédiée(s)")
 
     @admin.action(description="Annuler")
     def mark_cancelled(self, request, queryset):
-        updated = queryset.update(status=Order.Status.CANCELLED)
-        self.message_user(request, f"{updated} commande(s) annulée(s)", level=messages.WARNING)
+        self._transition(request, queryset, Order.Status.CANCELLED, "annulée(s)")
+
+    def _transition(self, request, queryset, target: str, label: str) -> None:
+        """Applique la transition via le service groupé, en tâche de fond au-delà du seuil."""
+
+        order_ids = list(queryset.values_list("pk", flat=True))
+        if len(order_ids) > settings.ORDER_ACTIONS_SYNC_LIMIT:
+            job = enqueue(transition_orders_task, order_ids, target, user_id=request.user.pk, user=request.user)
+            url = reverse("admin:core_backgroundjob_change", args=[job.pk])
+            message = format_html(
+                '{} commande(s) traitée(s) en tâche de fond : <a href="{}">suivre le job</a>.', len(order_ids), url
+            )
+            self.message_user(request, message, level=messages.INFO)
+            return
+        result = transition_orders(order_ids, target, created_by=request.user)
+        if result.done:
+            self.message_user(request, f"{len(result.done)} commande(s) {label}", level=messages.SUCCESS)
+        if result.failures:
+            shown = [f"{code} : {reason}" for code, reason in list(result.failures.items())[:10]]
+            more = len(result.failures) - len(shown)
+            if more:
+                shown.append(f"… (+{more})")
+            summary = f"{len(result.failures)} commande(s) refusée(s) — " + " ; ".join(shown)
+            self.message_user(request, summary, level=messages.WARNING)
 
 
 @admin.register(Payment)
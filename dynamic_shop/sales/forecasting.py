@@ -0,0 +1,154 @@
+"""Prévision de la demande et calcul automatique des seuils de réapprovisionnement.
+
+L'historique des lignes de commande est agrégé par produit et par jour en une
+requête par tranche de produits, chargé dans une matrice NumPy (produits × jours)
+puis traité en une passe vectorisée :
+
+* demande journalière ``d`` : moyenne mobile sur les ``window_days`` derniers jours ;
+* variabilité ``σ`` : écart-type de la demande journalière sur tout l'historique ;
+* seuil d'alerte : ``d × L + z × σ × √L`` avec ``L`` le délai de réapprovisionnement
+  du produit et ``z`` le facteur de niveau de service ;
+* quantité de réapprovisionnement : ``d × cover_days``.
+
+Les produits sans aucune vente sur la période conservent leurs valeurs saisies.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from dynamic_shop.inventory.coalescing import mark_reorder_check
+from dynamic_shop.inventory.models import Product, case_by_pk
+
+from .models import Order, OrderItem
+
+DEMAND_STATUSES = (Order.Status.CONFIRMED, Order.Status.PAID, Order.Status.SHIPPED)
+
+
+@dataclass
+class ReorderSuggestion:
+    """Seuils calculés pour un produit, comparés aux valeurs enregistrées."""
+
+    product_id: int
+    sku: str
+    daily_demand: float
+    demand_std: float
+    reorder_level: int
+    reorder_qty: int
+    previous_level: int
+    previous_qty: int
+
+    @property
+    def changed(self) -> bool:
+        return (self.reorder_level, self.reorder_qty) != (self.previous_level, self.previous_qty)
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def demand_matrix(product_ids: np.ndarray, start: date, days: int) -> np.ndarray:
+    """Charge la demande journalière de produits triés par identifiant (une requête).
+
+    La ligne ``i`` correspond à ``product_ids[i]`` et la colonne ``j`` au jour
+    ``start + j`` ; seules les commandes confirmées, payées ou expédiées comptent.
+    """
+
+    rows = list(
+        OrderItem.objects.filter(
+            product_id__in=product_ids.tolist(),
+            order__status__in=DEMAND_STATUSES,
+            order__created_at__gte=_day_start(start),
+            order__created_at__lt=_day_start(start + timedelta(days=days)),
+        )
+        .annotate(day=TruncDate("order__created_at", tzinfo=timezone.get_current_timezone()))
+        .values_list("product_id", "day")
+        .annotate(total=Sum("quantity"))
+        .order_by()
+    )
+    matrix = np.zeros((len(product_ids), days), dtype=np.float64)
+    if rows:
+        products, moved_on, totals = zip(*rows)
+        positions = np.searchsorted(product_ids, np.fromiter(products, dtype=np.int64, count=len(rows)))
+        offsets = (np.array(moved_on, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+        matrix[positions, offsets] = np.fromiter(totals, dtype=np.float64, count=len(rows))
+    return matrix
+
+
+def compute_reorder_points(
+    product_ids: Optional[Iterable[int]] = None,
+    until: Optional[date] = None,
+    history_days: int = 365,
+    window_days: int = 90,
+    service_level_z: float = 1.65,
+    cover_days: int = 30,
+    apply: bool = True,
+    chunk_size: int = 5000,
+) -> List[ReorderSuggestion]:
+    """Calcule (et enregistre si ``apply``) les seuils des produits actifs ayant des ventes.
+
+    L'historique couvre les ``history_days`` jours précédant ``until`` (exclu,
+    par défaut aujourd'hui). Les seuils modifiés sont écrits par ``UPDATE``
+    groupés (une branche ``CASE`` par valeur distincte, plus rapide qu'un
+    ``bulk_update`` ligne à ligne) et les alertes de seuil réévaluées au commit.
+    """
+
+    if history_days <= 1 or not 0 < window_days <= history_days:
+        raise ValueError("La fenêtre de moyenne doit être comprise dans l'historique (au moins deux jours).")
+    until = until or timezone.localdate()
+    start = until - timedelta(days=history_days)
+    products = Product.objects.filter(is_active=True)
+    if product_ids is not None:
+        products = products.filter(pk__in=list(product_ids))
+    catalog = list(products.order_by("pk").values_list("pk", "sku", "lead_time_days", "reorder_level", "reorder_qty"))
+
+    suggestions: List[ReorderSuggestion] = []
+    for offset in range(0, len(catalog), chunk_size):
+        chunk = catalog[offset : offset + chunk_size]
+        ids = np.fromiter((row[0] for row in chunk), dtype=np.int64, count=len(chunk))
+        lead_times = np.fromiter((row[2] for row in chunk), dtype=np.float64, count=len(chunk))
+        matrix = demand_matrix(ids, start, history_days)
+
+        sold = matrix.any(axis=1)
+        daily = matrix[:, -window_days:].mean(axis=1)
+        spread = matrix.std(axis=1, ddof=1)
+        levels = np.ceil(daily * lead_times + service_level_z * spread * np.sqrt(lead_times)).astype(np.int64)
+        quantities = np.ceil(daily * cover_days).astype(np.int64)
+
+        for i in np.flatnonzero(sold).tolist():
+            pk, sku, _, level, quantity = chunk[i]
+            suggestions.append(
+                ReorderSuggestion(
+                    product_id=pk,
+                    sku=sku,
+                    daily_demand=float(daily[i]),
+                    demand_std=float(spread[i]),
+                    reorder_level=int(levels[i]),
+                    reorder_qty=int(quantities[i]),
+                    previous_level=level,
+                    previous_qty=quantity,
+                )
+            )
+
+    changed = [suggestion for suggestion in suggestions if suggestion.changed]
+    if apply and changed:
+        with transaction.atomic():
+            new_levels = {item.product_id: item.reorder_level for item in changed}
+            new_quantities = {item.product_id: item.reorder_qty for item in changed}
+            now = timezone.now()
+            for offset in range(0, len(changed), chunk_size):
+                pks = [item.product_id for item in changed[offset : offset + chunk_size]]
+                Product.objects.filter(pk__in=pks).update(
+                    reorder_level=case_by_pk(new_levels, pks),
+                    reorder_qty=case_by_pk(new_quantities, pks),
+                    updated_at=now,
+                )
+            mark_reorder_check(item.product_id for item in changed)
+    return suggestions
@@ -0,0 +1,205 @@
+"""Import en flux de fichiers de commandes (NDJSON ou CSV).
+
+Le fichier est lu ligne à ligne et traité par tranches de ``chunk_size``
+commandes : clients, produits (par SKU) et entrepôts sont résolus via des caches
+complétés par une requête par tranche, les commandes valides reçoivent un bloc
+de codes puis sont insérées avec leurs lignes par ``bulk_create``. Un résultat
+est produit par commande au fil de l'eau ; la mémoire consommée dépend de la
+taille d'une tranche, pas de celle du fichier.
+
+Formats acceptés :
+
+* NDJSON : un objet par ligne ``{"reference", "customer", "warehouse", "notes",
+  "items": [{"sku", "quantity", "unit_price"}, ...]}`` ;
+* CSV : une ligne de commande par ligne (colonnes ``reference``, ``customer``,
+  ``warehouse``, ``sku``, ``quantity``, ``unit_price``, ``notes``), les lignes
+  consécutives partageant une même ``reference`` formant une commande.
+
+``customer`` et ``warehouse`` désignent un identifiant ou un nom.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import groupby, islice
+from typing import IO, Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q
+
+from dynamic_shop.inventory.models import Product, Warehouse
+
+from .models import Customer, Order, OrderItem, assign_order_codes
+
+Record = Tuple[int, Mapping[str, Any]]
+
+
+def read_ndjson(stream: IO[bytes]) -> Iterator[Record]:
+    """Lit un fichier NDJSON : une commande par ligne non vide."""
+
+    for number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else {"_error": "JSON invalide."}
+
+
+def read_csv(stream: IO[bytes]) -> Iterator[Record]:
+    """Lit un fichier CSV et regroupe les lignes consécutives d'une même ``reference``."""
+
+    rows = enumerate(csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")), start=2)
+    # Sans référence, chaque ligne est une commande à elle seule.
+    grouped = groupby(rows, key=lambda numbered: (numbered[1].get("reference") or "").strip() or numbered[0])
+    for _, group in grouped:
+        group = list(group)
+        number, first = group[0]
+        yield number, {
+            "reference": (first.get("reference") or "").strip(),
+            "customer": first.get("customer"),
+            "warehouse": first.get("warehouse"),
+            "notes": first.get("notes") or "",
+            "items": [
+                {"sku": row.get("sku"), "quantity": row.get("quantity"), "unit_price": row.get("unit_price")}
+                for _, row in group
+            ],
+        }
+
+
+def _reference(value: Any) -> str:
+    return str(value if value is not None else "").strip()
+
+
+@dataclass
+class LookupCache:
+    """Résolution mémorisée des clients, produits et entrepôts désignés dans l'import."""
+
+    customers: Dict[str, Customer] = field(default_factory=dict)
+    products: Dict[str, Product] = field(default_factory=dict)
+    warehouses: Dict[str, Warehouse] = field(default_factory=dict)
+
+    @staticmethod
+    def _by_id_or_name(model, cache: Dict[str, Any], references: Iterable[str]) -> None:
+        missing = {reference for reference in references if reference and reference not in cache}
+        if not missing:
+            return
+        ids = {reference for reference in missing if reference.isdigit()}
+        for instance in model.objects.filter(Q(pk__in=ids) | Q(name__in=missing - ids)).order_by("pk"):
+            cache.setdefault(str(instance.pk), instance)
+            cache.setdefault(instance.name, instance)
+
+    def load(self, records: Iterable[Mapping[str, Any]]) -> None:
+        """Complète les caches pour une tranche (au plus une requête par modèle)."""
+
+        records = list(records)
+        self._by_id_or_name(Customer, self.customers, (_reference(record.get("customer")) for record in records))
+        self._by_id_or_name(Warehouse, self.warehouses, (_reference(record.get("warehouse")) for record in records))
+        skus = {
+            _reference(item.get("sku"))
+            for record in records
+            for item in record.get("items") or []
+            if isinstance(item, Mapping)
+        }
+        missing = skus - self.products.keys()
+        if missing:
+            self.products.update(Product.objects.in_bulk(missing, field_name="sku"))
+
+
+def _build_order(record: Mapping[str, Any], cache: LookupCache) -> Tuple[Order, List[OrderItem]]:
+    """Valide une commande importée ; lève ``ValueError`` avec un message explicite."""
+
+    if "_error" in record:
+        raise ValueError(record["_error"])
+    customer = cache.customers.get(_reference(record.get("customer")))
+    if customer is None:
+        raise ValueError(f"Client inconnu : {_reference(record.get('customer')) or '(vide)'}.")
+    warehouse = cache.warehouses.get(_reference(record.get("warehouse")))
+    if warehouse is None:
+        raise ValueError(f"Entrepôt inconnu : {_reference(record.get('warehouse')) or '(vide)'}.")
+    items = record.get("items")
+    if not isinstance(items, list) or not items:
+        raise ValueError("La commande doit contenir au moins une ligne.")
+
+    lines: List[OrderItem] = []
+    for item in items:
+        if not isinstance(item, Mapping):
+            raise ValueError("Ligne de commande invalide.")
+        sku = _reference(item.get("sku"))
+        product = cache.products.get(sku)
+        if product is None:
+            raise ValueError(f"SKU inconnu : {sku or '(vide)'}.")
+        try:
+            quantity = int(_reference(item.get("quantity")))
+            unit_price = Decimal(_reference(item.get("unit_price")))
+        except (ValueError, InvalidOperation):
+            raise ValueError(f"{sku} : quantité ou prix unitaire invalide.") from None
+        # ``NaN`` ne se compare pas : la finitude est vérifiée d'abord.
+        if quantity <= 0 or not unit_price.is_finite() or unit_price < 0:
+            raise ValueError(f"{sku} : quantité ou prix unitaire invalide.")
+        line = OrderItem(product=product, quantity=quantity, unit_price=unit_price)
+        line.compute_total()
+        lines.append(line)
+
+    order = Order(
+        customer=customer,
+        warehouse=warehouse,
+        notes=str(record.get("notes") or ""),
+        total_amount=sum((line.line_total for line in lines), Decimal("0")),
+    )
+    return order, lines
+
+
+@transaction.atomic
+def _create_orders(valid: List[Tuple[Order, List[OrderItem]]]) -> None:
+    orders = [order for order, _ in valid]
+    assign_order_codes(orders)
+    Order.objects.bulk_create(orders)
+    lines = []
+    for order, items in valid:
+        for line in items:
+            line.order = order
+            lines.append(line)
+    OrderItem.objects.bulk_create(lines, batch_size=1000)
+
+
+def import_orders(
+    records: Iterable[Record], chunk_size: int = 500, cache: Optional[LookupCache] = None
+) -> Iterator[Dict[str, Any]]:
+    """Crée les commandes d'un flux de ``(numéro de ligne, commande)`` et produit un résultat par commande.
+
+    Chaque tranche est validée puis insérée dans sa propre transaction : une
+    commande invalide est signalée sans bloquer les autres, et les tranches
+    déjà traitées restent acquises si le flux est interrompu.
+    """
+
+    cache = cache or LookupCache()
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        cache.load(record for _, record in chunk)
+        results: List[Dict[str, Any]] = []
+        valid: List[Tuple[Order, List[OrderItem]]] = []
+        for number, record in chunk:
+            result: Dict[str, Any] = {"line": number, "reference": _reference(record.get("reference"))}
+            try:
+                built = _build_order(record, cache)
+            except ValueError as exc:
+                result.update(status="error", detail=str(exc))
+            else:
+                valid.append(built)
+                result["order"] = built[0]
+            results.append(result)
+        if valid:
+            _create_orders(valid)
+        for result in results:
+            order = result.pop("order", None)
+            if order is not None:
+                result.update(status="created", code=order.code, id=order.pk, total_amount=str(order.total_amount))
+            yield result
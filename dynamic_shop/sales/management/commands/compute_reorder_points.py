@@ -0,0 +1,46 @@
+"""Recalcule les seuils de réapprovisionnement à partir de l'historique des ventes."""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from dynamic_shop.sales.forecasting import compute_reorder_points
+
+
+class Command(BaseCommand):
+    help = "Calcule reorder_level et reorder_qty des produits actifs à partir de la demande observée."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--history-days", type=int, default=365, help="Jours d'historique chargés.")
+        parser.add_argument("--window-days", type=int, default=90, help="Fenêtre de la moyenne mobile.")
+        parser.add_argument("--service-level-z", type=float, default=1.65, help="Facteur de niveau de service.")
+        parser.add_argument("--cover-days", type=int, default=30, help="Jours de demande couverts par commande.")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Affiche les seuils proposés sans les enregistrer.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        try:
+            suggestions = compute_reorder_points(
+                history_days=options["history_days"],
+                window_days=options["window_days"],
+                service_level_z=options["service_level_z"],
+                cover_days=options["cover_days"],
+                apply=not dry_run,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        changed = [suggestion for suggestion in suggestions if suggestion.changed]
+        if dry_run:
+            for suggestion in changed:
+                self.stdout.write(
+                    f"{suggestion.sku} : seuil {suggestion.previous_level} → {suggestion.reorder_level}, "
+                    f"quantité {suggestion.previous_qty} → {suggestion.reorder_qty}"
+                )
+            self.stdout.write(self.style.WARNING(f"{len(changed)} produit(s) à ajuster (aucune modification)."))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f"{len(changed)} produit(s) mis à jour sur {len(suggestions)} analysé(s).")
+            )
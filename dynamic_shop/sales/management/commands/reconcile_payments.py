@@ -0,0 +1,32 @@
+"""Recalcule le montant payé des commandes et signale les écarts."""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from dynamic_shop.sales.services import reconcile_order_payments
+
+
+class Command(BaseCommand):
+    help = "Recalcule Order.paid_amount à partir des paiements et signale les écarts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Affiche les écarts sans corriger les commandes.",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        drifts = reconcile_order_payments(fix=not dry_run)
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS("Aucun écart de paiement détecté."))
+            return
+        for drift in drifts:
+            self.stdout.write(
+                f"{drift.code} : enregistré {drift.recorded}, paiements {drift.actual} (écart {drift.delta:+})"
+            )
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"{len(drifts)} commande(s) en écart (aucune correction)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{len(drifts)} commande(s) corrigée(s)."))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-16 20:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_reorder_alert'),
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderItemAllocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(verbose_name='Quantité')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='order_allocations', to='inventory.batch')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='allocations', to='sales.orderitem')),
+            ],
+            options={
+                'verbose_name': 'Allocation de lot',
+                'verbose_name_plural': 'Allocations de lot',
+                'unique_together': {('item', 'batch')},
+            },
+        ),
+    ]
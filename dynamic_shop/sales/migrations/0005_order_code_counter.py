@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_allocation_reservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderCodeCounter',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False, verbose_name='Jour')),
+                ('last_value', models.PositiveIntegerField(default=0, verbose_name='Dernier numéro')),
+            ],
+            options={
+                'verbose_name': 'Compteur de codes commande',
+                'verbose_name_plural': 'Compteurs de codes commande',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:33
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_paid_amount(apps, schema_editor):
+    Order = apps.get_model("sales", "Order")
+    Payment = apps.get_model("sales", "Payment")
+    paid = (
+        Payment.objects.filter(order=OuterRef("pk"))
+        .values("order")
+        .annotate(total=Sum("amount"))
+        .values("total")
+    )
+    Order.objects.update(
+        paid_amount=Coalesce(Subquery(paid), Value(Decimal("0")), output_field=models.DecimalField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_product_lead_time'),
+        ('sales', '0005_order_code_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='paid_amount',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=12, verbose_name='Montant payé'),
+        ),
+        migrations.RunPython(backfill_paid_amount, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('paid_amount__lt', models.F('total_amount'))), fields=['customer', 'created_at'], name='order_outstanding_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-16 22:54
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0006_order_paid_amount'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='orderitem',
+            unique_together=set(),
+        ),
+    ]
@@ -1,14 +1,16 @@
 """Modèles de gestion commerciale."""
 from __future__ import annotations
 
+from datetime import date
 from decimal import Decimal
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-from dynamic_shop.inventory.models import Batch, Product, Warehouse
+from dynamic_shop.inventory.models import Batch, Product, StockReservation, Warehouse
 
 
 class Customer(models.Model):
@@ -44,14 +46,34 @@ class Order(models.Model):
     warehouse = models.ForeignKey(Warehouse, on_delete=models.PROTECT, related_name="orders")
     status = models.CharField("Statut", max_length=12, choices=Status.choices, default=Status.DRAFT)
     total_amount = models.DecimalField("Montant total", max_digits=12, decimal_places=2, default=Decimal("0"))
+    paid_amount = models.DecimalField("Montant payé", max_digits=12, decimal_places=2, default=Decimal("0"))
     created_at = models.DateTimeField("Créée le", auto_now_add=True)
     updated_at = models.DateTimeField("Mise à jour le", auto_now=True)
     notes = models.TextField("Notes", blank=True)
 
+    # Machine à états : statuts atteignables depuis chaque statut.
+    TRANSITIONS = {
+        Status.DRAFT: {Status.CONFIRMED, Status.CANCELLED},
+        Status.CONFIRMED: {Status.PAID, Status.SHIPPED, Status.CANCELLED},
+        Status.PAID: {Status.SHIPPED, Status.CANCELLED},
+        Status.SHIPPED: set(),
+        Status.CANCELLED: set(),
+    }
+
     class Meta:
         verbose_name = "Commande"
         verbose_name_plural = "Commandes"
         ordering = ("-created_at",)
+        indexes = [
+            models.Index(fields=["created_at"], name="order_created_idx"),
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+            # Commandes non soldées : partiel sur le reste à payer lorsque le moteur le permet.
+            models.Index(
+                fields=["customer", "created_at"],
+                condition=models.Q(paid_amount__lt=models.F("total_amount")),
+                name="order_outstanding_idx",
+            ),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return self.code
@@ -70,6 +92,15 @@ class Order(models.Model):
         value = self.compute_totals()
         self.save(update_fields=["total_amount", "updated_at"])
 
+    @property
+    def balance(self) -> Decimal:
+        """Reste à payer (négatif en cas de trop-perçu)."""
+
+        return self.total_amount - self.paid_amount
+
+    def can_transition_to(self, status: str) -> bool:
+        return status in self.TRANSITIONS.get(self.status, ())
+
     @property
     def is_editable(self) -> bool:
         return self.status == self.Status.DRAFT
@@ -79,8 +110,68 @@ class Order(models.Model):
             raise ValidationError("Le montant ne peut être négatif.")
 
 
+class OrderCodeCounter(models.Model):
+    """Dernier numéro attribué aux codes commande d'une journée."""
+
+    day = models.DateField("Jour", primary_key=True)
+    last_value = models.PositiveIntegerField("Dernier numéro", default=0)
+
+    class Meta:
+        verbose_name = "Compteur de codes commande"
+        verbose_name_plural = "Compteurs de codes commande"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.day:%Y%m%d} : {self.last_value}"
+
+
+def _highest_code_number(day: date) -> int:
+    """Plus grand numéro déjà utilisé pour ``day`` (commandes antérieures au compteur)."""
+
+    codes = Order.objects.filter(code__startswith=f"ORD-{day:%Y%m%d}-").values_list("code", flat=True)
+    return max((int(code.rsplit("-", 1)[-1]) for code in codes), default=0)
+
+
+def allocate_order_codes(count: int = 1, day: Optional[date] = None) -> List[str]:
+    """Réserve ``count`` codes consécutifs ``ORD-YYYYMMDD-XXXX`` pour la journée.
+
+    Le compteur est incrémenté par un ``UPDATE`` atomique : la ligne reste
+    verrouillée jusqu'à la fin de la transaction appelante, si bien que deux
+    créations concurrentes obtiennent des numéros distincts. Réserver un bloc
+    (``count > 1``) ne coûte que deux requêtes quel que soit sa taille.
+    """
+
+    if count < 1:
+        raise ValueError("Le nombre de codes à réserver doit être positif.")
+    day = day or timezone.now().date()
+    counters = OrderCodeCounter.objects.filter(day=day)
+    with transaction.atomic():
+        if not counters.update(last_value=models.F("last_value") + count):
+            try:
+                with transaction.atomic():
+                    OrderCodeCounter.objects.create(day=day, last_value=_highest_code_number(day) + count)
+            except IntegrityError:
+                # Compteur créé entre-temps par une transaction concurrente.
+                counters.update(last_value=models.F("last_value") + count)
+        last = counters.values_list("last_value", flat=True).get()
+    return [f"ORD-{day:%Y%m%d}-{number:04d}" for number in range(last - count + 1, last + 1)]
+
+
+def assign_order_codes(orders: Iterable[Order]) -> None:
+    """Attribue en un bloc un code aux commandes qui n'en ont pas (avant ``bulk_create``)."""
+
+    missing = [order for order in orders if not order.code]
+    if missing:
+        for order, code in zip(missing, allocate_order_codes(len(missing))):
+            order.code = code
+
+
 class OrderItem(models.Model):
-    """Ligne de commande associée à un lot de produit."""
+    """Ligne de commande associée à un lot de produit.
+
+    ``batch`` désigne le lot principal ; la répartition complète sur plusieurs
+    lots est portée par ``allocations``. Plusieurs lignes d'une commande peuvent
+    porter le même produit et donc le même lot principal.
+    """
 
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name="items")
     product = models.ForeignKey(Product, on_delete=models.PROTECT)
@@ -92,7 +183,6 @@ class OrderItem(models.Model):
     class Meta:
         verbose_name = "Ligne de commande"
         verbose_name_plural = "Lignes de commande"
-        unique_together = ("order", "product", "batch")
 
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.order.code} - {self.product.name}"
@@ -108,6 +198,25 @@ class OrderItem(models.Model):
         return self.line_total
 
 
+class OrderItemAllocation(models.Model):
+    """Part d'une ligne de commande prélevée sur un lot donné (allocation FEFO)."""
+
+    item = models.ForeignKey(OrderItem, on_delete=models.CASCADE, related_name="allocations")
+    batch = models.ForeignKey(Batch, on_delete=models.PROTECT, related_name="order_allocations")
+    quantity = models.PositiveIntegerField("Quantité")
+    reservation = models.OneToOneField(
+        StockReservation, on_delete=models.SET_NULL, blank=True, null=True, related_name="allocation"
+    )
+
+    class Meta:
+        verbose_name = "Allocation de lot"
+        verbose_name_plural = "Allocations de lot"
+        unique_together = ("item", "batch")
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.item} - {self.batch.batch_code} ({self.quantity})"
+
+
 class Payment(models.Model):
     """Paiements associés à une commande."""
 
@@ -130,6 +239,32 @@ class Payment(models.Model):
     def __str__(self) -> str:  # pragma: no cover
         return f"Paiement {self.amount} - {self.order.code}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):  # type: ignore[override]
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_amount = instance.__dict__.get("amount")
+        instance._loaded_order_id = instance.__dict__.get("order_id")
+        return instance
+
     def clean(self) -> None:
         if self.amount <= 0:
             raise ValidationError("Le montant du paiement doit être positif.")
+
+
+def shift_paid_amounts(deltas: Dict[int, Decimal]) -> None:
+    """Répercute des deltas de paiement sur ``Order.paid_amount`` par incréments ``F()``."""
+
+    now = timezone.now()
+    for order_id, delta in deltas.items():
+        if delta:
+            Order.objects.filter(pk=order_id).update(paid_amount=models.F("paid_amount") + delta, updated_at=now)
+
+
+def refresh_paid_amounts(order_ids: Iterable[int]) -> None:
+    """Recalcule ``paid_amount`` depuis les paiements (delta inconnu)."""
+
+    paid = Payment.objects.filter(order=models.OuterRef("pk")).values("order").annotate(total=models.Sum("amount"))
+    Order.objects.filter(pk__in=list(order_ids)).update(
+        paid_amount=Coalesce(models.Subquery(paid.values("total")), models.Value(Decimal("0"))),
+        updated_at=timezone.now(),
+    )
@@ -1,16 +1,36 @@
 """Services métiers pour les ventes."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import timedelta
 from decimal import Decimal
-from typing import Iterable
+from typing import Callable, Dict, Iterable, List, Tuple
 
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
 
-from dynamic_shop.inventory.models import Product, Warehouse
-from dynamic_shop.inventory.services import reserve_for_order as reserve_batch, ship_order as ship_batch
+from dynamic_shop.inventory.models import (
+    FEFO_ORDERING,
+    Batch,
+    InsufficientStockError,
+    Product,
+    StockMovement,
+    StockReservation,
+    Warehouse,
+    allocate_fefo,
+)
+from dynamic_shop.inventory.services import (
+    apply_movements_bulk,
+    consume_reservations,
+    release_reservations,
+    reserve_batches_bulk,
+)
 
-from .models import Customer, Order, OrderItem
+from .models import Customer, Order, OrderItem, OrderItemAllocation, Payment
 
 
 @dataclass
@@ -22,51 +42,105 @@ class OrderItemData:
 
 @transaction.atomic
 def create_order(customer: Customer, warehouse: Warehouse, items: Iterable[OrderItemData], notes: str = "") -> Order:
-    """Crée une commande à partir d'une structure simple."""
-
-    order = Order.objects.create(customer=customer, warehouse=warehouse, notes=notes)
-    for item in items:
-        OrderItem.objects.create(
-            order=order,
-            product=item.product,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-        )
-    order.refresh_total()
+    """Crée une commande à partir d'une structure simple.
+
+    Les totaux de ligne sont calculés en mémoire et les lignes insérées par
+    ``bulk_create`` : le total de commande est connu avant l'insertion et aucun
+    signal de ligne n'est déclenché.
+    """
+
+    lines = [OrderItem(product=item.product, quantity=item.quantity, unit_price=item.unit_price) for item in items]
+    for line in lines:
+        line.compute_total()
+    order = Order.objects.create(
+        customer=customer,
+        warehouse=warehouse,
+        notes=notes,
+        total_amount=sum((line.line_total for line in lines), Decimal("0")),
+    )
+    for line in lines:
+        line.order = order
+    OrderItem.objects.bulk_create(lines)
     return order
 
 
-@transaction.atomic
 def confirm_order(order: Order) -> Order:
-    """Réserve les stocks nécessaires et passe la commande en confirmé."""
+    """Réserve les stocks nécessaires et passe la commande en confirmé.
+
+    Les lots candidats de tous les produits sont lus en une requête et alloués en
+    mémoire ; les lots retenus, réservations et allocations sont écrits en masse,
+    si bien que le nombre de requêtes ne dépend pas du nombre de lignes. Chaque
+    allocation FEFO donne lieu à une :class:`StockReservation` expirant après
+    ``STOCK_RESERVATION_TTL_HOURS`` : le stock réservé n'est plus proposé aux
+    commandes suivantes.
+    """
 
     if order.status != Order.Status.DRAFT:
         raise ValueError("Seules les commandes brouillon peuvent être confirmées.")
-    for item in order.items.select_related("product"):
-        batch = reserve_batch(item.product, item.quantity, order.warehouse)
-        item.batch = batch
-        item.save(update_fields=["batch"])
-    order.status = Order.Status.CONFIRMED
-    order.save(update_fields=["status", "updated_at"])
-    return order
+    return _single_transition(order, Order.Status.CONFIRMED)
 
 
 @transaction.atomic
+def ship_orders(order_ids: Iterable[int], created_by=None) -> List[Order]:
+    """Expédie une vague de commandes en une seule passe.
+
+    Les réservations de toutes les commandes sont soldées ensemble, puis une
+    sortie par allocation est enregistrée via
+    :func:`~dynamic_shop.inventory.services.apply_movements_bulk` : chaque lot
+    n'est décrémenté qu'une fois pour le cumul de la vague et les mouvements
+    sont insérés en masse. Les statuts basculent par un seul ``UPDATE``.
+    """
+
+    orders = list(Order.objects.select_for_update().filter(pk__in=list(order_ids)).order_by("pk"))
+    if not orders:
+        return []
+    blocked = [order.code for order in orders if order.status not in {Order.Status.CONFIRMED, Order.Status.PAID}]
+    if blocked:
+        raise ValueError(f"Commande(s) non confirmée(s) : {', '.join(blocked)}.")
+    by_pk = {order.pk: order for order in orders}
+    consume_reservations(
+        OrderItemAllocation.objects.filter(item__order__in=orders, reservation__isnull=False).values_list(
+            "reservation_id", flat=True
+        )
+    )
+    movements = []
+    for item in OrderItem.objects.filter(order__in=orders).prefetch_related("allocations").order_by("pk"):
+        order = by_pk[item.order_id]
+        if item.batch_id is None:
+            raise ValueError(f"Chaque ligne de {order.code} doit avoir un lot réservé avant expédition.")
+        lots = [(allocation.batch_id, allocation.quantity) for allocation in item.allocations.all()]
+        movements.extend(
+            StockMovement(
+                product_id=item.product_id,
+                batch_id=batch_id,
+                movement_type=StockMovement.MovementType.OUT,
+                quantity=quantity,
+                from_warehouse_id=order.warehouse_id,
+                reason=f"Expédition commande {order.code}",
+                created_by=created_by,
+            )
+            for batch_id, quantity in lots or [(item.batch_id, item.quantity)]
+        )
+    apply_movements_bulk(movements)
+    now = timezone.now()
+    Order.objects.filter(pk__in=by_pk).update(status=Order.Status.SHIPPED, updated_at=now)
+    for order in orders:
+        order.status = Order.Status.SHIPPED
+        order.updated_at = now
+    return orders
+
+
 def ship_order(order: Order) -> Order:
-    """Expédie la commande en déduisant définitivement les stocks."""
+    """Expédie la commande en soldant ses réservations et en déduisant les stocks."""
 
     if order.status not in {Order.Status.CONFIRMED, Order.Status.PAID}:
         raise ValueError("La commande doit être confirmée avant expédition.")
-    for item in order.items.select_related("product", "batch"):
-        if item.batch is None:
-            raise ValueError("Chaque ligne doit avoir un lot réservé avant expédition.")
-        ship_batch(item.product, item.batch, item.quantity, order.warehouse)
-    order.status = Order.Status.SHIPPED
-    order.save(update_fields=["status", "updated_at"])
+    (shipped,) = ship_orders([order.pk])
+    order.status = shipped.status
+    order.updated_at = shipped.updated_at
     return order
 
 
-@transaction.atomic
 def cancel_order(order: Order) -> Order:
     """Annule une commande et libère les réservations éventuelles."""
 
@@ -74,10 +148,280 @@ def cancel_order(order: Order) -> Order:
         return order
     if order.status == Order.Status.SHIPPED:
         raise ValueError("Impossible d'annuler une commande déjà expédiée.")
-    for item in order.items.select_related("batch", "product"):
-        if item.batch:
-            item.batch = None
-            item.save(update_fields=["batch"])
-    order.status = Order.Status.CANCELLED
-    order.save(update_fields=["status", "updated_at"])
+    return _single_transition(order, Order.Status.CANCELLED)
+
+
+@dataclass
+class OrderBatchResult:
+    """Bilan d'une transition appliquée à une sélection de commandes."""
+
+    done: List[Order] = field(default_factory=list)
+    failures: Dict[str, str] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"done": [order.code for order in self.done], "failures": self.failures}
+
+
+def _confirm_chunk(orders: List[Order], result: OrderBatchResult, created_by=None) -> None:
+    """Confirme des commandes brouillon en partageant une lecture des lots entre elles.
+
+    Le disponible de chaque lot est décompté en mémoire d'une commande à
+    l'autre et les réservations de toute la tranche sont posées en une passe.
+    Si une réservation concurrente a entre-temps consommé le stock, la tranche
+    est reprise commande par commande afin de n'écarter que les commandes
+    concernées.
+    """
+
+    if not orders:
+        return
+    items: Dict[int, List[OrderItem]] = defaultdict(list)
+    for item in OrderItem.objects.filter(order__in=orders).select_related("product").order_by("pk"):
+        items[item.order_id].append(item)
+    candidates: Dict[Tuple[int, int], List[Batch]] = defaultdict(list)
+    for batch in Batch.objects.filter(
+        product_id__in={item.product_id for lines in items.values() for item in lines},
+        warehouse_id__in={order.warehouse_id for order in orders},
+        remaining_qty__gt=0,
+    ).order_by(*FEFO_ORDERING):
+        candidates[(batch.warehouse_id, batch.product_id)].append(batch)
+    available = {batch.pk: batch.available_qty for batches in candidates.values() for batch in batches}
+
+    allocated: List[Tuple[Order, List[List[Tuple[Batch, int]]]]] = []
+    for order in orders:
+        splits: List[List[Tuple[Batch, int]]] = []
+        for item in items[order.pk]:
+            lots = allocate_fefo(candidates[(order.warehouse_id, item.product_id)], item.quantity, available)
+            if not lots:
+                result.failures[order.code] = (
+                    f"Stock insuffisant pour {item.product.sku} dans l'entrepôt {order.warehouse}."
+                )
+                # Commande écartée : son allocation est rendue au disponible partagé.
+                for batch, quantity in (split for done in splits for split in done):
+                    available[batch.pk] += quantity
+                break
+            splits.append(lots)
+        else:
+            allocated.append((order, splits))
+
+    ttl = timedelta(hours=settings.STOCK_RESERVATION_TTL_HOURS)
+
+    def reserve(group):
+        return reserve_batches_bulk(
+            [(order.code, [split for lots in splits for split in lots]) for order, splits in group], ttl=ttl
+        )
+
+    # ``reserve_batches_bulk`` est atomique : un échec n'annule que son propre point de sauvegarde.
+    try:
+        reserved = list(zip(allocated, reserve(allocated)))
+    except InsufficientStockError:
+        reserved = []
+        for entry in allocated:
+            try:
+                reserved.extend(zip([entry], reserve([entry])))
+            except InsufficientStockError:
+                result.failures[entry[0].code] = f"Stock insuffisant pour la commande {entry[0].code}."
+
+    lines, allocations = [], []
+    for (order, splits), reservations in reserved:
+        remaining = iter(reservations)
+        for item, lots in zip(items[order.pk], splits):
+            item.batch = lots[0][0]
+            lines.append(item)
+            allocations.extend(
+                OrderItemAllocation(item=item, batch=batch, quantity=quantity, reservation=next(remaining))
+                for batch, quantity in lots
+            )
+    # Pas de ``save()`` par ligne : le lot ne change pas le total de la commande.
+    OrderItem.objects.bulk_update(lines, ["batch"], batch_size=500)
+    OrderItemAllocation.objects.bulk_create(allocations, batch_size=1000)
+    _set_status([order for (order, _), _ in reserved], Order.Status.CONFIRMED, result)
+
+
+def _ship_chunk(orders: List[Order], result: OrderBatchResult, created_by=None) -> None:
+    """Expédie la tranche en une vague, après avoir écarté les commandes inexpédiables.
+
+    Lignes, allocations et lots sont lus en trois requêtes. Une commande dont
+    une ligne n'a pas de lot, ou dont les sorties dépassent le disponible des
+    lots (stock libre, plus ses propres réservations, moins ce que prennent les
+    commandes déjà retenues), est consignée en échec. Les autres partent
+    ensemble par un seul appel à :func:`ship_orders`.
+    """
+
+    if not orders:
+        return
+    demand: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    held: Dict[int, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    allocated_items = set()
+    for item_id, order_id, batch_id, quantity, reservation_batch_id, reserved, status in (
+        OrderItemAllocation.objects.filter(item__order__in=orders).values_list(
+            "item_id",
+            "item__order_id",
+            "batch_id",
+            "quantity",
+            "reservation__batch_id",
+            "reservation__quantity",
+            "reservation__status",
+        )
+    ):
+        allocated_items.add(item_id)
+        demand[order_id][batch_id] += quantity
+        if status == StockReservation.Status.ACTIVE:
+            held[order_id][reservation_batch_id] += reserved
+    unassigned = set()
+    for item_id, order_id, batch_id, quantity in OrderItem.objects.filter(order__in=orders).values_list(
+        "pk", "order_id", "batch_id", "quantity"
+    ):
+        if batch_id is None:
+            unassigned.add(order_id)
+        elif item_id not in allocated_items:
+            demand[order_id][batch_id] += quantity
+
+    batch_ids = {pk for lots in (*demand.values(), *held.values()) for pk in lots}
+    free, codes = {}, {}
+    for pk, code, remaining, reserved in Batch.objects.filter(pk__in=batch_ids).values_list(
+        "pk", "batch_code", "remaining_qty", "reserved_qty"
+    ):
+        free[pk], codes[pk] = remaining - reserved, code
+
+    wave = []
+    for order in orders:
+        if order.pk in unassigned:
+            result.failures[order.code] = f"Chaque ligne de {order.code} doit avoir un lot réservé avant expédition."
+            continue
+        # Solde de chaque lot si la commande part : ses réservations reviennent, ses sorties s'imputent.
+        balance = {
+            pk: free.get(pk, 0) + held[order.pk].get(pk, 0) - demand[order.pk].get(pk, 0)
+            for pk in demand[order.pk].keys() | held[order.pk].keys()
+        }
+        short = sorted(codes.get(pk, f"#{pk}") for pk, left in balance.items() if left < 0)
+        if short:
+            result.failures[order.code] = f"Stock insuffisant sur le(s) lot(s) {', '.join(short)}."
+            continue
+        free.update(balance)
+        wave.append(order)
+
+    if not wave:
+        return
+    try:
+        result.done.extend(ship_orders([order.pk for order in wave], created_by=created_by))
+    except (ValueError, ValidationError) as exc:
+        # Stock modifié entre la lecture et la vague : la vague est annulée et consignée.
+        message = " ".join(exc.messages) if isinstance(exc, ValidationError) else str(exc)
+        for order in wave:
+            result.failures[order.code] = message
+
+
+def _cancel_chunk(orders: List[Order], result: OrderBatchResult, created_by=None) -> None:
+    """Annule la tranche : réservations libérées et lots détachés en quelques requêtes."""
+
+    if not orders:
+        return
+    allocations = OrderItemAllocation.objects.filter(item__order__in=orders)
+    release_reservations(allocations.filter(reservation__isnull=False).values_list("reservation_id", flat=True))
+    allocations.delete()
+    OrderItem.objects.filter(order__in=orders, batch__isnull=False).update(batch=None)
+    _set_status(orders, Order.Status.CANCELLED, result)
+
+
+def _set_status(orders: List[Order], status: str, result: OrderBatchResult) -> None:
+    if not orders:
+        return
+    now = timezone.now()
+    Order.objects.filter(pk__in=[order.pk for order in orders]).update(status=status, updated_at=now)
+    for order in orders:
+        order.status = status
+        order.updated_at = now
+    result.done.extend(orders)
+
+
+# Transitions pilotables en masse et motif de refus lorsque ``Order.TRANSITIONS`` les interdit.
+ORDER_TRANSITIONS: Dict[str, Tuple[Callable[..., None], str]] = {
+    Order.Status.CONFIRMED: (_confirm_chunk, "Seules les commandes brouillon peuvent être confirmées."),
+    Order.Status.SHIPPED: (_ship_chunk, "La commande doit être confirmée avant expédition."),
+    Order.Status.CANCELLED: (_cancel_chunk, "Impossible d'annuler une commande déjà expédiée."),
+}
+
+
+def transition_orders(
+    order_ids: Iterable[int], target: str, created_by=None, chunk_size: int = 200
+) -> OrderBatchResult:
+    """Confirme, expédie ou annule une sélection de commandes par tranches.
+
+    Chaque tranche est verrouillée et traitée dans sa propre transaction ; le
+    nombre de requêtes par tranche ne dépend pas du nombre de commandes. Les
+    transitions sont validées par ``Order.TRANSITIONS`` : une commande déjà au
+    statut cible est laissée telle quelle, une commande refusée est consignée
+    dans ``failures`` (code → motif) sans interrompre les autres.
+    """
+
+    if target not in ORDER_TRANSITIONS:
+        raise ValueError(f"Transition non prise en charge : {target}.")
+    handler, refusal = ORDER_TRANSITIONS[target]
+    ids = sorted(set(order_ids))
+    result = OrderBatchResult()
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start : start + chunk_size]
+        with transaction.atomic():
+            orders = list(
+                Order.objects.select_for_update(of=("self",))
+                .select_related("warehouse")
+                .filter(pk__in=chunk)
+                .order_by("pk")
+            )
+            for missing in sorted(set(chunk) - {order.pk for order in orders}):
+                result.failures[f"#{missing}"] = "Commande introuvable."
+            eligible = []
+            for order in orders:
+                if order.status == target:
+                    result.done.append(order)
+                elif order.can_transition_to(target):
+                    eligible.append(order)
+                else:
+                    result.failures[order.code] = refusal
+            handler(eligible, result, created_by=created_by)
+    return result
+
+
+def _single_transition(order: Order, target: str) -> Order:
+    result = transition_orders([order.pk], target)
+    if order.code in result.failures:
+        raise ValueError(result.failures[order.code])
+    (done,) = result.done
+    order.status = done.status
+    order.updated_at = done.updated_at
     return order
+
+
+@dataclass
+class PaymentDrift:
+    """Écart constaté entre ``Order.paid_amount`` et la somme des paiements."""
+
+    order_id: int
+    code: str
+    recorded: Decimal
+    actual: Decimal
+
+    @property
+    def delta(self) -> Decimal:
+        return self.actual - self.recorded
+
+
+def reconcile_order_payments(fix: bool = True, chunk_size: int = 2000) -> List[PaymentDrift]:
+    """Compare ``Order.paid_amount`` aux paiements enregistrés et corrige les écarts en masse."""
+
+    totals = dict(Payment.objects.values_list("order_id").annotate(total=Sum("amount")).order_by())
+    drifts = [
+        PaymentDrift(order_id=pk, code=code, recorded=recorded, actual=totals.get(pk) or Decimal("0"))
+        for pk, code, recorded in Order.objects.order_by("pk")
+        .values_list("pk", "code", "paid_amount")
+        .iterator(chunk_size=chunk_size)
+        if recorded != (totals.get(pk) or Decimal("0"))
+    ]
+    if fix and drifts:
+        now = timezone.now()
+        Order.objects.bulk_update(
+            [Order(pk=drift.order_id, paid_amount=drift.actual, updated_at=now) for drift in drifts],
+            ["paid_amount", "updated_at"],
+            batch_size=chunk_size,
+        )
+    return drifts
@@ -1,27 +1,22 @@
 """Signaux pour automatiser la gestion des commandes."""
 from __future__ import annotations
 
-from decimal import Decimal
-from typing import Any
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterable, Iterator, Optional, Set
 
 from django.db import models
 from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
-from .models import Order, OrderItem, Payment
+from .models import Order, OrderItem, Payment, allocate_order_codes, refresh_paid_amounts, shift_paid_amounts
 
 
 def generate_order_code() -> str:
-    """Génère un code unique de type ORD-YYYYMMDD-XXXX."""
+    """Génère un code unique de type ORD-YYYYMMDD-XXXX (compteur journalier)."""
 
-    today = timezone.now().strftime("%Y%m%d")
-    last_order = Order.objects.filter(code__startswith=f"ORD-{today}").order_by("code").last()
-    if last_order:
-        last_increment = int(last_order.code.split("-")[-1])
-    else:
-        last_increment = 0
-    return f"ORD-{today}-{last_increment + 1:04d}"
+    return allocate_order_codes(1)[0]
 
 
 @receiver(pre_save, sender=Order)
@@ -39,25 +34,85 @@ def compute_line_total(sender, instance: OrderItem, **_: Any) -> None:
     instance.compute_total()
 
 
+# Commandes dont le total reste à recalculer pendant un bloc ``order_totals_muted``.
+_muted_orders: ContextVar[Optional[Set[int]]] = ContextVar("muted_orders", default=None)
+
+
 def _update_order_total(order: Order) -> None:
     order.compute_totals()
     order.save(update_fields=["total_amount", "updated_at"])
 
 
+@contextmanager
+def order_totals_muted() -> Iterator[None]:
+    """Suspend le recalcul du total à chaque ligne modifiée.
+
+    Les commandes touchées dans le bloc sont recalculées une seule fois à la
+    sortie, ce qui évite une agrégation et une sauvegarde par ligne lors des
+    modifications en masse.
+    """
+
+    pending: Set[int] = set()
+    token = _muted_orders.set(pending)
+    try:
+        yield
+    finally:
+        _muted_orders.reset(token)
+    for order in Order.objects.filter(pk__in=pending):
+        _update_order_total(order)
+
+
 @receiver(post_save, sender=OrderItem)
 @receiver(post_delete, sender=OrderItem)
 def refresh_order_total(sender, instance: OrderItem, **_: Any) -> None:
     """Met à jour le total de commande à chaque modification de ligne."""
 
+    pending = _muted_orders.get()
+    if pending is not None:
+        pending.add(instance.order_id)
+        return
     _update_order_total(instance.order)
 
 
+def _mark_paid(order_ids: Iterable[int]) -> None:
+    """Passe en payé les commandes confirmées dont le cumul atteint le total (un ``UPDATE``)."""
+
+    Order.objects.filter(
+        pk__in=list(order_ids), status=Order.Status.CONFIRMED, paid_amount__gte=models.F("total_amount")
+    ).update(status=Order.Status.PAID, updated_at=timezone.now())
+
+
+def _sync_cached_order(instance: Payment) -> None:
+    if Payment.order.is_cached(instance):
+        instance.order.refresh_from_db(fields=["paid_amount", "status", "updated_at"])
+
+
 @receiver(post_save, sender=Payment)
-def update_status_on_payment(sender, instance: Payment, **_: Any) -> None:
-    """Passe la commande en état payé si le cumul atteint le total."""
-
-    order = instance.order
-    total_paid = order.payments.aggregate(total=models.Sum("amount")).get("total") or Decimal("0")
-    if total_paid >= order.total_amount and order.status in {Order.Status.CONFIRMED, Order.Status.PAID}:
-        order.status = Order.Status.PAID
-        order.save(update_fields=["status", "updated_at"])
+def update_paid_amount_on_save(sender, instance: Payment, created: bool, **_: Any) -> None:
+    """Met à jour le montant payé de la commande et son statut sans ré-agréger ses paiements."""
+
+    previous_amount = getattr(instance, "_loaded_amount", None)
+    previous_order_id = getattr(instance, "_loaded_order_id", None)
+    if created:
+        shift_paid_amounts({instance.order_id: instance.amount})
+    elif previous_amount is None or previous_order_id is None:
+        refresh_paid_amounts([instance.order_id])
+    elif previous_order_id != instance.order_id:
+        shift_paid_amounts({previous_order_id: -previous_amount, instance.order_id: instance.amount})
+    else:
+        shift_paid_amounts({instance.order_id: instance.amount - previous_amount})
+    _mark_paid([instance.order_id])
+    instance._loaded_amount = instance.amount
+    instance._loaded_order_id = instance.order_id
+    _sync_cached_order(instance)
+
+
+@receiver(post_delete, sender=Payment)
+def update_paid_amount_on_delete(sender, instance: Payment, **_: Any) -> None:
+    """Retire le paiement supprimé du montant payé de la commande."""
+
+    loaded_amount = getattr(instance, "_loaded_amount", None)
+    if loaded_amount is None:
+        refresh_paid_amounts([instance.order_id])
+    else:
+        shift_paid_amounts({instance.order_id: -loaded_amount})
@@ -0,0 +1,29 @@
+"""Tâches de fond commerciales."""
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from django.contrib.auth.models import User
+
+from dynamic_shop.core.jobs import job_task
+
+from .forecasting import compute_reorder_points
+from .services import ship_orders, transition_orders
+
+
+@job_task
+def compute_reorder_points_task(**params) -> Dict[str, int]:
+    suggestions = compute_reorder_points(**params)
+    return {"analysed": len(suggestions), "updated": sum(suggestion.changed for suggestion in suggestions)}
+
+
+@job_task
+def ship_orders_task(order_ids: List[int], user_id: Optional[int] = None) -> Dict[str, int]:
+    created_by = User.objects.filter(pk=user_id).first() if user_id else None
+    return {"shipped": len(ship_orders(order_ids, created_by=created_by))}
+
+
+@job_task
+def transition_orders_task(order_ids: List[int], target: str, user_id: Optional[int] = None) -> Dict[str, object]:
+    created_by = User.objects.filter(pk=user_id).first() if user_id else None
+    return transition_orders(order_ids, target, created_by=created_by).as_dict()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dynamic_shop.inventory.models import Batch, Product, Warehouse, hold_batches
+from dynamic_shop.inventory.services import PurchaseItem, receive_purchase
+
+
+@pytest.mark.django_db
+def test_product_list_answers_not_modified(api_client, product: Product, warehouse: Warehouse):
+    url = reverse("product-list")
+    first = api_client.get(url)
+    assert first.status_code == 200 and first["ETag"].startswith('W/"')
+    assert "no-cache" in first["Cache-Control"]
+
+    with CaptureQueriesContext(connection) as captured:
+        cached = api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert cached.status_code == 304 and cached["ETag"] == first["ETag"]
+    assert not any('"inventory_product"."sku"' in query["sql"] for query in captured)
+
+    # Une réception met à jour le stock par UPDATE groupé : l'empreinte change.
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=4, batch_code="ETAG1")], warehouse)
+    fresh = api_client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert fresh.status_code == 200 and fresh["ETag"] != first["ETag"]
+    assert api_client.get(url, {"page_size": 1}, HTTP_IF_NONE_MATCH=fresh["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_batch_and_warehouse_validators_follow_changes(api_client, product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=9, batch_code="ETAG2")], warehouse)
+    batches_url = reverse("batch-list")
+    etag = api_client.get(batches_url)["ETag"]
+    assert api_client.get(batches_url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    batch = Batch.objects.get(batch_code="ETAG2")
+    Batch.objects.filter(pk=batch.pk).update(updated_at=batch.updated_at.replace(year=2000))
+    etag = api_client.get(batches_url)["ETag"]
+    hold_batches({batch.pk: 2})
+    assert api_client.get(batches_url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    warehouses_url = reverse("warehouse-list")
+    etag = api_client.get(warehouses_url)["ETag"]
+    Warehouse.objects.create(name="Annexe")
+    assert api_client.get(warehouses_url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+def test_validators_cover_related_tables(api_client, product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=3, batch_code="ETAG3")], warehouse)
+    batches_url = reverse("batch-list")
+    first = api_client.get(batches_url)
+    warehouse.name = "Entrepôt renommé"
+    warehouse.save()
+    fresh = api_client.get(batches_url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert fresh.status_code == 200
+    assert fresh.json()["results"][0]["warehouse"] == "Entrepôt renommé"
+
+    products_url = reverse("product-list")
+    etag = api_client.get(products_url)["ETag"]
+    product.brand.name = "Marque renommée"
+    product.brand.save()
+    assert api_client.get(products_url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    # Sans ``ETag``, la date seule ne suffit pas à valider la liste.
+    last = api_client.get(products_url)
+    assert api_client.get(products_url, HTTP_IF_MODIFIED_SINCE=last["Last-Modified"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_stamp_skips_counts_and_sees_deletes(api_client, product: Product, warehouse: Warehouse):
+    for code in ("ETAG4", "ETAG5"):
+        Batch.objects.create(product=product, warehouse=warehouse, batch_code=code, initial_qty=1, remaining_qty=1)
+    url = reverse("batch-list")
+    etag = api_client.get(url)["ETag"]
+    with CaptureQueriesContext(connection) as captured:
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert not any("COUNT(" in query["sql"].upper() for query in captured)
+
+    # Le lot supprimé n'est pas le plus récent : seul le compteur de la table le révèle.
+    older = Batch.objects.get(batch_code="ETAG4")
+    Batch.objects.filter(pk=older.pk).update(updated_at=older.updated_at.replace(year=2000))
+    etag = api_client.get(url)["ETag"]
+    Batch.objects.get(pk=older.pk).delete()
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
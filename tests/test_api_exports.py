@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import warnings
+
+import brotli
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from django.urls import reverse
+
+from dynamic_shop.inventory.models import Product, StockMovement, Warehouse
+from dynamic_shop.inventory.services import PurchaseItem, receive_purchase
+
+
+@pytest.mark.django_db
+def test_movements_export_streams_csv_and_ndjson(api_client, product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=12, batch_code="EXP1")], warehouse)
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=3, batch_code="EXP2")], warehouse)
+
+    response = api_client.get(reverse("export", args=["movements", "csv"]))
+    assert response.status_code == 200 and response.streaming
+    assert response["Content-Disposition"].startswith('attachment; filename="movements-')
+    rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+    assert [(row["sku"], row["batch_code"], row["quantity"]) for row in rows] == [
+        (product.sku, "EXP1", "12"),
+        (product.sku, "EXP2", "3"),
+    ]
+
+    response = api_client.get(reverse("export", args=["movements", "ndjson"]), {"movement_type": "IN"})
+    lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    assert len(lines) == StockMovement.objects.filter(movement_type="IN").count()
+    assert lines[0]["to_warehouse"] == warehouse.name
+
+
+@pytest.mark.django_db
+def test_exports_are_compressed_on_request(api_client, product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=5, batch_code="EXP-GZ")], warehouse)
+    url = reverse("export", args=["batches", "csv"])
+
+    response = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert b"EXP-GZ" in gzip.decompress(b"".join(response.streaming_content))
+
+    response = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip;q=0.5, br")
+    assert response["Content-Encoding"] == "br"
+    assert b"EXP-GZ" in brotli.decompress(b"".join(response.streaming_content))
+
+    assert api_client.get(reverse("export", args=["orders", "csv"]), {"start_date": "hier"}).status_code == 400
+    assert api_client.get(reverse("export", args=["users", "csv"])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_exports_stream_asynchronously_under_asgi(product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=7, batch_code="EXP-ASGI")], warehouse)
+    user = User.objects.create_user(username="asgi", password="asgi")
+
+    async def fetch(fmt: str, **headers):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        response = await client.get(reverse("export", args=["batches", fmt]), headers=headers)
+        # ``__aiter__`` : un itérateur synchrone y serait d'abord matérialisé (avec avertissement).
+        return response, b"".join([chunk async for chunk in response])
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("error", message="StreamingHttpResponse must consume")
+        response, body = async_to_sync(fetch)("ndjson")
+        assert response.is_async
+        assert json.loads(body.splitlines()[0])["batch_code"] == "EXP-ASGI"
+
+        response, body = async_to_sync(fetch)("csv", accept_encoding="gzip")
+        assert response.is_async and response["Content-Encoding"] == "gzip"
+        assert b"EXP-ASGI" in gzip.decompress(body)
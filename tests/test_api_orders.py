@@ -7,7 +7,7 @@ from django.urls import reverse
 
 from dynamic_shop.inventory.services import PurchaseItem, receive_purchase
 from dynamic_shop.sales.models import Customer
-from dynamic_shop.sales.services import OrderItemData, create_order
+from dynamic_shop.sales.services import OrderItemData, confirm_order, create_order
 
 
 @pytest.mark.django_db
@@ -30,3 +30,25 @@ def test_order_actions(api_client, product, warehouse):
     url = reverse("order-ship", args=[order.pk])
     response = api_client.post(url)
     assert response.status_code == 400
+
+
+@pytest.mark.django_db
+def test_ship_wave_endpoint(api_client, product, warehouse):
+    customer = Customer.objects.create(name="API Client")
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=60, batch_code="API-WAVE")], warehouse)
+    orders = [
+        confirm_order(
+            create_order(
+                customer=customer,
+                warehouse=warehouse,
+                items=[OrderItemData(product=product, quantity=5, unit_price=Decimal("1500"))],
+            )
+        )
+        for _ in range(2)
+    ]
+    url = reverse("order-ship-wave")
+    response = api_client.post(url, {"orders": [order.pk for order in orders]}, format="json")
+    assert response.status_code == 200
+    assert response.json()["orders"] == [order.code for order in orders]
+    assert api_client.post(url, {"orders": [orders[0].pk]}, format="json").status_code == 400
+    assert api_client.post(url, {"orders": []}, format="json").status_code == 400
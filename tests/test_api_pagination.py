@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from dynamic_shop.inventory.models import Batch, Product, Warehouse
+from dynamic_shop.sales.models import Customer, Order
+from dynamic_shop.sales.services import OrderItemData, create_order
+
+
+@pytest.mark.django_db
+def test_orders_are_paginated_by_keyset(api_client, product: Product, warehouse: Warehouse):
+    customer = Customer.objects.create(name="Client Pages")
+    for _ in range(7):
+        create_order(customer, warehouse, [OrderItemData(product, 1, Decimal("10"))])
+    # Horodatages identiques : l'identifiant départage les positions.
+    Order.objects.update(created_at=timezone.now())
+    expected = list(Order.objects.order_by("-created_at", "-pk").values_list("code", flat=True))
+
+    page = api_client.get(reverse("order-list"), {"page_size": 3}).json()
+    assert page["count"] == 7 and page["previous"] is None
+    seen = [row["code"] for row in page["results"]]
+    while page["next"]:
+        page = api_client.get(page["next"]).json()
+        seen += [row["code"] for row in page["results"]]
+    assert seen == expected
+
+    previous = api_client.get(page["previous"]).json()
+    assert [row["code"] for row in previous["results"]] == expected[3:6]
+
+    uncounted = api_client.get(reverse("order-list"), {"page_size": 3, "count": "0"}).json()
+    assert "count" not in uncounted and len(uncounted["results"]) == 3
+    assert api_client.get(reverse("order-list"), {"cursor": "invalide"}).status_code == 404
+
+
+@pytest.mark.django_db
+def test_products_follow_requested_ordering(api_client, product: Product):
+    for index, stock in enumerate((5, 1, 3)):
+        Product.objects.create(
+            sku=f"SKU-PAGE-{index}",
+            name=f"Page {index}",
+            brand=product.brand,
+            category=product.category,
+            unit="canette",
+            size_ml=250,
+            flavor="Original",
+            remaining_stock=stock,
+        )
+    url = reverse("product-list")
+    by_name = api_client.get(url, {"page_size": 2}).json()
+    assert [row["name"] for row in by_name["results"]] == sorted(Product.objects.values_list("name", flat=True))[:2]
+
+    by_stock = api_client.get(url, {"ordering": "-remaining_stock", "page_size": 2}).json()
+    second = api_client.get(by_stock["next"]).json()
+    stocks = [row["remaining_stock"] for row in by_stock["results"] + second["results"]]
+    assert stocks == sorted(stocks, reverse=True) and len(stocks) == 4
+
+
+@pytest.mark.django_db
+def test_batches_paginate_over_null_expiry_dates(api_client, product: Product, warehouse: Warehouse):
+    for code, expiry in (("N1", None), ("E1", date(2030, 1, 1)), ("N2", None), ("E2", date(2029, 1, 1)), ("E3", None)):
+        Batch.objects.create(
+            product=product, warehouse=warehouse, batch_code=code, expiry_date=expiry, initial_qty=1, remaining_qty=1
+        )
+    url = reverse("batch-list")
+    for ordering in ("expiry_date", "-expiry_date"):
+        page = api_client.get(url, {"ordering": ordering, "page_size": 2}).json()
+        seen = [row["batch_code"] for row in page["results"]]
+        while page["next"]:
+            response = api_client.get(page["next"])
+            assert response.status_code == 200
+            page = response.json()
+            seen += [row["batch_code"] for row in page["results"]]
+        # Les lots sans date de péremption viennent en dernier, départagés par l'identifiant.
+        if ordering == "expiry_date":
+            assert seen == ["E2", "E1", "N1", "N2", "E3"]
+        else:
+            assert seen == ["E1", "E2", "E3", "N2", "N1"]
+
+        previous = api_client.get(page["previous"]).json()
+        assert [row["batch_code"] for row in previous["results"]] == seen[2:4]
+        previous = api_client.get(previous["previous"]).json()
+        assert [row["batch_code"] for row in previous["results"]] == seen[:2]
+
+
+@pytest.mark.django_db
+def test_orderings_on_related_fields_use_local_columns(api_client, product: Product, warehouse: Warehouse):
+    for code in ("REL1", "REL2", "REL3"):
+        Batch.objects.create(
+            product=product, warehouse=warehouse, batch_code=code, initial_qty=1, remaining_qty=1
+        )
+    # Chemin vers une autre table : ignoré, la liste garde son tri par défaut.
+    for ordering in ("product__sku", "warehouse__name"):
+        page = api_client.get(reverse("batch-list"), {"ordering": ordering, "page_size": 2})
+        assert page.status_code == 200
+        assert api_client.get(page.json()["next"]).status_code == 200
+
+    # Clé étrangère : le curseur porte ``customer_id``, pas la représentation du client.
+    for name in ("Cust B", "Cust A"):
+        customer = Customer.objects.create(name=name)
+        for _ in range(2):
+            create_order(customer, warehouse, [OrderItemData(product, 1, Decimal("10"))])
+    expected = list(Order.objects.order_by("customer_id", "pk").values_list("code", flat=True))
+    page = api_client.get(reverse("order-list"), {"ordering": "customer", "page_size": 3}).json()
+    seen = [row["code"] for row in page["results"]]
+    while page["next"]:
+        response = api_client.get(page["next"])
+        assert response.status_code == 200
+        page = response.json()
+        seen += [row["code"] for row in page["results"]]
+    assert seen == expected
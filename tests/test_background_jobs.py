@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import pytest
+from django.urls import reverse
+
+from dynamic_shop.core.jobs import enqueue
+from dynamic_shop.core.models import BackgroundJob
+from dynamic_shop.inventory.models import Batch, Product, Warehouse
+from dynamic_shop.inventory.tasks import receive_purchase_task
+
+
+@pytest.mark.django_db
+def test_async_receive_runs_as_tracked_job(
+    api_client, product: Product, warehouse: Warehouse, django_capture_on_commit_callbacks
+):
+    payload = {"supplier": "Fournisseur", "warehouse": warehouse.pk, "items": [{"sku": product.sku, "quantity": 12}]}
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(reverse("inventory-ops-receive") + "?async=1", payload, format="json")
+    assert response.status_code == 202
+    job = api_client.get(response.json()["url"]).json()
+    assert job["status"] == BackgroundJob.Status.SUCCEEDED
+    assert job["result"] == {"batches": 1}
+    assert Batch.objects.get(product=product).remaining_qty == 12
+    assert [row["id"] for row in api_client.get(reverse("job-list")).json()["results"]] == [job["id"]]
+
+
+@pytest.mark.django_db
+def test_job_records_business_errors(warehouse: Warehouse, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        job = enqueue(receive_purchase_task, "Fournisseur", warehouse.pk, [{"sku": "INCONNU", "quantity": 1}])
+    job.refresh_from_db()
+    assert job.status == BackgroundJob.Status.FAILED
+    assert "INCONNU" in job.error
+    assert job.finished_at is not None
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from dynamic_shop.inventory.cycle_counts import apply_cycle_count, import_cycle_count
+from dynamic_shop.inventory.models import Batch, CycleCount, Product, StockMovement, Warehouse
+from dynamic_shop.inventory.services import PurchaseItem, receive_purchase
+
+
+@pytest.mark.django_db
+def test_apply_cycle_count_adjusts_batches_and_products(product: Product, warehouse: Warehouse):
+    receive_purchase(
+        "Test",
+        [
+            PurchaseItem(product=product, quantity=20, batch_code="CC-A", expiry_date=date(2030, 1, 1)),
+            PurchaseItem(product=product, quantity=10, batch_code="CC-B", expiry_date=date(2031, 1, 1)),
+        ],
+        warehouse,
+    )
+    session = CycleCount.objects.create(reference="INV-1")
+    rows = [
+        {"sku": product.sku, "warehouse": warehouse.name, "batch_code": "CC-A", "counted_qty": 18},
+        {"sku": product.sku, "warehouse": str(warehouse.pk), "batch_code": "CC-NEW", "counted_qty": "4"},
+        {"sku": product.sku, "warehouse": warehouse.name, "batch_code": "CC-B", "counted_qty": 10},
+    ]
+    assert import_cycle_count(session, rows) == 3
+    movements = apply_cycle_count(session)
+    assert len(movements) == 2
+    quantities = dict(Batch.objects.values_list("batch_code", "remaining_qty"))
+    assert quantities == {"CC-A": 18, "CC-B": 10, "CC-NEW": 4}
+    product.refresh_from_db()
+    assert product.remaining_stock == 32
+    assert dict(session.lines.values_list("batch_code", "expected_qty")) == {"CC-A": 20, "CC-B": 10, "CC-NEW": 0}
+    with pytest.raises(ValueError):
+        apply_cycle_count(session)
+
+
+@pytest.mark.django_db
+def test_cycle_count_csv_upload_product_level_shortage(api_client, product: Product, warehouse: Warehouse):
+    receive_purchase(
+        "Test",
+        [
+            PurchaseItem(product=product, quantity=5, batch_code="CC-SOON", expiry_date=date(2030, 1, 1)),
+            PurchaseItem(product=product, quantity=10, batch_code="CC-LATE", expiry_date=date(2031, 1, 1)),
+        ],
+        warehouse,
+    )
+    response = api_client.post(reverse("cycle-count-list"), {"reference": "INV-CSV"}, format="json")
+    assert response.status_code == 201
+    session_id = response.json()["id"]
+    content = f"sku,warehouse,batch_code,counted_qty\n{product.sku},{warehouse.name},,8\n".encode()
+    upload = SimpleUploadedFile("comptage.csv", content, content_type="text/csv")
+    response = api_client.post(reverse("cycle-count-upload", args=[session_id]), {"file": upload}, format="multipart")
+    assert response.json() == {"status": "imported", "lines": 1}
+    response = api_client.post(reverse("cycle-count-apply", args=[session_id]))
+    assert response.json() == {"status": "applied", "adjustments": 2}
+    assert dict(Batch.objects.values_list("batch_code", "remaining_qty")) == {"CC-SOON": 0, "CC-LATE": 8}
+    assert StockMovement.objects.filter(movement_type=StockMovement.MovementType.ADJUSTMENT).count() == 2
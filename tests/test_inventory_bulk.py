@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+from dynamic_shop.inventory.models import Batch, Product, StockMovement, Warehouse
+from dynamic_shop.inventory.services import PurchaseItem, apply_movements_bulk, receive_purchase
+
+
+def _out(batch: Batch, quantity: int) -> StockMovement:
+    return StockMovement(
+        product_id=batch.product_id,
+        batch=batch,
+        movement_type=StockMovement.MovementType.OUT,
+        quantity=quantity,
+        from_warehouse_id=batch.warehouse_id,
+        reason="Synchro POS",
+    )
+
+
+@pytest.mark.django_db
+def test_apply_movements_bulk_nets_deltas_per_batch(product: Product, warehouse: Warehouse):
+    first, second = receive_purchase(
+        "Test",
+        [
+            PurchaseItem(product=product, quantity=50, batch_code="BULK1"),
+            PurchaseItem(product=product, quantity=30, batch_code="BULK2"),
+        ],
+        warehouse,
+    )
+    movements = [_out(first, 10), _out(first, 15), _out(second, 5)]
+    apply_movements_bulk(movements)
+    first.refresh_from_db()
+    second.refresh_from_db()
+    product.refresh_from_db()
+    assert first.remaining_qty == 25
+    assert second.remaining_qty == 25
+    assert product.remaining_stock == 50
+    assert StockMovement.objects.filter(movement_type=StockMovement.MovementType.OUT).count() == 3
+
+
+@pytest.mark.django_db
+def test_apply_movements_bulk_transfer_creates_destination(product: Product, warehouse: Warehouse):
+    other = Warehouse.objects.create(name="Bulk Dest")
+    (batch,) = receive_purchase("Test", [PurchaseItem(product=product, quantity=40, batch_code="BULK3")], warehouse)
+    movement = StockMovement(
+        product=product,
+        batch=batch,
+        movement_type=StockMovement.MovementType.TRANSFER,
+        quantity=15,
+        from_warehouse=warehouse,
+        to_warehouse=other,
+    )
+    apply_movements_bulk([movement])
+    dest = Batch.objects.get(batch_code="BULK3", warehouse=other)
+    assert dest.remaining_qty == 15
+    batch.refresh_from_db()
+    assert batch.remaining_qty == 25
+
+
+@pytest.mark.django_db
+def test_apply_movements_bulk_is_all_or_nothing(product: Product, warehouse: Warehouse):
+    (batch,) = receive_purchase("Test", [PurchaseItem(product=product, quantity=20, batch_code="BULK4")], warehouse)
+    with pytest.raises(ValidationError):
+        apply_movements_bulk([_out(batch, 15), _out(batch, 10)])
+    batch.refresh_from_db()
+    assert batch.remaining_qty == 20
+    assert not StockMovement.objects.filter(movement_type=StockMovement.MovementType.OUT).exists()
+
+
+@pytest.mark.django_db
+def test_receive_purchase_query_count_does_not_grow_with_lines(
+    product: Product, warehouse: Warehouse, django_assert_max_num_queries
+):
+    other = Product.objects.create(
+        sku="SKU-BULK", name="Produit Bulk", brand=product.brand, category=product.category, unit="canette", size_ml=330
+    )
+    items = [PurchaseItem(product=product if i % 2 else other, quantity=i + 1) for i in range(300)]
+    # Quelques requêtes par table, découpées selon la limite de paramètres du moteur.
+    with django_assert_max_num_queries(15):
+        batches = receive_purchase("Conteneur", items, warehouse)
+    assert len({batch.batch_code for batch in batches}) == 300
+    assert batches[3].remaining_qty == 4
+    product.refresh_from_db()
+    assert product.remaining_stock == sum(i + 1 for i in range(300) if i % 2)
+    assert StockMovement.objects.filter(movement_type=StockMovement.MovementType.IN).count() == 300
+
+
+@pytest.mark.django_db
+def test_receive_endpoint_rejects_unknown_sku(api_client, product: Product, warehouse: Warehouse):
+    url = reverse("inventory-ops-receive")
+    items = [{"sku": product.sku, "quantity": 5}, {"sku": "INCONNU", "quantity": 1}]
+    payload = {"warehouse": warehouse.pk, "items": items}
+    response = api_client.post(url, payload, format="json")
+    assert response.status_code == 400
+    assert "INCONNU" in response.json()["detail"]
+    assert not Batch.objects.exists()
+
+
+@pytest.mark.django_db
+def test_transfer_order_splits_fefo_and_creates_destinations(api_client, product: Product, warehouse: Warehouse):
+    other = Product.objects.create(
+        sku="SKU-TRF",
+        name="Produit Transfert",
+        brand=product.brand,
+        category=product.category,
+        unit="canette",
+        size_ml=330,
+    )
+    destination = Warehouse.objects.create(name="Dépôt Sud")
+    receive_purchase(
+        "Test",
+        [
+            PurchaseItem(product=product, quantity=10, batch_code="TRF-SOON", expiry_date=date(2030, 1, 1)),
+            PurchaseItem(product=product, quantity=30, batch_code="TRF-LATE", expiry_date=date(2031, 1, 1)),
+            PurchaseItem(product=other, quantity=20, batch_code="TRF-OTHER"),
+        ],
+        warehouse,
+    )
+    payload = {
+        "from_warehouse": warehouse.pk,
+        "to_warehouse": destination.pk,
+        "lines": [{"sku": product.sku, "quantity": 15}, {"sku": other.sku, "quantity": 20}],
+    }
+    response = api_client.post(reverse("inventory-ops-transfer-order"), payload, format="json")
+    assert response.status_code == 201
+    assert response.json()["movements"] == 3
+    moved = dict(Batch.objects.filter(warehouse=destination).values_list("batch_code", "remaining_qty"))
+    assert moved == {"TRF-SOON": 10, "TRF-LATE": 5, "TRF-OTHER": 20}
+    assert Batch.objects.get(batch_code="TRF-LATE", warehouse=warehouse).remaining_qty == 25
+
+    payload["lines"] = [{"sku": other.sku, "quantity": 1}]
+    response = api_client.post(reverse("inventory-ops-transfer-order"), payload, format="json")
+    assert response.status_code == 400
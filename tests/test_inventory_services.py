@@ -7,6 +7,7 @@ from dynamic_shop.inventory.models import Batch, Product, Warehouse
 from dynamic_shop.inventory.services import (
     PurchaseItem,
     adjust_stock,
+    allocate_order_lines,
     receive_purchase,
     reserve_for_order,
     transfer_stock,
@@ -58,6 +59,14 @@ def test_reserve_for_order_checks_quantity(product: Product, warehouse: Warehous
     with pytest.raises(ValueError):
         reserve_for_order(product, 20, warehouse)
 
+    # Stock réparti : aucun lot ne couvre 12 à lui seul, les deux ensemble oui.
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=8, batch_code="B4-BIS")], warehouse)
+    assert reserve_for_order(product, 12, warehouse).batch_code == "B4"
+    assert dict(Batch.objects.filter(product=product).values_list("batch_code", "reserved_qty")) == {
+        "B4": 10,
+        "B4-BIS": 7,
+    }
+
 
 @pytest.mark.django_db
 def test_adjust_stock_negative_error(product: Product, warehouse: Warehouse):
@@ -71,3 +80,25 @@ def test_adjust_stock_negative_error(product: Product, warehouse: Warehouse):
     adjust_stock(product, warehouse, -5, reason="Casse", batch=batch)
     batch.refresh_from_db()
     assert batch.remaining_qty == 5
+
+
+@pytest.mark.django_db
+def test_allocate_order_lines_uses_single_batch_fetch(
+    product: Product, warehouse: Warehouse, django_assert_num_queries
+):
+    receive_purchase(
+        "Test",
+        [
+            PurchaseItem(product=product, quantity=10, batch_code="AL1", expiry_date=date(2030, 1, 1)),
+            PurchaseItem(product=product, quantity=10, batch_code="AL2", expiry_date=date(2030, 6, 1)),
+        ],
+        warehouse,
+    )
+    with django_assert_num_queries(1):
+        splits = allocate_order_lines([(product, 8), (product, 8)], warehouse)
+    assert [[(batch.batch_code, qty) for batch, qty in line] for line in splits] == [
+        [("AL1", 8)],
+        [("AL1", 2), ("AL2", 6)],
+    ]
+    with pytest.raises(ValueError):
+        allocate_order_lines([(product, 21)], warehouse)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import io
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from dynamic_shop.inventory.models import Product, Warehouse
+from dynamic_shop.sales.imports import import_orders, read_csv, read_ndjson
+from dynamic_shop.sales.models import Customer, Order, OrderItem
+
+
+@pytest.mark.django_db
+def test_import_orders_reports_each_row(product: Product, warehouse: Warehouse):
+    customer = Customer.objects.create(name="Grossiste")
+    lines = [
+        {"reference": "A1", "customer": "Grossiste", "warehouse": warehouse.name,
+         "items": [{"sku": product.sku, "quantity": 3, "unit_price": "1500"}]},
+        {"reference": "A2", "customer": str(customer.pk), "warehouse": str(warehouse.pk),
+         "items": [{"sku": "INCONNU", "quantity": 1, "unit_price": "10"}]},
+    ]
+    lines.append(
+        {"reference": "A3", "customer": "Grossiste", "warehouse": warehouse.name,
+         "items": [{"sku": product.sku, "quantity": 1, "unit_price": "NaN"}]}
+    )
+    payload = "\n".join(json.dumps(line) for line in lines) + "\n{pas du json\n"
+    results = list(import_orders(read_ndjson(io.BytesIO(payload.encode()))))
+
+    assert [result["status"] for result in results] == ["created", "error", "error", "error"]
+    assert results[1]["detail"] == "SKU inconnu : INCONNU."
+    assert results[2]["detail"] == f"{product.sku} : quantité ou prix unitaire invalide."
+    assert results[3]["line"] == 4
+    order = Order.objects.get(code=results[0]["code"])
+    assert (order.customer, order.total_amount) == (customer, Decimal("4500"))
+    assert order.items.get().line_total == Decimal("4500")
+
+
+@pytest.mark.django_db
+def test_import_queries_do_not_grow_with_orders(product: Product, warehouse: Warehouse):
+    Customer.objects.create(name="Grossiste")
+    header = "reference,customer,warehouse,sku,quantity,unit_price\n"
+    rows = "".join(f"R{n},Grossiste,{warehouse.pk},{product.sku},{n + 1},100\n" for n in range(300))
+    with CaptureQueriesContext(connection) as queries:
+        results = list(import_orders(read_csv(io.BytesIO((header + rows).encode())), chunk_size=100))
+    assert {result["status"] for result in results} == {"created"}
+    assert Order.objects.count() == 300 and OrderItem.objects.count() == 300
+    # Trois tranches : résolutions, bloc de codes et insertions, sans requête par commande.
+    assert len(queries) < 60
+    assert len({result["code"] for result in results}) == 300
+
+
+@pytest.mark.django_db
+def test_import_endpoint_streams_results(api_client, product: Product, warehouse: Warehouse):
+    Customer.objects.create(name="Grossiste")
+    csv_text = (
+        "reference,customer,warehouse,sku,quantity,unit_price\n"
+        f"B1,Grossiste,{warehouse.name},{product.sku},2,100\n"
+        f"B1,Grossiste,{warehouse.name},{product.sku},1,100\n"
+        f"B2,Inconnu,{warehouse.name},{product.sku},1,100\n"
+    )
+    upload = SimpleUploadedFile("commandes.csv", csv_text.encode(), content_type="text/csv")
+    response = api_client.post(reverse("order-import"), {"file": upload}, format="multipart")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    results = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    # Un même produit sur plusieurs lignes est accepté, comme pour ``create_order``.
+    assert results[0]["status"] == "created"
+    assert Order.objects.get(code=results[0]["code"]).items.count() == 2
+    assert results[1]["detail"] == "Client inconnu : Inconnu."
+    assert results[-1] == {"summary": {"created": 1, "error": 1}}
+    assert api_client.post(reverse("order-import"), {}, format="multipart").status_code == 400
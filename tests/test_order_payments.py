@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from dynamic_shop.inventory.models import Product, Warehouse
+from dynamic_shop.inventory.services import PurchaseItem, receive_purchase
+from dynamic_shop.sales.models import Customer, Order, Payment
+from dynamic_shop.sales.services import OrderItemData, confirm_order, create_order, reconcile_order_payments
+
+
+def _order(product: Product, warehouse: Warehouse, quantity: int = 2) -> Order:
+    customer, _ = Customer.objects.get_or_create(name="Client Paiement")
+    return create_order(customer, warehouse, [OrderItemData(product, quantity, Decimal("500"))])
+
+
+@pytest.mark.django_db
+def test_paid_amount_follows_payment_changes(product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=10, batch_code="PAY1")], warehouse)
+    order = _order(product, warehouse)
+    other = _order(product, warehouse, quantity=1)
+    confirm_order(order)
+
+    payment = Payment.objects.create(order=order, amount=Decimal("400"), method=Payment.Method.CASH)
+    order.refresh_from_db()
+    assert (order.paid_amount, order.balance, order.status) == (Decimal("400"), Decimal("600"), Order.Status.CONFIRMED)
+
+    payment = Payment.objects.get(pk=payment.pk)
+    payment.amount = Decimal("1000")
+    payment.save()
+    order.refresh_from_db()
+    assert (order.paid_amount, order.status) == (Decimal("1000"), Order.Status.PAID)
+
+    payment.order = other
+    payment.save()
+    order.refresh_from_db()
+    other.refresh_from_db()
+    assert (order.paid_amount, other.paid_amount) == (Decimal("0"), Decimal("1000"))
+
+    payment.delete()
+    other.refresh_from_db()
+    assert other.paid_amount == Decimal("0")
+
+
+@pytest.mark.django_db
+def test_reconcile_order_payments_fixes_drift(product: Product, warehouse: Warehouse):
+    order = _order(product, warehouse)
+    Payment.objects.create(order=order, amount=Decimal("250"), method=Payment.Method.CARD)
+    Order.objects.filter(pk=order.pk).update(paid_amount=Decimal("999"))
+
+    (drift,) = reconcile_order_payments(fix=False)
+    assert (drift.code, drift.delta) == (order.code, Decimal("-749"))
+    call_command("reconcile_payments")
+    order.refresh_from_db()
+    assert order.paid_amount == Decimal("250")
+    assert reconcile_order_payments() == []
+
+
+@pytest.mark.django_db
+def test_order_payment_state_filter(api_client, product: Product, warehouse: Warehouse):
+    unpaid = _order(product, warehouse)
+    partial = _order(product, warehouse)
+    paid = _order(product, warehouse)
+    Payment.objects.create(order=partial, amount=Decimal("100"), method=Payment.Method.CASH)
+    Payment.objects.create(order=paid, amount=Decimal("1000"), method=Payment.Method.BANK)
+
+    url = reverse("order-list")
+
+    def codes(params):
+        return {row["code"] for row in api_client.get(url, params).json()["results"]}
+
+    assert codes({"outstanding": "true"}) == {unpaid.code, partial.code}
+    assert codes({"payment_state": "partial"}) == {partial.code}
+    assert codes({"payment_state": "unpaid"}) == {unpaid.code}
+    assert codes({"payment_state": "paid"}) == {paid.code}
+    row = next(row for row in api_client.get(url).json()["results"] if row["code"] == partial.code)
+    assert (row["paid_amount"], row["balance"]) == ("100.00", "900.00")
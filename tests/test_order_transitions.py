@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from dynamic_shop.core.models import BackgroundJob
+from dynamic_shop.inventory.models import Batch, Product, StockReservation, Warehouse
+from dynamic_shop.inventory.services import PurchaseItem, receive_purchase, sweep_expired_reservations
+from dynamic_shop.sales.models import Customer, Order
+from dynamic_shop.sales.services import OrderItemData, create_order, transition_orders
+
+
+def _orders(product: Product, warehouse: Warehouse, *quantities: int):
+    customer = Customer.objects.create(name="Client Lot")
+    return [
+        create_order(customer, warehouse, [OrderItemData(product, quantity, Decimal("100"))])
+        for quantity in quantities
+    ]
+
+
+@pytest.mark.django_db
+def test_transition_orders_reports_failures_per_order(product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=10, batch_code="LOT-A")], warehouse)
+    first, second, third = _orders(product, warehouse, 6, 6, 4)
+
+    result = transition_orders([first.pk, second.pk, third.pk, 999999], Order.Status.CONFIRMED, chunk_size=2)
+    # Le disponible est partagé : la deuxième commande ne trouve plus assez de stock.
+    assert [order.code for order in result.done] == [first.code, third.code]
+    assert set(result.failures) == {second.code, "#999999"}
+    batch = Batch.objects.get(batch_code="LOT-A")
+    assert batch.reserved_qty == 10
+    assert StockReservation.objects.filter(status=StockReservation.Status.ACTIVE).count() == 2
+
+    result = transition_orders([first.pk, second.pk], Order.Status.SHIPPED)
+    assert [order.code for order in result.done] == [first.code]
+    assert result.failures == {second.code: "La commande doit être confirmée avant expédition."}
+    batch.refresh_from_db()
+    assert (batch.remaining_qty, batch.reserved_qty) == (4, 4)
+
+    result = transition_orders([first.pk, second.pk, third.pk], Order.Status.CANCELLED)
+    assert {order.code for order in result.done} == {second.code, third.code}
+    assert first.code in result.failures
+    batch.refresh_from_db()
+    assert batch.reserved_qty == 0
+    assert not third.items.filter(batch__isnull=False).exists()
+
+    with pytest.raises(ValueError):
+        transition_orders([first.pk], Order.Status.PAID)
+
+
+@pytest.mark.django_db
+def test_admin_actions_use_transition_pipeline(
+    admin_client, product: Product, warehouse: Warehouse, settings, django_capture_on_commit_callbacks
+):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=5, batch_code="LOT-ADM")], warehouse)
+    orders = _orders(product, warehouse, 3, 3)
+    url = reverse("admin:sales_order_changelist")
+    payload = {"action": "mark_confirmed", "_selected_action": [order.pk for order in orders]}
+
+    response = admin_client.post(url, payload, follow=True)
+    assert response.status_code == 200
+    statuses = sorted(Order.objects.values_list("status", flat=True))
+    assert statuses == [Order.Status.CONFIRMED, Order.Status.DRAFT]
+    assert Batch.objects.get(batch_code="LOT-ADM").reserved_qty == 3
+
+    settings.ORDER_ACTIONS_SYNC_LIMIT = 1
+    with django_capture_on_commit_callbacks(execute=True):
+        admin_client.post(url, {**payload, "action": "mark_cancelled"})
+    job = BackgroundJob.objects.get()
+    assert job.status == BackgroundJob.Status.SUCCEEDED
+    assert len(job.result["done"]) == 2
+    assert set(Order.objects.values_list("status", flat=True)) == {Order.Status.CANCELLED}
+
+
+@pytest.mark.django_db
+def test_bulk_transition_endpoint_uses_bounded_queries(api_client, product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=500, batch_code="LOT-API")], warehouse)
+    url = reverse("order-bulk-transition")
+
+    def confirm(count: int) -> int:
+        orders = _orders(product, warehouse, *[2] * count)
+        with CaptureQueriesContext(connection) as captured:
+            response = api_client.post(url, {"orders": [o.pk for o in orders], "status": "CONFIRMED"}, format="json")
+        assert response.json()["done"] == count
+        return len(captured)
+
+    assert confirm(60) <= confirm(3) + 2
+    assert Batch.objects.get(batch_code="LOT-API").reserved_qty == 126
+
+    draft, confirmed = _orders(product, warehouse, 1, 1)
+    api_client.post(url, {"orders": [confirmed.pk], "status": "CONFIRMED"}, format="json")
+    response = api_client.post(url, {"orders": [draft.pk, confirmed.pk], "status": "SHIPPED"}, format="json")
+    body = response.json()
+    assert (body["done"], body["failed"]) == (1, 1)
+    assert {(row["order"], row["ok"]) for row in body["results"]} == {(confirmed.code, True), (draft.code, False)}
+
+    assert api_client.post(url, {"orders": [draft.pk], "status": "PAID"}, format="json").status_code == 400
+    assert api_client.post(url, {"orders": [], "status": "CANCELLED"}, format="json").status_code == 400
+
+
+@pytest.mark.django_db
+def test_ship_wave_drops_failing_orders_without_per_order_retries(product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=500, batch_code="LOT-VAGUE")], warehouse)
+    batch = Batch.objects.get(batch_code="LOT-VAGUE")
+
+    def ship(count: int) -> int:
+        orders = _orders(product, warehouse, *[2] * count)
+        transition_orders([order.pk for order in orders], Order.Status.CONFIRMED)
+        # Une commande confirmée sans lot réservé ne peut pas partir.
+        unassigned = _orders(product, warehouse, 2)[0]
+        Order.objects.filter(pk=unassigned.pk).update(status=Order.Status.CONFIRMED)
+        with CaptureQueriesContext(connection) as captured:
+            result = transition_orders([o.pk for o in orders] + [unassigned.pk], Order.Status.SHIPPED)
+        assert len(result.done) == count
+        assert set(result.failures) == {unassigned.code}
+        return len(captured)
+
+    assert ship(10) == ship(3)
+
+    # Réservation expirée puis stock libre écoulé : seule cette commande est écartée.
+    first, second = _orders(product, warehouse, 4, 4)
+    transition_orders([first.pk, second.pk], Order.Status.CONFIRMED)
+    StockReservation.objects.filter(reference=second.code).update(expires_at=timezone.now() - timedelta(minutes=1))
+    sweep_expired_reservations()
+    Batch.objects.filter(pk=batch.pk).update(remaining_qty=4)
+    result = transition_orders([first.pk, second.pk], Order.Status.SHIPPED)
+    assert [order.code for order in result.done] == [first.code]
+    assert result.failures == {second.code: "Stock insuffisant sur le(s) lot(s) LOT-VAGUE."}
+    batch.refresh_from_db()
+    assert (batch.remaining_qty, batch.reserved_qty) == (0, 0)
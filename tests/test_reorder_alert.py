@@ -2,7 +2,8 @@ from __future__ import annotations
 
 import pytest
 
-from dynamic_shop.inventory.models import Product
+from dynamic_shop.inventory.models import Product, ReorderAlert
+from dynamic_shop.inventory.services import PurchaseItem, adjust_stock, receive_purchase
 
 
 @pytest.mark.django_db
@@ -11,3 +12,16 @@ def test_is_below_reorder(product: Product):
     product.reorder_level = 10
     product.save()
     assert product.is_below_reorder is True
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reorder_alert_is_edge_triggered(product: Product, warehouse):
+    (batch,) = receive_purchase("Test", [PurchaseItem(product=product, quantity=5, batch_code="RA1")], warehouse)
+    adjust_stock(product, warehouse, -1, reason="Casse", batch=batch)
+    assert ReorderAlert.objects.filter(product=product, resolved_at__isnull=True).count() == 1
+
+    adjust_stock(product, warehouse, 50, reason="Inventaire", batch=batch)
+    assert not ReorderAlert.objects.filter(product=product, resolved_at__isnull=True).exists()
+
+    adjust_stock(product, warehouse, -50, reason="Casse", batch=batch)
+    assert ReorderAlert.objects.filter(product=product).count() == 2
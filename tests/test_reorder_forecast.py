@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from dynamic_shop.inventory.models import Product, Warehouse
+from dynamic_shop.sales.forecasting import compute_reorder_points
+from dynamic_shop.sales.models import Customer, Order
+from dynamic_shop.sales.services import OrderItemData, create_order
+
+
+def _sell(product: Product, warehouse: Warehouse, quantities, status=Order.Status.SHIPPED) -> None:
+    """Crée une commande par jour sur les ``len(quantities)`` derniers jours."""
+
+    customer = Customer.objects.create(name="Client Prévision")
+    today = timezone.localdate()
+    for days_ago, quantity in enumerate(reversed(quantities), start=1):
+        order = create_order(customer, warehouse, [OrderItemData(product, quantity, Decimal("100"))])
+        moment = timezone.make_aware(datetime.combine(today - timedelta(days=days_ago), time(12)))
+        Order.objects.filter(pk=order.pk).update(status=status, created_at=moment)
+
+
+@pytest.mark.django_db
+def test_compute_reorder_points_from_daily_demand(product: Product, warehouse: Warehouse):
+    idle = Product.objects.create(
+        sku="SKU-IDLE",
+        name="Sans ventes",
+        brand=product.brand,
+        category=product.category,
+        unit="canette",
+        size_ml=250,
+        flavor="Original",
+        reorder_level=7,
+        reorder_qty=9,
+    )
+    Product.objects.filter(pk=product.pk).update(lead_time_days=4)
+    _sell(product, warehouse, [1, 3] * 5)
+    _sell(idle, warehouse, [50], status=Order.Status.DRAFT)
+
+    preview = compute_reorder_points(history_days=10, window_days=10, apply=False)
+    assert [suggestion.sku for suggestion in preview] == [product.sku]
+    (suggestion,) = preview
+    assert suggestion.daily_demand == pytest.approx(2)
+    # 2 × 4 + 1,65 × σ(1, 3, …) × √4 = 11,48 → 12 ; 2 × 30 jours = 60.
+    assert (suggestion.reorder_level, suggestion.reorder_qty) == (12, 60)
+    product.refresh_from_db()
+    assert product.reorder_level == 10
+
+    compute_reorder_points(history_days=10, window_days=10)
+    product.refresh_from_db()
+    idle.refresh_from_db()
+    assert (product.reorder_level, product.reorder_qty) == (12, 60)
+    assert (idle.reorder_level, idle.reorder_qty) == (7, 9)
+    assert not compute_reorder_points(history_days=10, window_days=10)[0].changed
+
+    with pytest.raises(ValueError):
+        compute_reorder_points(history_days=10, window_days=20)
+
+
+@pytest.mark.django_db
+def test_reorder_points_endpoint_and_command(api_client, product: Product, warehouse: Warehouse):
+    _sell(product, warehouse, [2] * 7)
+    url = reverse("product-reorder-points")
+    response = api_client.get(url, {"history_days": 7, "window_days": 7})
+    assert response.status_code == 200
+    assert response.json()["results"][0]["reorder_level"] == 14
+    assert api_client.post(url, {"history_days": 7}, format="json").status_code == 403
+
+    call_command("compute_reorder_points", "--history-days", "7", "--window-days", "7")
+    product.refresh_from_db()
+    assert (product.reorder_level, product.reorder_qty) == (14, 60)
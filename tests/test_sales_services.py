@@ -1,13 +1,25 @@
 from __future__ import annotations
 
+from datetime import date
 from decimal import Decimal
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from dynamic_shop.inventory.models import Batch, Product, Warehouse
+from dynamic_shop.inventory.models import Batch, Product, StockMovement, StockReservation, Warehouse
 from dynamic_shop.inventory.services import PurchaseItem, receive_purchase
-from dynamic_shop.sales.models import Customer
-from dynamic_shop.sales.services import OrderItemData, cancel_order, confirm_order, create_order, ship_order
+from dynamic_shop.sales.models import Customer, Order, OrderItem, allocate_order_codes
+from dynamic_shop.sales.services import (
+    OrderItemData,
+    cancel_order,
+    confirm_order,
+    create_order,
+    ship_order,
+    ship_orders,
+)
+from dynamic_shop.sales.signals import order_totals_muted
 
 
 @pytest.mark.django_db
@@ -43,3 +55,156 @@ def test_cancel_order_releases_batch(product: Product, warehouse: Warehouse):
     order.refresh_from_db()
     assert order.status == order.Status.CANCELLED
     assert order.items.first().batch is None
+
+
+@pytest.mark.django_db
+def test_confirm_order_splits_line_across_batches_fefo(product: Product, warehouse: Warehouse):
+    customer = Customer.objects.create(name="Client B2B")
+    receive_purchase(
+        "Test",
+        [
+            PurchaseItem(product=product, quantity=30, batch_code="LATE", expiry_date=date(2031, 1, 1)),
+            PurchaseItem(product=product, quantity=30, batch_code="SOON", expiry_date=date(2030, 1, 1)),
+        ],
+        warehouse,
+    )
+    order = create_order(
+        customer=customer,
+        warehouse=warehouse,
+        items=[OrderItemData(product=product, quantity=50, unit_price=Decimal("1500"))],
+    )
+    confirm_order(order)
+    line = order.items.get()
+    assert line.batch.batch_code == "SOON"
+    assert [(a.batch.batch_code, a.quantity) for a in line.allocations.order_by("batch__expiry_date")] == [
+        ("SOON", 30),
+        ("LATE", 20),
+    ]
+    ship_order(order)
+    assert Batch.objects.get(batch_code="SOON").remaining_qty == 0
+    assert Batch.objects.get(batch_code="LATE").remaining_qty == 10
+
+
+@pytest.mark.django_db
+def test_confirm_order_with_repeated_product_lines(product: Product, warehouse: Warehouse):
+    customer = Customer.objects.create(name="Client Test")
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=10, batch_code="DUP")], warehouse)
+    order = create_order(
+        customer=customer,
+        warehouse=warehouse,
+        items=[
+            OrderItemData(product=product, quantity=3, unit_price=Decimal("100")),
+            OrderItemData(product=product, quantity=3, unit_price=Decimal("90")),
+        ],
+    )
+    confirm_order(order)
+    order.refresh_from_db()
+    assert order.status == Order.Status.CONFIRMED
+    assert [line.batch.batch_code for line in order.items.order_by("pk")] == ["DUP", "DUP"]
+    batch = Batch.objects.get(batch_code="DUP")
+    assert batch.reserved_qty == 6
+    ship_order(order)
+    batch.refresh_from_db()
+    assert (batch.remaining_qty, batch.reserved_qty) == (4, 0)
+
+
+@pytest.mark.django_db
+def test_order_codes_come_from_daily_counter(warehouse: Warehouse):
+    customer = Customer.objects.create(name="Client Test")
+    day = timezone.now().date()
+    # Commande codée avant l'introduction du compteur : la numérotation reprend après.
+    Order.objects.create(code=f"ORD-{day:%Y%m%d}-0041", customer=customer, warehouse=warehouse)
+    order = create_order(customer=customer, warehouse=warehouse, items=[])
+    assert order.code == f"ORD-{day:%Y%m%d}-0042"
+    assert allocate_order_codes(3) == [f"ORD-{day:%Y%m%d}-{number:04d}" for number in (43, 44, 45)]
+    assert allocate_order_codes(1, day=date(2030, 1, 2)) == ["ORD-20300102-0001"]
+
+
+@pytest.mark.django_db
+def test_create_order_inserts_lines_in_bulk(product: Product, warehouse: Warehouse, django_assert_max_num_queries):
+    customer = Customer.objects.create(name="Client Test")
+    items = [OrderItemData(product=product, quantity=index + 1, unit_price=Decimal("10")) for index in range(300)]
+    with django_assert_max_num_queries(15):
+        order = create_order(customer=customer, warehouse=warehouse, items=items)
+    order.refresh_from_db()
+    assert order.items.count() == 300
+    assert order.total_amount == Decimal("10") * sum(range(1, 301))
+    assert order.items.get(quantity=7).line_total == Decimal("70")
+
+
+@pytest.mark.django_db
+def test_muted_order_totals_are_refreshed_once(product: Product, warehouse: Warehouse):
+    customer = Customer.objects.create(name="Client Test")
+    order = create_order(
+        customer=customer,
+        warehouse=warehouse,
+        items=[OrderItemData(product=product, quantity=2, unit_price=Decimal("100"))],
+    )
+    with order_totals_muted():
+        for line in order.items.all():
+            line.quantity = 5
+            line.save()
+        order.refresh_from_db()
+        assert order.total_amount == Decimal("200")
+    order.refresh_from_db()
+    assert order.total_amount == Decimal("500")
+
+
+@pytest.mark.django_db
+def test_confirm_order_queries_do_not_grow_with_lines(product: Product, warehouse: Warehouse):
+    customer = Customer.objects.create(name="Client Test")
+    products = Product.objects.bulk_create(
+        [
+            Product(
+                sku=f"SKU-FLAT-{index}",
+                name=f"Produit {index}",
+                brand=product.brand,
+                category=product.category,
+                unit="canette",
+                size_ml=250,
+                flavor="Original",
+            )
+            for index in range(200)
+        ]
+    )
+    receive_purchase("Test", [PurchaseItem(product=item, quantity=5) for item in products], warehouse)
+
+    def confirm(lines) -> int:
+        items = [OrderItemData(product=item, quantity=1, unit_price=Decimal("10")) for item in lines]
+        order = create_order(customer=customer, warehouse=warehouse, items=items)
+        with CaptureQueriesContext(connection) as captured:
+            confirm_order(order)
+        return len(captured)
+
+    # Seul le découpage des INSERT groupés (limite de paramètres SQLite) peut ajouter une requête.
+    assert confirm(products[2:]) <= confirm(products[:2]) + 2
+    assert not OrderItem.objects.filter(batch__isnull=True).exists()
+
+
+@pytest.mark.django_db
+def test_ship_orders_wave_decrements_each_batch_once(product: Product, warehouse: Warehouse):
+    customer = Customer.objects.create(name="Client Test")
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=100, batch_code="WAVE")], warehouse)
+    orders = []
+    for quantity in (10, 20, 30):
+        order = create_order(
+            customer=customer,
+            warehouse=warehouse,
+            items=[OrderItemData(product=product, quantity=quantity, unit_price=Decimal("100"))],
+        )
+        orders.append(confirm_order(order))
+    draft = create_order(customer=customer, warehouse=warehouse, items=[])
+
+    with pytest.raises(ValueError, match=draft.code):
+        ship_orders([order.pk for order in orders] + [draft.pk])
+    assert Batch.objects.get(batch_code="WAVE").remaining_qty == 100
+
+    shipped = ship_orders([order.pk for order in orders])
+    assert {order.status for order in shipped} == {Order.Status.SHIPPED}
+    assert set(Order.objects.filter(pk__in=[o.pk for o in orders]).values_list("status", flat=True)) == {"SHIPPED"}
+    batch = Batch.objects.get(batch_code="WAVE")
+    assert (batch.remaining_qty, batch.reserved_qty) == (40, 0)
+    product.refresh_from_db()
+    assert product.remaining_stock == 40
+    assert StockMovement.objects.filter(movement_type=StockMovement.MovementType.OUT).count() == 3
+    assert not StockReservation.objects.filter(status=StockReservation.Status.ACTIVE).exists()
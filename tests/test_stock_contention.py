@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, connection
+
+from dynamic_shop.inventory.models import Batch, InsufficientStockError, Product, StockMovement, Warehouse
+from dynamic_shop.inventory.services import PurchaseItem, receive_purchase
+from dynamic_shop.sales.models import Customer, Order
+from dynamic_shop.sales.services import create_order
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_shipments_never_oversell(product: Product, warehouse: Warehouse):
+    (batch,) = receive_purchase("Test", [PurchaseItem(product=product, quantity=5, batch_code="RACE")], warehouse)
+    workers = 12
+    barrier = threading.Barrier(workers)
+    outcomes = []
+
+    def ship() -> None:
+        # Chaque thread part du même instantané périmé du lot.
+        stale = Batch.objects.get(pk=batch.pk)
+        barrier.wait()
+        deadline = time.monotonic() + 30
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    StockMovement.objects.create(
+                        product=product,
+                        batch=stale,
+                        movement_type=StockMovement.MovementType.OUT,
+                        quantity=1,
+                        from_warehouse=warehouse,
+                    )
+                    outcomes.append(True)
+                    return
+                except InsufficientStockError:
+                    outcomes.append(False)
+                    return
+                except OperationalError:
+                    # Verrou de table SQLite (cache partagé des tests) : on réessaie.
+                    time.sleep(0.005)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=ship) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    batch.refresh_from_db()
+    product.refresh_from_db()
+    assert len(outcomes) == workers
+    assert outcomes.count(True) == 5
+    assert outcomes.count(False) == workers - 5
+    assert batch.remaining_qty == 0
+    assert product.remaining_stock == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_order_codes_are_unique(warehouse: Warehouse):
+    customer = Customer.objects.create(name="Client Test")
+    workers = 8
+    barrier = threading.Barrier(workers)
+    codes = []
+
+    def place_order() -> None:
+        barrier.wait()
+        deadline = time.monotonic() + 30
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    codes.append(create_order(customer=customer, warehouse=warehouse, items=[]).code)
+                    return
+                except OperationalError:
+                    time.sleep(0.005)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=place_order) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(codes) == workers
+    assert len(set(codes)) == workers
+    assert Order.objects.count() == workers
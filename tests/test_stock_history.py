@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from dynamic_shop.inventory.history import archive_movements, build_stock_snapshots, stock_at
+from dynamic_shop.inventory.models import Product, StockMovement, StockMovementArchive, StockSnapshot, Warehouse
+from dynamic_shop.inventory.services import PurchaseItem, adjust_stock, receive_purchase, transfer_stock
+
+
+def _backdate(days_ago: int) -> None:
+    """Reporte les mouvements sans date forcée sur ``days_ago`` jours plus tôt."""
+
+    moment = timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=days_ago), time(12)))
+    StockMovement.objects.filter(created_at__gt=timezone.now() - timedelta(minutes=5)).update(created_at=moment)
+
+
+@pytest.mark.django_db
+def test_snapshots_are_built_incrementally_and_replayed(product: Product, warehouse: Warehouse):
+    other = Warehouse.objects.create(name="Annexe")
+    today = timezone.localdate()
+    (batch,) = receive_purchase("Test", [PurchaseItem(product=product, quantity=50, batch_code="HIST1")], warehouse)
+    _backdate(3)
+    transfer_stock(product, 5, warehouse, other, batch=batch)
+    adjust_stock(product, warehouse, -10, reason="Casse", batch=batch)
+    _backdate(2)
+
+    assert build_stock_snapshots() == 3
+    assert build_stock_snapshots() == 0
+    assert stock_at(product.pk, warehouse, today - timedelta(days=3)) == 50
+    assert stock_at(product.pk, warehouse, today - timedelta(days=2)) == 35
+    assert stock_at(product.pk, other, today - timedelta(days=2)) == 5
+    assert stock_at(product.pk, other, today - timedelta(days=4)) == 0
+
+    # Les mouvements du jour sont rejoués par-dessus le dernier instantané.
+    adjust_stock(product, warehouse, -4, reason="Casse", batch=batch)
+    assert stock_at(product.pk, warehouse, today) == 31
+    assert StockSnapshot.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_stock_at_endpoint(api_client, product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=12, batch_code="HIST2")], warehouse)
+    response = api_client.get(reverse("inventory-ops-stock-at"), {"date": timezone.localdate().isoformat()})
+    assert response.status_code == 200
+    assert response.json()["results"] == [{"sku": product.sku, "warehouse": warehouse.name, "quantity": 12}]
+    assert api_client.get(reverse("inventory-ops-stock-at")).status_code == 400
+
+
+@pytest.mark.django_db
+def test_archive_keeps_one_opening_balance_per_batch(product: Product, warehouse: Warehouse):
+    other = Warehouse.objects.create(name="Annexe")
+    today = timezone.localdate()
+    (batch,) = receive_purchase("Test", [PurchaseItem(product=product, quantity=50, batch_code="ARCH1")], warehouse)
+    transfer_stock(product, 5, warehouse, other, batch=batch)
+    _backdate(40)
+    adjust_stock(product, warehouse, -10, reason="Casse", batch=batch)
+    _backdate(35)
+    adjust_stock(product, warehouse, -3, reason="Casse", batch=batch)
+
+    report = archive_movements(today - timedelta(days=30), products_per_chunk=1)
+    assert (report.archived, report.openings) == (3, 2)
+    assert StockMovementArchive.objects.count() == 3
+    openings = dict(
+        StockMovement.objects.filter(movement_type=StockMovement.MovementType.OPENING).values_list(
+            "batch__warehouse__name", "quantity"
+        )
+    )
+    assert openings == {warehouse.name: 35, other.name: 5}
+    assert StockMovement.objects.filter(movement_type=StockMovement.MovementType.ADJUSTMENT).count() == 1
+
+    # Reprise : rien de plus à archiver, l'historique reste lisible.
+    assert archive_movements(today - timedelta(days=30)).archived == 0
+    assert stock_at(product.pk, warehouse, today - timedelta(days=35)) == 35
+    assert stock_at(product.pk, warehouse, today) == 32
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from dynamic_shop.inventory import models
+from dynamic_shop.inventory.models import Batch, Product, Warehouse
+from dynamic_shop.inventory.services import PurchaseItem, adjust_stock, receive_purchase
+
+
+@pytest.mark.django_db
+def test_movements_apply_stock_deltas(product: Product, warehouse: Warehouse):
+    (batch,) = receive_purchase("Test", [PurchaseItem(product=product, quantity=40, batch_code="REC1")], warehouse)
+    adjust_stock(product, warehouse, -15, reason="Casse", batch=batch)
+    product.refresh_from_db()
+    assert product.remaining_stock == 25
+
+
+@pytest.mark.django_db(transaction=True)
+def test_direct_batch_writes_coalesce_alert_checks(product: Product, warehouse: Warehouse, monkeypatch):
+    calls = []
+    monkeypatch.setattr(models, "evaluate_reorder_alerts", lambda ids: calls.append(set(ids)))
+    with transaction.atomic():
+        batches = [
+            Batch.objects.create(
+                product=product, batch_code=f"REC1-{i}", initial_qty=5, remaining_qty=5, warehouse=warehouse
+            )
+            for i in range(3)
+        ]
+        batches[0].delete()
+        product.refresh_from_db()
+        assert product.remaining_stock == 10
+        assert calls == []
+    assert calls == [{product.pk}]
+
+
+@pytest.mark.django_db
+def test_reconcile_stock_command_fixes_drift(product: Product, warehouse: Warehouse):
+    receive_purchase("Test", [PurchaseItem(product=product, quantity=25, batch_code="REC2")], warehouse)
+    Product.objects.filter(pk=product.pk).update(remaining_stock=3)
+
+    out = StringIO()
+    call_command("reconcile_stock", "--dry-run", stdout=out)
+    assert "écart +22" in out.getvalue()
+    product.refresh_from_db()
+    assert product.remaining_stock == 3
+
+    call_command("reconcile_stock", stdout=StringIO())
+    product.refresh_from_db()
+    assert product.remaining_stock == Batch.objects.get(batch_code="REC2").remaining_qty == 25
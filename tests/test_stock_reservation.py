@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+
+from dynamic_shop.inventory.models import (
+    Batch,
+    InsufficientStockError,
+    Product,
+    StockMovement,
+    StockReservation,
+    Warehouse,
+)
+from dynamic_shop.inventory.services import (
+    PurchaseItem,
+    apply_movements_bulk,
+    available_stock,
+    receive_purchase,
+    reserve_batches,
+    sweep_expired_reservations,
+)
+from dynamic_shop.sales.models import Customer
+from dynamic_shop.sales.services import OrderItemData, cancel_order, confirm_order, create_order, ship_order
+
+
+def _order(product: Product, warehouse: Warehouse, quantity: int):
+    customer, _ = Customer.objects.get_or_create(name="Client Réservation")
+    return create_order(
+        customer=customer,
+        warehouse=warehouse,
+        items=[OrderItemData(product=product, quantity=quantity, unit_price=Decimal("1500"))],
+    )
+
+
+@pytest.mark.django_db
+def test_confirmed_order_holds_stock_for_next_orders(product: Product, warehouse: Warehouse):
+    (batch,) = receive_purchase("Test", [PurchaseItem(product=product, quantity=30, batch_code="RES1")], warehouse)
+    confirm_order(_order(product, warehouse, 20))
+    batch.refresh_from_db()
+    assert batch.remaining_qty == 30
+    assert batch.reserved_qty == 20
+    assert available_stock([product.pk], warehouse) == {product.pk: 10}
+    with pytest.raises(ValueError):
+        confirm_order(_order(product, warehouse, 15))
+    batch.refresh_from_db()
+    assert batch.reserved_qty == 20
+
+
+@pytest.mark.django_db
+def test_cancel_and_ship_close_reservations(product: Product, warehouse: Warehouse):
+    (batch,) = receive_purchase("Test", [PurchaseItem(product=product, quantity=30, batch_code="RES2")], warehouse)
+    cancelled = confirm_order(_order(product, warehouse, 10))
+    shipped = confirm_order(_order(product, warehouse, 5))
+    cancel_order(cancelled)
+    ship_order(shipped)
+    batch.refresh_from_db()
+    assert batch.reserved_qty == 0
+    assert batch.remaining_qty == 25
+    statuses = set(StockReservation.objects.values_list("reference", "status"))
+    assert statuses == {
+        (cancelled.code, StockReservation.Status.RELEASED),
+        (shipped.code, StockReservation.Status.CONSUMED),
+    }
+
+
+@pytest.mark.django_db
+def test_direct_decrements_cannot_take_reserved_stock(product: Product, warehouse: Warehouse):
+    (batch,) = receive_purchase("Test", [PurchaseItem(product=product, quantity=5, batch_code="RES3")], warehouse)
+    order = confirm_order(_order(product, warehouse, 5))
+
+    def out(quantity: int) -> StockMovement:
+        return StockMovement(
+            product=product,
+            batch=batch,
+            movement_type=StockMovement.MovementType.OUT,
+            quantity=quantity,
+            from_warehouse=warehouse,
+        )
+
+    with pytest.raises(InsufficientStockError):
+        out(5).save()
+    with pytest.raises(InsufficientStockError):
+        apply_movements_bulk([out(1)])
+    batch.refresh_from_db()
+    assert (batch.remaining_qty, batch.reserved_qty) == (5, 5)
+
+    # L'expédition solde sa réservation avant de sortir le stock promis.
+    ship_order(order)
+    batch.refresh_from_db()
+    assert (batch.remaining_qty, batch.reserved_qty) == (0, 0)
+
+
+@pytest.mark.django_db
+def test_sweeper_releases_expired_reservations_in_bulk(product: Product, warehouse: Warehouse):
+    batches = receive_purchase(
+        "Test",
+        [PurchaseItem(product=product, quantity=10, batch_code=f"RES-S{i}") for i in range(3)],
+        warehouse,
+    )
+    reserve_batches([(batch, 4) for batch in batches], reference="OLD", ttl=timedelta(minutes=5))
+    reserve_batches([(batches[0], 3)], reference="FRESH", ttl=timedelta(hours=1))
+    assert sweep_expired_reservations(now=timezone.now() + timedelta(minutes=10), chunk_size=2) == 3
+    assert list(Batch.objects.order_by("batch_code").values_list("reserved_qty", flat=True)) == [3, 0, 0]
+    assert StockReservation.objects.get(reference="FRESH").status == StockReservation.Status.ACTIVE